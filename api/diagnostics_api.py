@@ -0,0 +1,37 @@
+import hmac
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from core.database import pool_metrics
+from core.sql_metrics import sql_metrics
+
+# Operational numbers for whoever runs the server (read-only).
+# They share the public spectator port, so only the server machine itself, or a caller
+# sending the diagnostics_token (X-Diagnostics-Token header), may read them.
+router = APIRouter()
+
+DIAGNOSTICS_TOKEN = os.getenv("diagnostics_token", "")
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def require_diagnostics_access(request: Request):
+    client = request.client.host if request.client else None
+    server = request.scope.get("server") or (None, None)
+    # Same machine: loopback, or the LAN address the server listens on (server.py binds to it)
+    if client and (client in LOOPBACK_HOSTS or client == server[0]):
+        return
+    token = request.headers.get("x-diagnostics-token", "")
+    if DIAGNOSTICS_TOKEN and hmac.compare_digest(token, DIAGNOSTICS_TOKEN):
+        return
+    raise HTTPException(status_code=403, detail="Diagnostics are only available on the server machine.")
+
+
+@router.get("/api/diagnostics/pool", dependencies=[Depends(require_diagnostics_access)])
+def pool_stats():
+    return JSONResponse(pool_metrics.stats())
+
+
+@router.get("/api/diagnostics/sql", dependencies=[Depends(require_diagnostics_access)])
+def sql_stats():
+    # Statement parameters (names, scores...) are only shown on the admin screen
+    return JSONResponse(sql_metrics.stats(include_parameters=False))
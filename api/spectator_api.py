@@ -0,0 +1,79 @@
+import asyncio
+import os
+from fastapi import APIRouter, Request
+from fastapi.responses import Response, StreamingResponse, FileResponse, JSONResponse
+from core.database import SessionLocal
+from models.all_models import Event
+from services.spectator_feed import spectator_feed
+
+# Read-only endpoints for spectators and projectors (no Flet session per phone)
+router = APIRouter()
+
+SPECTATOR_PAGE = os.path.join(os.path.dirname(__file__), "spectator.html")
+HEARTBEAT_SECONDS = 15
+
+# ---------------------------------------------------------
+# JSON
+# ---------------------------------------------------------
+@router.get("/api/events")
+def list_events():
+    db = SessionLocal()
+    try:
+        events = db.query(Event.id, Event.name, Event.event_type, Event.status).all()
+        return [{"id": e_id, "name": name, "event_type": e_type, "status": status} for e_id, name, e_type, status in events]
+    finally:
+        db.close()
+
+
+@router.get("/api/events/{event_id}/standings")
+def get_standings(event_id: int, request: Request):
+    etag, body = spectator_feed.snapshot(event_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# ---------------------------------------------------------
+# SERVER-SENT EVENTS
+# ---------------------------------------------------------
+@router.get("/api/events/{event_id}/stream")
+async def stream_standings(event_id: int, request: Request):
+    """
+    Pushes standings changes: first a full snapshot (or a delta from Last-Event-ID on reconnect),
+    then one message per change. The SSE id is the standings ETag.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    token = spectator_feed.listen(event_id, lambda: loop.call_soon_threadsafe(changed.set))
+
+    async def messages():
+        last_etag = request.headers.get("last-event-id")
+        try:
+            while True:
+                etag, message = await asyncio.to_thread(spectator_feed.delta, event_id, last_etag)
+                if message is not None:
+                    last_etag = etag
+                    yield b"id: " + etag.encode() + b"\ndata: " + message + b"\n\n"
+                try:
+                    await asyncio.wait_for(changed.wait(), HEARTBEAT_SECONDS)
+                    changed.clear()
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected(): break
+                    yield b": keep-alive\n\n"
+        finally:
+            spectator_feed.unlisten(event_id, token)
+
+    return StreamingResponse(messages(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ---------------------------------------------------------
+# STATIC PAGE
+# ---------------------------------------------------------
+@router.get("/spectator")
+@router.get("/spectator/{event_id}")
+def spectator_page(event_id: int = None):
+    return FileResponse(SPECTATOR_PAGE, media_type="text/html")
+
+
+@router.get("/api/spectator/stats")
+def spectator_stats():
+    return JSONResponse(spectator_feed.stats())
@@ -1,6 +1,14 @@
 import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+from sqlalchemy import create_engine, text, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import QueuePool
+from core.sql_metrics import sql_metrics
 
 # ----------------------------------------------------------------
 # 1. CONFIGURATION & CREDENTIALS
@@ -11,6 +19,17 @@ password = os.getenv("db_pass", "")
 host = os.getenv("db_host", "localhost")
 db_name = "judgemenot_db"
 
+# Backend: "mysql" (default) or "sqlite" (one laptop, no server: a single file next to the app)
+db_backend = os.getenv("db_backend", "mysql").strip().lower()
+sqlite_path = os.path.abspath(os.getenv("db_sqlite_path", "judgemenot.db"))
+sqlite_busy_timeout_ms = int(os.getenv("db_sqlite_busy_timeout_ms", "5000"))
+
+# Connection pool (every connected client polls with its own sessions, so size it for the room)
+pool_size = int(os.getenv("db_pool_size", "10"))
+max_overflow = int(os.getenv("db_max_overflow", "20"))
+pool_timeout = float(os.getenv("db_pool_timeout", "30"))
+pool_pre_ping = os.getenv("db_pool_pre_ping", "true").strip().lower() in ("1", "true", "yes")
+
 # Construct Connection Strings
 if password.strip() == "":
     # For connecting to the Server only (to create DB)
@@ -21,13 +40,19 @@ else:
     SERVER_URL = f"mysql+pymysql://{username}:{password}@{host}"
     DATABASE_URL = f"mysql+pymysql://{username}:{password}@{host}/{db_name}"
 
+if db_backend == "sqlite":
+    DATABASE_URL = f"sqlite:///{sqlite_path}"
+
+# Written once the database is known to exist, so warm restarts skip the server round-trip
+BOOTSTRAP_MARKER = os.getenv("db_bootstrap_marker", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".db_bootstrapped"))
+
 # ----------------------------------------------------------------
 # 2. AUTO-CREATE DATABASE LOGIC
 # ----------------------------------------------------------------
 def create_database_if_not_exists():
     """
     Connects to MySQL server and creates the database if it doesn't exist.
-    This runs automatically when the app starts.
+    Returns True when the database is ready.
     """
     try:
         # We need isolation_level="AUTOCOMMIT" because CREATE DATABASE 
@@ -38,26 +63,325 @@ def create_database_if_not_exists():
             # Safe command that only creates if missing
             conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {db_name}"))
             print(f"✅ Database check: '{db_name}' is ready.")
+        return True
             
     except Exception as e:
         print(f"⚠️  Database Warning: Could not auto-create '{db_name}'.")
         print(f"   Error details: {e}")
         print("   Please ensure MySQL is running and the user has CREATE permissions.")
+        return False
     finally:
         # Close the temp connection immediately
         if 'temp_engine' in locals():
             temp_engine.dispose()
 
-# Run this immediately when the module is imported
-create_database_if_not_exists()
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
+
+def bootstrap_database(force=False):
+    """
+    Makes sure the database exists, at most once per process. After the first success a
+    marker file (keyed on host + database) lets later starts skip the check entirely;
+    force=True (init_db.py) always asks the server. Returns True when the database is ready.
+    """
+    global _bootstrapped
+    marker_key = f"{host}/{db_name}"
+    with _bootstrap_lock:
+        if _bootstrapped and not force:
+            return True
+        if db_backend == "sqlite":
+            # No server: the file is created on first connect
+            os.makedirs(os.path.dirname(sqlite_path), exist_ok=True)
+            _bootstrapped = True
+            return True
+        if not force and _read_marker() == marker_key:
+            _bootstrapped = True
+            return True
+        if create_database_if_not_exists():
+            _bootstrapped = True
+            _write_marker(marker_key)
+        return _bootstrapped
+
+def _read_marker():
+    try:
+        with open(BOOTSTRAP_MARKER, encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _write_marker(marker_key):
+    try:
+        with open(BOOTSTRAP_MARKER, "w", encoding="utf-8") as f:
+            f.write(marker_key)
+    except OSError:
+        pass # Read-only install: just check again next start
 
 # ----------------------------------------------------------------
-# 3. FINAL ENGINE SETUP
+# 3. POOL METRICS
+# ----------------------------------------------------------------
+class PoolMetrics:
+    """
+    Live connection pool numbers: checked-out connections, overflow in use, time spent
+    waiting for a connection and checkout failures (pool exhausted / server unreachable).
+    Counts come from the pool's connect/checkout/checkin/invalidate events; wait time is
+    measured by MeteredQueuePool around the whole checkout (queue wait, pre-ping, new connection).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pool = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.failures = 0
+            self.timeouts = 0
+            self.last_failure = None
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+            self.slow_waits = 0 # Checkouts that had to wait for another client's connection
+
+    def attach(self, engine):
+        self.pool = engine.pool
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock: self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock: self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock: self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock: self.invalidations += 1
+
+    def record_wait(self, seconds, error=None):
+        with self._lock:
+            self.wait_total_s += seconds
+            self.wait_max_s = max(self.wait_max_s, seconds)
+            if seconds >= 0.05: self.slow_waits += 1
+            if error is not None:
+                self.failures += 1
+                if isinstance(error, PoolTimeoutError): self.timeouts += 1
+                self.last_failure = f"{type(error).__name__}: {error}"
+
+    def stats(self):
+        pool = self.pool
+        with self._lock:
+            waits = self.checkouts + self.failures
+            return {
+                "pool_size": pool.size() if pool else None,
+                "max_overflow": pool.configured_max_overflow if pool else None,
+                "checked_out": pool.checkedout() if pool else 0,
+                "idle": pool.checkedin() if pool else 0,
+                "overflow_in_use": max(pool.overflow(), 0) if pool else 0,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "last_failure": self.last_failure,
+                "wait_avg_ms": round(1000 * self.wait_total_s / waits, 2) if waits else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max_s, 2),
+                "slow_waits": self.slow_waits
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited (and whether it failed) to pool_metrics."""
+    def __init__(self, creator, pool_size=5, max_overflow=10, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.configured_max_overflow = max_overflow # QueuePool keeps it private
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except Exception as e:
+            pool_metrics.record_wait(time.perf_counter() - start, e)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+# Shared by every session served by this process
+pool_metrics = PoolMetrics()
+
+# ----------------------------------------------------------------
+# 4. SQLITE TUNING
+# ----------------------------------------------------------------
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Runs on every new SQLite connection. WAL lets the many polling readers run while a
+    score is being written; busy_timeout makes concurrent writers wait instead of failing.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")    # Safe with WAL, far fewer fsyncs
+    cursor.execute(f"PRAGMA busy_timeout={sqlite_busy_timeout_ms}")
+    cursor.execute("PRAGMA foreign_keys=ON")       # Same integrity rules as InnoDB
+    cursor.execute("PRAGMA cache_size=-32000")     # 32 MB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=134217728")   # 128 MB memory-mapped reads
+    cursor.close()
+
 # ----------------------------------------------------------------
-# Now we connect to the actual database
-engine = create_engine(DATABASE_URL, pool_recycle=3600)
+# 5. FINAL ENGINE SETUP (lazy: importing services never touches the server)
+# ----------------------------------------------------------------
+def create_app_engine(url=None):
+    """Builds an engine with the app's pool settings for `url` (DATABASE_URL by default)."""
+    url = url or DATABASE_URL
+    if url.startswith("sqlite"):
+        new_engine = create_engine(
+            url,
+            poolclass=MeteredQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            connect_args={"check_same_thread": False} # Pooled connections move between threads
+        )
+        event.listen(new_engine, "connect", apply_sqlite_pragmas)
+        return new_engine
+
+    return create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=pool_pre_ping,
+        pool_recycle=3600
+    )
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """The application engine, built (after the bootstrap check) on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                bootstrap_database()
+                new_engine = create_app_engine()
+                pool_metrics.attach(new_engine)
+                sql_metrics.attach(new_engine)
+                _engine = new_engine
+    return _engine
+
+def __getattr__(name):
+    # Keeps `from core.database import engine` working without building it at import time
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ----------------------------------------------------------------
+# 6. SESSIONS & UNIT OF WORK
+# ----------------------------------------------------------------
+# Unit of work running in this thread / task (None outside one)
+_current_unit = contextvars.ContextVar("unit_of_work", default=None)
+
+class AppSession(Session):
+    """Session whose close() is left to the unit of work that shares it (if any)."""
+    owned_by_unit = False
+
+    def close(self):
+        if self.owned_by_unit:
+            # Still in use by the other service calls of the unit of work. A call that failed
+            # without rolling back must not hand its broken (PendingRollbackError) or
+            # half-written transaction to the next call, which would commit it.
+            if not self.is_active or self.new or self.dirty or self.deleted or self.info.get("uncommitted_writes"):
+                self.rollback()
+            return
+        super().close()
+
+
+@event.listens_for(AppSession, "do_orm_execute")
+def _track_executed_writes(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["uncommitted_writes"] = True
+
+@event.listens_for(AppSession, "after_flush")
+def _track_flushed_writes(session, flush_context):
+    session.info["uncommitted_writes"] = True
+
+@event.listens_for(AppSession, "after_commit")
+@event.listens_for(AppSession, "after_rollback")
+def _clear_writes(session):
+    session.info.pop("uncommitted_writes", None)
+
+
+class UnitOfWork:
+    """The session shared by one unit_of_work() block (opened by the first SessionLocal() call)."""
+    def __init__(self):
+        self.session = None
+
+
+class LazySessionmaker(sessionmaker):
+    """
+    sessionmaker that binds to get_engine() when the first session is opened.
+    Inside unit_of_work() it hands out the unit's shared session instead of a new one.
+    """
+    def __init__(self, bind=None, class_=AppSession, **kw):
+        super().__init__(bind=bind, class_=class_, **kw)
+
+    def __call__(self, **local_kw):
+        unit = _current_unit.get()
+        if unit is not None and unit.session is not None:
+            return unit.session
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        session = super().__call__(**local_kw)
+        if unit is not None:
+            session.owned_by_unit = True
+            unit.session = session
+        return session
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Every SessionLocal() opened inside the block (on this thread) is the SAME session:
+    one pooled connection and one identity map for a whole screen load, instead of a
+    checkout per service call. Services still commit / roll back their own changes;
+    only their close() is deferred to the end of the block. Nested blocks join the outer one.
+    """
+    outer = _current_unit.get()
+    if outer is not None:
+        yield outer
+        return
+
+    unit = UnitOfWork()
+    token = _current_unit.set(unit)
+    try:
+        yield unit
+    finally:
+        _current_unit.reset(token)
+        if unit.session is not None:
+            unit.session.owned_by_unit = False
+            unit.session.close()
+
+
+def in_unit_of_work(fn):
+    """Decorator: runs the whole function in one unit_of_work()."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with unit_of_work():
+            return fn(*args, **kwargs)
+    return wrapper
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 # Dependency function to get DB session
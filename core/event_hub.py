@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------------------------------------------
+# 1. TOPICS
+# ----------------------------------------------------------------
+SCORES = "scores"             # Judge scores / quiz answers written
+SEGMENTS = "segments"         # Segment/round added, edited, activated or revealed
+CONTESTANTS = "contestants"   # Contestant added, edited, advanced or eliminated
+EVENTS = "events"             # Event created, deleted or status changed
+AUDIT = "audit"               # Audit log rows written
+
+# ----------------------------------------------------------------
+# 2. HUB
+# ----------------------------------------------------------------
+class _Subscription:
+    def __init__(self, topics, event_id, callback):
+        self.topics = set(topics)
+        self.event_id = event_id
+        self.callback = callback
+        self.active = True
+        self.running = False  # A delivery is in progress
+        self.pending = False  # Another change arrived during that delivery
+
+
+class EventHub:
+    """
+    In-process publish/subscribe for data changes.
+    Services publish AFTER committing; views subscribe to the topics of the event they show
+    and refresh only when something relevant changed (no per-session polling loops).
+    Bursts are coalesced: a subscriber is never run twice at once and a burst of changes
+    during one delivery results in exactly one more delivery.
+    """
+    def __init__(self, workers=8, debounce_ms=100):
+        self.debounce = debounce_ms / 1000.0
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # token -> _Subscription
+        self._listeners = []      # (topics, callback) run inline by the publisher
+        self._next_token = 1
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="event-hub")
+        self._thread = None
+
+        # Metrics
+        self.published = 0
+        self.deliveries = 0
+        self.failures = 0
+
+    def subscribe(self, topics, callback, event_id=None):
+        """
+        Runs callback() (on a hub worker thread) after any of `topics` fires for `event_id`
+        (event_id=None: any event). Returns a token for unsubscribe().
+        """
+        self._ensure_started()
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscriptions[token] = _Subscription(topics, event_id, callback)
+            return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            sub = self._subscriptions.pop(token, None)
+            if sub: sub.active = False
+
+    def add_listener(self, topics, callback):
+        """Registers callback(topic, event_id), run synchronously inside publish() (keep it cheap)."""
+        with self._lock:
+            self._listeners.append((set(topics), callback))
+
+    def publish(self, topic, event_id=None):
+        """Announces a committed change. event_id=None reaches every subscriber of the topic."""
+        with self._lock:
+            self.published += 1
+            listeners = [cb for topics, cb in self._listeners if topic in topics]
+        for cb in listeners:
+            cb(topic, event_id)
+        # Nothing to deliver until a view has subscribed (dispatcher not running yet)
+        if self._thread is not None:
+            self._queue.put((topic, event_id))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscriptions),
+                "published": self.published,
+                "deliveries": self.deliveries,
+                "failures": self.failures,
+                "queue_depth": self._queue.qsize()
+            }
+
+    # ------------------------------------------------------------
+    # DISPATCH
+    # ------------------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-hub-dispatch", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            changes = [self._queue.get()]
+            # Let a burst (e.g. a whole scoring card) settle into one delivery
+            time.sleep(self.debounce)
+            while True:
+                try:
+                    changes.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                targets = [
+                    sub for sub in self._subscriptions.values()
+                    if any(topic in sub.topics and (sub.event_id is None or event_id is None or sub.event_id == event_id)
+                           for topic, event_id in changes)
+                ]
+                for sub in targets:
+                    if sub.running:
+                        sub.pending = True
+                    else:
+                        sub.running = True
+                        self._executor.submit(self._deliver, sub)
+
+    def _deliver(self, sub):
+        while True:
+            try:
+                if sub.active:
+                    sub.callback()
+            except Exception as e:
+                # Keep the subscription (e.g. a transient DB error during a refresh): pages
+                # leave through unsubscribe(), which page_tasks calls on navigation/disconnect
+                print(f"Event hub subscriber failed: {e}")
+                with self._lock:
+                    self.failures += 1
+
+            with self._lock:
+                self.deliveries += 1
+                if sub.pending and sub.active:
+                    sub.pending = False
+                    continue
+                sub.running = False
+                sub.pending = False
+                return
+
+
+# Shared by every session served by this process
+event_hub = EventHub()
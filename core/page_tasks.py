@@ -0,0 +1,86 @@
+import threading
+from core.sql_metrics import sql_metrics
+
+# ----------------------------------------------------------------
+# PER-PAGE BACKGROUND WORK REGISTRY
+# ----------------------------------------------------------------
+class PageTasks:
+    """
+    Tracks the background work (event subscriptions, loader threads) owned by each
+    connected page, so main.py can cancel all of it when the route changes or the
+    session disconnects, instead of relying on the view's own back/logout buttons.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}    # page key -> {task_id: (name, cancel)}
+        self._next_id = 1
+
+    def add(self, page, name, cancel):
+        """Registers a running worker of `page`; cancel() stops it. Returns a task id."""
+        with self._lock:
+            task_id = self._next_id
+            self._next_id += 1
+            self._tasks.setdefault(self._key(page), {})[task_id] = (name, cancel)
+            return task_id
+
+    def start(self, page, name, target):
+        """Runs target() on a daemon thread, counted as a worker of `page` until it returns."""
+        task_id = self.add(page, name, lambda: None) # A running thread cannot be killed; just stop tracking it
+        route = getattr(page, "route", None)
+        def run():
+            try:
+                with sql_metrics.route(route): # Queries still count towards the screen that started them
+                    target()
+            finally:
+                self.discard(page, task_id)
+        threading.Thread(target=run, name=f"page-task-{name}", daemon=True).start()
+        return task_id
+
+    def cancel(self, page, task_id):
+        """Stops one worker (safe to call twice)."""
+        with self._lock:
+            task = self._tasks.get(self._key(page), {}).pop(task_id, None)
+        if task:
+            self._run_cancel(task)
+
+    def discard(self, page, task_id):
+        """Forgets a worker that already finished on its own."""
+        with self._lock:
+            self._tasks.get(self._key(page), {}).pop(task_id, None)
+
+    def cancel_all(self, page):
+        """Stops every worker of a page (route change / disconnect). Returns how many were stopped."""
+        with self._lock:
+            tasks = self._tasks.pop(self._key(page), {})
+        for task in tasks.values():
+            self._run_cancel(task)
+        return len(tasks)
+
+    def count(self, page):
+        with self._lock:
+            return len(self._tasks.get(self._key(page), {}))
+
+    def stats(self):
+        with self._lock:
+            per_page = {key: sorted(name for name, _ in tasks.values()) for key, tasks in self._tasks.items() if tasks}
+        return {
+            "pages": len(per_page),
+            "workers": sum(len(names) for names in per_page.values()),
+            "per_page": per_page,
+            "process_threads": threading.active_count()
+        }
+
+    def _run_cancel(self, task):
+        name, cancel = task
+        try:
+            cancel()
+        except Exception as e:
+            print(f"Failed to cancel page task '{name}': {e}")
+
+    @staticmethod
+    def _key(page):
+        return getattr(page, "session_id", None) or id(page)
+
+
+# Shared by every session served by this process
+page_tasks = PageTasks()
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import time
+import datetime
+import functools
+import types
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# ----------------------------------------------------------------
+# CONFIGURATION
+# ----------------------------------------------------------------
+SLOW_QUERY_MS = float(os.getenv("sql_slow_ms", "200"))
+SAMPLES_PER_KEY = 500   # Rolling window behind the percentiles
+SLOW_LOG_SIZE = 100     # Most recent slow statements kept for the diagnostics screen
+
+NO_ROUTE = "(background)"
+NO_SCOPE = "(direct SQL)"
+
+# What the current thread / task is doing (set by main.py, page_tasks, the API and the services)
+_route = contextvars.ContextVar("sql_route", default=None)
+_scope = contextvars.ContextVar("sql_scope", default=None)
+
+
+def route_template(route):
+    """'/leaderboard/12' -> '/leaderboard/{id}', so every event shares one row."""
+    if not isinstance(route, str):
+        return NO_ROUTE
+    return re.sub(r"/\d+(?=/|$)", "/{id}", route or "") or "/"
+
+
+class _Timings:
+    """Statement count, total time and a rolling window of durations for one key."""
+    def __init__(self):
+        self.count = 0
+        self.calls = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_KEY)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        def pct(p):
+            return round(1000 * ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2) if ordered else 0.0
+        return {
+            "statements": self.count,
+            "calls": self.calls,
+            "statements_per_call": round(self.count / self.calls, 1) if self.calls else None,
+            "total_ms": round(1000 * self.total_s, 2),
+            "avg_ms": round(1000 * self.total_s / self.count, 2) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(1000 * self.max_s, 2)
+        }
+
+
+class SqlMetrics:
+    """
+    Per-route and per-service-method SQL statistics, collected from the engine's
+    before/after_cursor_execute events: statement count, time, rolling p50/p95/p99,
+    plus a log of statements slower than SLOW_QUERY_MS (with their parameters).
+    Each statement is attributed to the outermost service method running and to the
+    route (screen / HTTP path) that triggered it.
+    """
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.by_route = {}
+            self.by_scope = {}
+            self.slow = deque(maxlen=SLOW_LOG_SIZE)
+            self.since = datetime.datetime.now()
+
+    # ---------------------------------------------------------
+    # HOOKS
+    # ---------------------------------------------------------
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_metrics_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("sql_metrics_start")
+        if starts:
+            self.record(statement, parameters, time.perf_counter() - starts.pop())
+
+    def record(self, statement, parameters, seconds):
+        route = _route.get() or NO_ROUTE
+        scope = _scope.get() or NO_SCOPE
+        with self._lock:
+            self.by_route.setdefault(route, _Timings()).add(seconds)
+            self.by_scope.setdefault(scope, _Timings()).add(seconds)
+            if seconds * 1000 >= self.slow_ms:
+                self.slow.appendleft({
+                    "at": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "ms": round(seconds * 1000, 2),
+                    "route": route,
+                    "scope": scope,
+                    "statement": " ".join(statement.split()),
+                    "parameters": repr(parameters)[:500]
+                })
+        if seconds * 1000 >= self.slow_ms:
+            print(f"🐢 Slow query ({seconds * 1000:.0f} ms) in {scope} [{route}]: {' '.join(statement.split())[:200]} {repr(parameters)[:200]}")
+
+    # ---------------------------------------------------------
+    # ATTRIBUTION
+    # ---------------------------------------------------------
+    @contextmanager
+    def route(self, route):
+        """Statements run inside the block count towards `route` (templated)."""
+        template = route_template(route)
+        token = _route.set(template)
+        with self._lock:
+            self.by_route.setdefault(template, _Timings()).calls += 1
+        try:
+            yield
+        finally:
+            _route.reset(token)
+
+    @contextmanager
+    def scope(self, name):
+        """Statements run inside the block count towards `name` (the outermost scope wins)."""
+        if _scope.get() is not None:
+            yield
+            return
+        token = _scope.set(name)
+        with self._lock:
+            self.by_scope.setdefault(name, _Timings()).calls += 1
+        try:
+            yield
+        finally:
+            _scope.reset(token)
+
+    def instrument(self, cls):
+        """Class decorator: every public method becomes a scope named 'Class.method'."""
+        for name, fn in list(vars(cls).items()):
+            if isinstance(fn, types.FunctionType) and not name.startswith("_"):
+                setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", fn))
+        return cls
+
+    def _wrap(self, label, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.scope(label):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    # ---------------------------------------------------------
+    # READ SIDE
+    # ---------------------------------------------------------
+    def stats(self, include_parameters=True):
+        with self._lock:
+            slow = list(self.slow) if include_parameters else [{k: v for k, v in q.items() if k != "parameters"} for q in self.slow]
+            return {
+                "since": self.since.isoformat(timespec="seconds"),
+                "slow_query_ms": self.slow_ms,
+                "routes": {k: t.summary() for k, t in sorted(self.by_route.items(), key=lambda kv: -kv[1].total_s)},
+                "scopes": {k: t.summary() for k, t in sorted(self.by_scope.items(), key=lambda kv: -kv[1].total_s)},
+                "slow_queries": slow
+            }
+
+    def dump_json(self, path=None):
+        """Writes the stats as JSON (to `path`, or a timestamped file). Returns the file name."""
+        path = path or f"sql_metrics_{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stats(), f, indent=2)
+        return path
+
+
+# Shared by every session served by this process
+sql_metrics = SqlMetrics()
@@ -1,14 +1,17 @@
 import bcrypt
 from sqlalchemy.orm import Session
-from core.database import engine, Base, SessionLocal
-from models.all_models import User, Event, Segment
+from core.database import SessionLocal, bootstrap_database
+from models.all_models import User, Event, EventRevision
+from services.running_totals import rebuild_running_totals
+from migrations import run_migrations
 
 def init_db():
     # 1. Create Tables
-    print("⏳ Connecting to MySQL and creating tables...")
+    print("⏳ Connecting to the database and creating tables...")
+    bootstrap_database(force=True) # Always ask the server here (also refreshes the startup marker)
     try:
-        # This checks your models and creates tables if they don't exist
-        Base.metadata.create_all(bind=engine)
+        # Creates missing tables, then applies pending schema migrations (see migrations/)
+        run_migrations()
         print("✅ Tables created successfully!")
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
@@ -44,6 +47,20 @@ def init_db():
     else:
         print("ℹ️ Admin user already exists. Skipping creation.")
 
+    # 4. Backfill running totals (safe to re-run; rebuilt from the scores table)
+    pageants = db.query(Event).filter(Event.event_type == "Pageant").all()
+    for ev in pageants:
+        rebuild_running_totals(db, ev.id)
+    db.commit()
+    print(f"✅ Running totals rebuilt for {len(pageants)} pageant event(s).")
+
+    # 5. Backfill change-tracking rows (one revision counter per event)
+    tracked = {e_id for (e_id,) in db.query(EventRevision.event_id).all()}
+    missing = [ev_id for (ev_id,) in db.query(Event.id).all() if ev_id not in tracked]
+    db.add_all(EventRevision(event_id=ev_id, revision=1) for ev_id in missing)
+    db.commit()
+    print(f"✅ Revision counters created for {len(missing)} event(s).")
+
     db.close()
     print("🚀 Database initialization complete.")
 
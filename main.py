@@ -3,7 +3,10 @@ import socket
 import os
 from dotenv import load_dotenv 
 from services.auth_service import AuthService
-from core.database import SessionLocal
+from core.database import SessionLocal, bootstrap_database
+from migrations import run_migrations
+from core.page_tasks import page_tasks
+from core.sql_metrics import sql_metrics
 
 # Views
 from views.login_view import LoginView
@@ -32,6 +35,11 @@ def main(page: ft.Page):
     auth_service = AuthService()
     
     def route_change(route):
+        # Queries made while building the screen count towards its route
+        with sql_metrics.route(page.route):
+            show_route()
+
+    def show_route():
         # ---------------------------------------------------------
         # 🔒 ANDROID LOCK (DEPLOYMENT MODE)
         # ---------------------------------------------------------
@@ -43,6 +51,8 @@ def main(page: ft.Page):
                 page.go("/leaderboard")
                 return 
 
+        # Stop the previous view's subscriptions/loaders before building the new one
+        page_tasks.cancel_all(page)
         page.views.clear()
         uid = page.session.get("user_id")
         role = page.session.get("user_role")
@@ -99,8 +109,19 @@ def main(page: ft.Page):
         page.session.clear()
         page.go("/login")
 
+    def on_disconnect(e):
+        # Browser tab closed or connection lost: nothing should keep working for this page
+        page_tasks.cancel_all(page)
+
+    def on_connect(e):
+        # Same session reconnected: rebuild the current view (and its live updates)
+        page.go(page.route)
+
     page.on_route_change = route_change
     page.on_view_pop = view_pop
+    page.on_disconnect = on_disconnect
+    page.on_close = on_disconnect
+    page.on_connect = on_connect
     page.go("/login")
 
 def get_local_ip():
@@ -123,5 +144,10 @@ if __name__ == "__main__":
     print(f"📱  Judges connect here: http://{my_ip}:{port}")
     print(f"--------------------------------------------------")
 
+    bootstrap_database() # Once per process (skipped on warm restarts)
+    try:
+        run_migrations() # Pending schema changes only (one small query when up to date)
+    except Exception as e:
+        print(f"⚠️  Could not migrate the database schema: {e}")
     ft.app(target=main, view=ft.AppView.WEB_BROWSER, port=port, host=my_ip)
     # ft.app(target=main)
\ No newline at end of file
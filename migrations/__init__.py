@@ -0,0 +1,76 @@
+import re
+import pkgutil
+import importlib
+import datetime
+from contextlib import contextmanager
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from core.database import get_engine
+from models.all_models import SchemaMigration
+
+# ----------------------------------------------------------------
+# VERSIONED SCHEMA MIGRATIONS
+# ----------------------------------------------------------------
+# Each migration is a module mNNNN_<name>.py in this package with a DESCRIPTION and an
+# upgrade(engine) function. They run in version order, each at most once per database;
+# the applied versions are recorded in the schema_migrations table. upgrade() must be
+# safe to re-run (e.g. create an index only if it is missing) in case a run is interrupted.
+MIGRATION_MODULE = re.compile(r"^m(\d{4})_(\w+)$")
+
+
+def discover_migrations():
+    """[(version, name, module)] of every migration in this package, in order."""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = MIGRATION_MODULE.match(info.name)
+        if match:
+            found.append((int(match.group(1)), match.group(2), importlib.import_module(f"{__name__}.{info.name}")))
+    found.sort(key=lambda m: m[0])
+    return found
+
+
+def applied_versions(engine):
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    with Session(bind=engine) as db:
+        return {v for (v,) in db.query(SchemaMigration.version).all()}
+
+
+@contextmanager
+def migration_lock(engine):
+    """Keeps two app processes starting at once from migrating the same MySQL database."""
+    if engine.dialect.name != "mysql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT GET_LOCK('judgemenot_migrations', 120)"))
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK('judgemenot_migrations')"))
+
+
+def run_migrations(engine=None):
+    """Applies every pending migration in order. Returns the versions applied (empty when up to date)."""
+    engine = engine or get_engine()
+    applied = []
+    with migration_lock(engine):
+        done = applied_versions(engine)
+        for version, name, module in discover_migrations():
+            if version in done:
+                continue
+            print(f"⏳ Migration {version:04d} ({name}): {module.DESCRIPTION}...")
+            module.upgrade(engine)
+            with Session(bind=engine) as db:
+                db.add(SchemaMigration(version=version, name=name, applied_at=datetime.datetime.now()))
+                db.commit()
+            applied.append(version)
+    if applied:
+        print(f"✅ Database schema is at version {applied[-1]:04d}.")
+    return applied
+
+
+def migration_status(engine=None):
+    """[(version, name, applied?)] for the CLI."""
+    engine = engine or get_engine()
+    done = applied_versions(engine)
+    return [(version, name, version in done) for version, name, _ in discover_migrations()]
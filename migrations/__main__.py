@@ -0,0 +1,17 @@
+import sys
+from core.database import bootstrap_database
+from migrations import run_migrations, migration_status
+
+# python -m migrations [upgrade|status]
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    bootstrap_database(force=True)
+    if command == "status":
+        for version, name, applied in migration_status():
+            print(f"{version:04d}  {'applied' if applied else 'PENDING'}  {name}")
+    elif command == "upgrade":
+        if not run_migrations():
+            print("ℹ️ Database schema is up to date.")
+    else:
+        print("Usage: python -m migrations [upgrade|status]")
+        sys.exit(2)
@@ -0,0 +1,43 @@
+from sqlalchemy import Integer
+from sqlalchemy.orm import Session
+from core.database import Base
+from migrations.ops import remove_duplicate_scores, index_exists, create_index, add_column
+
+DESCRIPTION = "Create missing tables, score unique keys and audit log columns/indexes"
+
+# Upgrading an existing database: the keys, columns and indexes this version introduced are
+# spelled out here, so later model changes never alter what the upgrade does.
+# A fresh install instead gets its tables from create_all() below, i.e. the CURRENT models
+# (with every later column and index); the later migrations then find nothing left to do.
+SCORE_UNIQUE_KEYS = [
+    ("uq_scores_judge_contestant_criteria", ["judge_id", "contestant_id", "criteria_id"]),
+    ("uq_scores_contestant_segment_question", ["contestant_id", "segment_id", "question_number"]),
+]
+AUDIT_LOG_INDEXES = [
+    ("ix_audit_logs_timestamp_id", ["timestamp", "id"]),
+    ("ix_audit_logs_action_timestamp", ["action", "timestamp", "id"]),
+    ("ix_audit_logs_user_timestamp", ["user_id", "timestamp", "id"]),
+    ("ix_audit_logs_event_timestamp", ["event_id", "timestamp", "id"]),
+]
+
+def upgrade(engine):
+    # Tables that do not exist yet, as the current models define them; existing tables are upgraded below
+    Base.metadata.create_all(bind=engine)
+
+    # Older databases: remove rows that would violate the score unique keys first
+    if not all(index_exists(engine, "scores", name) for name, _ in SCORE_UNIQUE_KEYS):
+        db = Session(bind=engine)
+        try:
+            removed = remove_duplicate_scores(db, [columns for _, columns in SCORE_UNIQUE_KEYS])
+            db.commit()
+            if removed:
+                print(f"🧹 Removed {removed} duplicate score row(s).")
+        finally:
+            db.close()
+    for name, columns in SCORE_UNIQUE_KEYS:
+        create_index(engine, "scores", name, columns, unique=True)
+    create_index(engine, "scores", "ix_scores_segment_contestant", ["segment_id", "contestant_id", "score_value"])
+
+    add_column(engine, "audit_logs", "event_id", Integer())
+    for name, columns in AUDIT_LOG_INDEXES:
+        create_index(engine, "audit_logs", name, columns)
@@ -0,0 +1,12 @@
+from migrations.ops import create_index
+
+DESCRIPTION = "Indexes for the hot polling and tabulation queries"
+
+def upgrade(engine):
+    create_index(engine, "scores", "ix_scores_criteria_contestant", ["criteria_id", "contestant_id", "score_value"])
+    create_index(engine, "contestants", "ix_contestants_event_status", ["event_id", "status"])
+    create_index(engine, "segments", "ix_segments_event_active", ["event_id", "is_active"])
+    create_index(engine, "event_judges", "ix_event_judges_event_judge", ["event_id", "judge_id"])
+    create_index(engine, "audit_logs", "ix_audit_logs_timestamp_id", ["timestamp", "id"]) # Leading timestamp column serves timestamp-only scans
+    create_index(engine, "judge_progress", "ix_judge_progress_judge_segment", ["judge_id", "segment_id"])
+    create_index(engine, "audit_logs", "ft_audit_logs_details", ["details"], dialect="mysql", mysql_prefix="FULLTEXT") # Audit search
@@ -0,0 +1,56 @@
+from sqlalchemy import func, inspect, text, select, delete, MetaData, Table, Index
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.orm import Session
+
+# ---------------------------------------------------------
+# SCHEMA HELPERS FOR MIGRATIONS (all safe to re-run)
+# ---------------------------------------------------------
+def remove_duplicate_scores(db: Session, keys):
+    """
+    Deletes duplicate score rows (e.g. from double-clicks), keeping the latest row of each key.
+    keys: column-name lists spelled out by the migration; the table is reflected, not the live Score model.
+    """
+    scores = Table("scores", MetaData(), autoload_with=db.get_bind())
+    removed = 0
+    for key in keys:
+        columns = [scores.c[name] for name in key]
+        dupes = db.execute(
+            select(func.max(scores.c.id), *columns)
+            .where(*[col.is_not(None) for col in columns])
+            .group_by(*columns)
+            .having(func.count(scores.c.id) > 1)
+        ).all()
+
+        for keep_id, *values in dupes:
+            removed += db.execute(delete(scores).where(
+                *[col == val for col, val in zip(columns, values)],
+                scores.c.id != keep_id
+            )).rowcount
+    return removed
+
+def index_exists(engine, table_name, name):
+    return name in {ix['name'] for ix in inspect(engine).get_indexes(table_name)}
+
+def create_index(engine, table_name, name, columns, unique=False, dialect=None, **dialect_kw):
+    """
+    CREATE [UNIQUE] INDEX name ON table_name (columns), unless the table already has it.
+    Definitions are spelled out by each migration (never read from the live models), so a
+    migration does the same thing however the models change later.
+    dialect: only on that backend (e.g. a MySQL FULLTEXT index, dialect_kw mysql_prefix).
+    """
+    if dialect and engine.dialect.name != dialect:
+        return
+    if index_exists(engine, table_name, name):
+        return
+    table = Table(table_name, MetaData(), autoload_with=engine)
+    with engine.begin() as conn:
+        conn.execute(CreateIndex(Index(name, *[table.c[col] for col in columns], unique=unique, **dialect_kw)))
+    print(f"✅ Created index '{name}' on {table_name}.")
+
+def add_column(engine, table_name, name, column_type):
+    """ALTER TABLE ... ADD COLUMN (nullable), unless the table already has it."""
+    if name in {col['name'] for col in inspect(engine).get_columns(table_name)}:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type.compile(dialect=engine.dialect)}"))
+    print(f"✅ Added column '{name}' to {table_name}.")
@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Index
 from sqlalchemy.orm import relationship, backref
 from core.database import Base
 
@@ -75,6 +75,11 @@ class Segment(Base):
     
     children = relationship("Segment", backref=backref('parent', remote_side=[id]))
 
+    __table_args__ = (
+        # The active segment / round of an event (polled by every judge, tabulator and viewer)
+        Index('ix_segments_event_active', 'event_id', 'is_active'),
+    )
+
 
 class Criteria(Base):
     __tablename__ = 'criteria'
@@ -107,6 +112,11 @@ class Contestant(Base):
     event = relationship("Event", back_populates="contestants")
     scores = relationship("Score", back_populates="contestant")
 
+    __table_args__ = (
+        # Active contestants of an event (every leaderboard / scoring screen)
+        Index('ix_contestants_event_status', 'event_id', 'status'),
+    )
+
 # ---------------------------------------------------------
 # 4. SCORES & LOGS
 # ---------------------------------------------------------
@@ -133,6 +143,17 @@ class Score(Base):
     
     criteria = relationship("Criteria", back_populates="scores")
 
+    # Natural keys (NULLs never collide, so pageant and quiz rows share the table)
+    # - Pageant: one score per judge, contestant and criteria
+    # - Quiz: one answer per contestant, round and question
+    __table_args__ = (
+        Index('uq_scores_judge_contestant_criteria', 'judge_id', 'contestant_id', 'criteria_id', unique=True),
+        Index('uq_scores_contestant_segment_question', 'contestant_id', 'segment_id', 'question_number', unique=True),
+        Index('ix_scores_segment_contestant', 'segment_id', 'contestant_id', 'score_value'),
+        # Per-criteria aggregation (tabulation, running totals) joins on criteria_id
+        Index('ix_scores_criteria_contestant', 'criteria_id', 'contestant_id', 'score_value'),
+    )
+
 class JudgeProgress(Base):
     __tablename__ = 'judge_progress'
     id = Column(Integer, primary_key=True)
@@ -140,6 +161,10 @@ class JudgeProgress(Base):
     segment_id = Column(Integer, ForeignKey('segments.id'))
     is_finished = Column(Boolean, default=False) 
 
+    __table_args__ = (
+        Index('ix_judge_progress_judge_segment', 'judge_id', 'segment_id'),
+    )
+
 class AuditLog(Base):
     __tablename__ = 'audit_logs'
     id = Column(Integer, primary_key=True)
@@ -147,8 +172,20 @@ class AuditLog(Base):
     action = Column(String(50)) 
     details = Column(Text)
     timestamp = Column(DateTime, default=datetime.datetime.now)
+    event_id = Column(Integer, nullable=True) # Event the action concerns (no FK: logs outlive deleted events)
     user = relationship("User", back_populates="audit_logs")
 
+    __table_args__ = (
+        # Newest-first listing and keyset paging: ORDER BY timestamp DESC, id DESC
+        Index('ix_audit_logs_timestamp_id', 'timestamp', 'id'),
+        # Filtered listings (same newest-first order within each filter)
+        Index('ix_audit_logs_action_timestamp', 'action', 'timestamp', 'id'),
+        Index('ix_audit_logs_user_timestamp', 'user_id', 'timestamp', 'id'),
+        Index('ix_audit_logs_event_timestamp', 'event_id', 'timestamp', 'id'),
+        # Word search of details (MySQL only; other backends fall back to a LIKE scan)
+        Index('ft_audit_logs_details', 'details', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
 class EventJudge(Base):
     __tablename__ = 'event_judges'
     id = Column(Integer, primary_key=True)
@@ -156,4 +193,50 @@ class EventJudge(Base):
     judge_id = Column(Integer, ForeignKey('users.id'))
     is_chairman = Column(Boolean, default=False) 
     event = relationship("Event", back_populates="assigned_judges")
-    judge = relationship("User")
\ No newline at end of file
+    judge = relationship("User")
+
+    __table_args__ = (
+        # Judges of an event, and "is this judge assigned?"
+        Index('ix_event_judges_event_judge', 'event_id', 'judge_id'),
+    )
+
+# ---------------------------------------------------------
+# 5. RUNNING TOTALS (Maintained on every score write)
+# ---------------------------------------------------------
+class CriteriaTotal(Base):
+    __tablename__ = 'criteria_totals'
+    contestant_id = Column(Integer, ForeignKey('contestants.id'), primary_key=True)
+    criteria_id = Column(Integer, ForeignKey('criteria.id'), primary_key=True)
+    segment_id = Column(Integer, ForeignKey('segments.id'))
+    
+    score_sum = Column(Float, default=0.0)
+    score_count = Column(Integer, default=0)
+    weighted_score = Column(Float, default=0.0) # avg(score) * criteria weight
+
+class SegmentTotal(Base):
+    __tablename__ = 'segment_totals'
+    contestant_id = Column(Integer, ForeignKey('contestants.id'), primary_key=True)
+    segment_id = Column(Integer, ForeignKey('segments.id'), primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.id'))
+    
+    score_sum = Column(Float, default=0.0)
+    score_count = Column(Integer, default=0)
+    weighted_score = Column(Float, default=0.0) # Raw segment score (sum of criteria weighted_score)
+
+# ---------------------------------------------------------
+# 6. CHANGE TRACKING (One counter per event, bumped in every mutating transaction)
+# ---------------------------------------------------------
+class EventRevision(Base):
+    __tablename__ = 'event_revisions'
+    event_id = Column(Integer, ForeignKey('events.id'), primary_key=True)
+    revision = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.now)
+
+# ---------------------------------------------------------
+# 7. SCHEMA VERSION (One row per applied migration, see migrations/)
+# ---------------------------------------------------------
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(DateTime, default=datetime.datetime.now)
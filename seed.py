@@ -1,13 +1,14 @@
 import bcrypt
 from sqlalchemy.orm import Session
-from core.database import SessionLocal, engine, Base
+from core.database import SessionLocal
+from migrations import run_migrations
 from models.all_models import User, Event, Segment, Criteria, Contestant, EventJudge
 
 def seed_data():
     print("🌱 Seeding database with Advanced Quiz Setup...")
     
-    # Ensure tables exist
-    Base.metadata.create_all(bind=engine)
+    # Ensure tables exist (and the schema is current)
+    run_migrations()
     db: Session = SessionLocal()
 
     try:
@@ -0,0 +1,52 @@
+import os
+import uvicorn
+import flet.fastapi as flet_fastapi
+from fastapi import Request
+from fastapi.responses import RedirectResponse
+from main import main, get_local_ip
+from core.database import bootstrap_database
+from migrations import run_migrations
+from core.sql_metrics import sql_metrics
+from api.spectator_api import router as spectator_router
+from api.diagnostics_api import router as diagnostics_router
+
+# ---------------------------------------------------------
+# ASGI APP: spectator HTTP endpoints + the Flet app on the same port
+# ---------------------------------------------------------
+app = flet_fastapi.FastAPI() # Starts/stops the Flet session manager with the server
+app.include_router(spectator_router)
+app.include_router(diagnostics_router)
+
+
+@app.middleware("http")
+async def send_phones_to_spectator_page(request: Request, call_next):
+    # Android phones are spectators only: give them the static page instead of a Flet session
+    if request.url.path == "/" and "Android" in request.headers.get("user-agent", ""):
+        return RedirectResponse("/spectator")
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def attribute_queries_to_path(request: Request, call_next):
+    # Endpoint threads inherit this context, so their queries count towards the path
+    with sql_metrics.route(request.url.path):
+        return await call_next(request)
+
+
+app.mount("/", flet_fastapi.app(main, assets_dir=os.path.abspath("assets")))
+
+if __name__ == "__main__":
+    my_ip = get_local_ip()
+    port = 8550
+    print(f"--------------------------------------------------")
+    print(f"🚀  JUDGE ME NOT SYSTEM IS RUNNING!")
+    print(f"📱  Judges connect here: http://{my_ip}:{port}")
+    print(f"📺  Spectators / projectors: http://{my_ip}:{port}/spectator")
+    print(f"--------------------------------------------------")
+
+    bootstrap_database() # Once per process (skipped on warm restarts)
+    try:
+        run_migrations() # Pending schema changes only (one small query when up to date)
+    except Exception as e:
+        print(f"⚠️  Could not migrate the database schema: {e}")
+    uvicorn.run(app, host=my_ip, port=port)
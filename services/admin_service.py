@@ -1,26 +1,31 @@
+import re
 import bcrypt
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session, joinedload
 from core.database import SessionLocal
-from models.all_models import User, Event, AuditLog, Segment, Criteria, Score, Contestant, EventJudge
+from models.all_models import User, Event, AuditLog, Segment, Criteria, Score, Contestant, EventJudge, EventRevision
+from services.running_totals import clear_running_totals
+from core.event_hub import event_hub, EVENTS
+from services.audit_writer import audit_writer
+from services.event_revisions import bump_event_revision
+from services.audit_archive import audit_archive
 import datetime
+from core.sql_metrics import sql_metrics
 
+# Shortest word InnoDB puts in a FULLTEXT index (innodb_ft_min_token_size default)
+FULLTEXT_MIN_WORD = 3
+
+def _fulltext_query(search):
+    """'Gown que' -> '+Gown* +que*' (boolean mode: each word must start a word of details); None if no word is long enough."""
+    words = [w for w in re.findall(r"\w+", search) if len(w) >= FULLTEXT_MIN_WORD]
+    return " ".join(f"+{w}*" for w in words) or None
+
+@sql_metrics.instrument
 class AdminService:
     # --- HELPER: LOGGING ---
-    def log_action(self, user_id, action, details):
-        db: Session = SessionLocal()
-        try:
-            new_log = AuditLog(
-                user_id=user_id,
-                action=action,
-                details=details,
-                timestamp=datetime.datetime.now()
-            )
-            db.add(new_log)
-            db.commit()
-        except Exception as e:
-            print(f"Failed to write log: {e}")
-        finally:
-            db.close()
+    def log_action(self, user_id, action, details, event_id=None):
+        """Queues an audit entry for the background writer (see services/audit_writer.py)."""
+        audit_writer.record(user_id, action, details, event_id=event_id)
 
     def get_all_users(self):
         db: Session = SessionLocal()
@@ -125,8 +130,11 @@ class AdminService:
                 status='Active'
             )
             db.add(new_event)
+            db.flush()
+            bump_event_revision(db, new_event.id)
             db.commit()
-            self.log_action(admin_id, "CREATE_EVENT", f"Created event '{name}' ({event_type})")
+            event_hub.publish(EVENTS, new_event.id)
+            self.log_action(admin_id, "CREATE_EVENT", f"Created event '{name}' ({event_type})", event_id=new_event.id)
             return True, "Event created successfully."
         except Exception as e:
             return False, str(e)
@@ -148,7 +156,9 @@ class AdminService:
             # Note: SQLAlchemy cascade="all, delete" usually handles this if models are set up right.
             # But explicit deletion is safer for SQLite/MySQL if constraints vary.
             
-            # 1. Delete Scores (linked to segments/contestants)
+            # 1. Delete Running Totals + Scores (linked to segments/contestants)
+            clear_running_totals(db, event_id)
+            
             # Find segments first
             segment_ids = [s.id for s in db.query(Segment).filter(Segment.event_id == event_id).all()]
             if segment_ids:
@@ -164,11 +174,13 @@ class AdminService:
             # 4. Delete EventJudges
             db.query(EventJudge).filter(EventJudge.event_id == event_id).delete(synchronize_session=False)
 
-            # 5. Delete Event
+            # 5. Delete Change Tracking + Event
+            db.query(EventRevision).filter(EventRevision.event_id == event_id).delete(synchronize_session=False)
             db.delete(event)
             
             db.commit()
-            self.log_action(admin_id, "DELETE_EVENT", f"Deleted event '{event_name}' and all related data.")
+            event_hub.publish(EVENTS, event_id)
+            self.log_action(admin_id, "DELETE_EVENT", f"Deleted event '{event_name}' and all related data.", event_id=event_id)
             return True, "Event deleted successfully."
         except Exception as e:
             db.rollback()
@@ -183,12 +195,82 @@ class AdminService:
         finally:
             db.close()
 
-    def get_security_logs(self):
+    def get_security_logs(self, before_id=None, after_id=None, limit=100,
+                          action=None, user_id=None, event_id=None, since=None, until=None, search=None):
+        """
+        Audit entries, newest first, one page at a time.
+        - before_id: the page after (older than) that entry, keyset-paged on (timestamp, id).
+        - after_id: only entries written after that one. Matched on id (insertion order),
+          since queued entries keep the timestamp of the action, not of the write.
+        - action / user_id / event_id / since / until: filters, applied in SQL (each backed by an index).
+        - search: on MySQL, a FULLTEXT word-prefix search (each word of the search must start
+          a word of details; words under 3 letters and stopwords are ignored, and a search with
+          no usable word falls back to a LIKE scan). Elsewhere a case-insensitive substring.
+          Archived entries are always matched by substring, so on MySQL a search may find more
+          archived entries than hot ones (e.g. "own" finds an archived "Gown", not a hot one).
+        Archived entries (see services.audit_archive) are merged in transparently.
+        """
+        filters = dict(action=action, user_id=user_id, event_id=event_id, since=since, until=until, search=search)
         db: Session = SessionLocal()
         try:
-            return db.query(AuditLog)\
-                     .options(joinedload(AuditLog.user))\
-                     .order_by(AuditLog.timestamp.desc())\
-                     .all()
+            query = db.query(AuditLog).options(joinedload(AuditLog.user))
+
+            anchor = None
+            if before_id is not None:
+                anchor = db.query(AuditLog.timestamp).filter(AuditLog.id == before_id).scalar()
+                if anchor is None:
+                    archived = audit_archive.find(before_id)
+                    if archived is None:
+                        return []
+                    anchor = archived.timestamp
+                query = query.filter(or_(
+                    AuditLog.timestamp < anchor,
+                    and_(AuditLog.timestamp == anchor, AuditLog.id < before_id)
+                ))
+            if after_id is not None:
+                query = query.filter(AuditLog.id > after_id)
+
+            # --- FILTERS ---
+            if action: query = query.filter(AuditLog.action == action)
+            if user_id: query = query.filter(AuditLog.user_id == user_id)
+            if event_id: query = query.filter(AuditLog.event_id == event_id)
+            if since: query = query.filter(AuditLog.timestamp >= since)
+            if until: query = query.filter(AuditLog.timestamp < until)
+            if search:
+                against = _fulltext_query(search) if db.get_bind().dialect.name == "mysql" else None
+                if against:
+                    query = query.filter(AuditLog.details.match(against)) # ft_audit_logs_details
+                else:
+                    query = query.filter(AuditLog.details.icontains(search, autoescape=True))
+
+            logs = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit).all()
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+        # New entries are never archived, so the live tail only reads the hot table
+        if after_id is not None:
+            return logs
+        archived = audit_archive.query(before=(anchor, before_id) if anchor else None, limit=limit, **filters)
+        if not archived:
+            return logs
+        hot_ids = {log.id for log in logs}
+        merged = logs + [log for log in archived if log.id not in hot_ids]
+        merged.sort(key=lambda log: (log.timestamp, log.id), reverse=True)
+        return merged[:limit]
+
+    def get_audit_actions(self):
+        """Distinct action names (for the audit log filter), read from the action index."""
+        db: Session = SessionLocal()
+        try:
+            live = {a for (a,) in db.query(AuditLog.action).distinct().all() if a}
+            return sorted(live | audit_archive.actions())
+        finally:
+            db.close()
+
+    def archive_audit_logs(self, admin_id, older_than_days=None):
+        """Moves old / closed-event audit entries to the compressed archive (still searchable)."""
+        kwargs = {} if older_than_days is None else {"older_than_days": older_than_days}
+        success, msg = audit_archive.archive(**kwargs)
+        if success:
+            self.log_action(admin_id, "ARCHIVE_AUDIT_LOGS", msg)
+        return success, msg
\ No newline at end of file
@@ -0,0 +1,243 @@
+import datetime
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy import or_, and_, select
+from sqlalchemy.orm import joinedload
+from core.database import SessionLocal
+from models.all_models import AuditLog, Event
+
+# ----------------------------------------------------------------
+# CONFIGURATION
+# ----------------------------------------------------------------
+ARCHIVE_DIR = os.getenv("audit_archive_dir", "audit_archive")
+ARCHIVE_AFTER_DAYS = int(os.getenv("audit_archive_days", "90"))
+INDEX_FILE = "index.json"
+
+
+class ArchivedLog:
+    """An audit entry read back from an archive segment (same attributes the views use on AuditLog)."""
+    def __init__(self, row):
+        self.id = row["id"]
+        self.user_id = row["user_id"]
+        self.action = row["action"]
+        self.details = row["details"]
+        self.event_id = row["event_id"]
+        self.timestamp = datetime.datetime.fromisoformat(row["timestamp"])
+        # Who the user was when archived (the user row may be gone since)
+        self.user = _UserSnapshot(row["username"], row["role"]) if row.get("username") else None
+
+
+class _UserSnapshot:
+    def __init__(self, username, role):
+        self.username = username
+        self.role = role
+
+
+class AuditArchive:
+    """
+    Moves old audit entries out of the hot audit_logs table into compressed, append-only
+    JSONL segment files (one gzip file per archival run, never rewritten), described by a
+    small index.json. query() reads them back with the same filters and keyset order as
+    AdminService.get_security_logs, skipping segments the index rules out.
+    """
+    def __init__(self, directory=ARCHIVE_DIR, cached_segments=4):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._cache = OrderedDict() # file -> rows, newest first (small LRU: paging re-reads the same segment)
+        self.cached_segments = cached_segments
+
+    # ---------------------------------------------------------
+    # WRITE SIDE (archival job)
+    # ---------------------------------------------------------
+    def archive(self, older_than_days=ARCHIVE_AFTER_DAYS, closed_events=True, batch_size=5000):
+        """
+        Archives entries older than `older_than_days`, plus (closed_events) those of ended or
+        deleted events. Each batch is written and indexed BEFORE its rows are deleted, so a
+        crash can at worst leave an entry in both places (reads de-duplicate by id).
+        Returns (success, message).
+        """
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+        db = SessionLocal()
+        try:
+            condition = AuditLog.timestamp < cutoff
+            if closed_events:
+                live_events = select(Event.id).where(or_(Event.status == None, Event.status != "Ended"))
+                condition = or_(condition, and_(AuditLog.event_id != None, AuditLog.event_id.notin_(live_events)))
+
+            moved, last_id = 0, 0
+            while True:
+                batch = db.query(AuditLog).options(joinedload(AuditLog.user))\
+                    .filter(condition, AuditLog.id > last_id)\
+                    .order_by(AuditLog.id).limit(batch_size).all()
+                if not batch:
+                    break
+
+                self._write_segment([self._to_row(log) for log in batch])
+                ids = [log.id for log in batch]
+                db.query(AuditLog).filter(AuditLog.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+                moved += len(ids)
+                last_id = ids[-1]
+
+            return True, f"Archived {moved} audit entr{'y' if moved == 1 else 'ies'}."
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
+        finally:
+            db.close()
+
+    def _write_segment(self, rows):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            index = self._load_index()
+            number = max((s["number"] for s in index), default=0) + 1
+            name = f"audit-{number:06d}.jsonl.gz"
+            path = os.path.join(self.directory, name)
+
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            os.replace(path + ".tmp", path)
+
+            index.append({
+                "number": number,
+                "file": name,
+                "count": len(rows),
+                "min_id": min(r["id"] for r in rows),
+                "max_id": max(r["id"] for r in rows),
+                "min_ts": min(r["timestamp"] for r in rows),
+                "max_ts": max(r["timestamp"] for r in rows),
+                "actions": sorted({r["action"] for r in rows if r["action"]}),
+                "user_ids": sorted({r["user_id"] for r in rows if r["user_id"] is not None}),
+                "event_ids": sorted({r["event_id"] for r in rows if r["event_id"] is not None})
+            })
+            self._save_index(index)
+
+    @staticmethod
+    def _to_row(log):
+        return {
+            "id": log.id,
+            "user_id": log.user_id,
+            "username": log.user.username if log.user else None,
+            "role": log.user.role if log.user else None,
+            "action": log.action,
+            "details": log.details,
+            "event_id": log.event_id,
+            "timestamp": log.timestamp.isoformat()
+        }
+
+    # ---------------------------------------------------------
+    # READ SIDE
+    # ---------------------------------------------------------
+    def query(self, before=None, limit=100, action=None, user_id=None, event_id=None, since=None, until=None, search=None):
+        """
+        Archived entries, newest first: up to `limit` entries strictly older than the
+        `before` (timestamp, id) key, matching the same filters as get_security_logs
+        (search: case-insensitive substring; see get_security_logs for the MySQL difference).
+        """
+        with self._lock:
+            index = self._load_index()
+
+        since_s = since.isoformat() if since else None
+        until_s = until.isoformat() if until else None
+        before_key = (before[0].isoformat(), before[1]) if before else None
+        needle = search.lower() if search else None
+
+        # Prune with the index, then read the newest candidate segments first
+        candidates = [
+            s for s in index
+            if (not action or action in s["actions"])
+            and (not user_id or user_id in s["user_ids"])
+            and (not event_id or event_id in s["event_ids"])
+            and (not since_s or s["max_ts"] >= since_s)
+            and (not until_s or s["min_ts"] < until_s)
+            and (not before_key or s["min_ts"] <= before_key[0])
+        ]
+        candidates.sort(key=lambda s: s["max_ts"], reverse=True)
+
+        found = []
+        for segment in candidates:
+            # Enough rows already, and everything left is older than all of them
+            if len(found) >= limit and segment["max_ts"] < found[limit - 1][0][0]:
+                break
+            for row in self._read_segment(segment["file"]):
+                key = (row["timestamp"], row["id"])
+                if before_key and key >= before_key: continue
+                if action and row["action"] != action: continue
+                if user_id and row["user_id"] != user_id: continue
+                if event_id and row["event_id"] != event_id: continue
+                if since_s and row["timestamp"] < since_s: continue
+                if until_s and row["timestamp"] >= until_s: continue
+                if needle and needle not in (row["details"] or "").lower(): continue # Same test as the hot table without FULLTEXT
+                found.append((key, row))
+            found.sort(key=lambda item: item[0], reverse=True)
+            del found[limit:]
+
+        return [ArchivedLog(row) for _, row in found]
+
+    def find(self, log_id):
+        """One archived entry by id (None when it is not archived)."""
+        with self._lock:
+            index = self._load_index()
+        for segment in index:
+            if segment["min_id"] <= log_id <= segment["max_id"]:
+                for row in self._read_segment(segment["file"]):
+                    if row["id"] == log_id:
+                        return ArchivedLog(row)
+        return None
+
+    def actions(self):
+        """Every action name found in the archive (from the index)."""
+        with self._lock:
+            index = self._load_index()
+        return {a for s in index for a in s["actions"]}
+
+    def stats(self):
+        with self._lock:
+            index = self._load_index()
+        return {
+            "segments": len(index),
+            "entries": sum(s["count"] for s in index),
+            "bytes": sum(os.path.getsize(os.path.join(self.directory, s["file"])) for s in index
+                         if os.path.exists(os.path.join(self.directory, s["file"])))
+        }
+
+    def _read_segment(self, name):
+        with self._lock:
+            if name in self._cache:
+                self._cache.move_to_end(name)
+                return self._cache[name]
+
+        with gzip.open(os.path.join(self.directory, name), "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        rows.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+
+        with self._lock:
+            self._cache[name] = rows
+            while len(self._cache) > self.cached_segments:
+                self._cache.popitem(last=False)
+        return rows
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self, index):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+
+# Shared by every session served by this process
+audit_archive = AuditArchive()
+
+if __name__ == "__main__":
+    # Run the archival job by hand (or from cron): python -m services.audit_archive
+    print(audit_archive.archive()[1])
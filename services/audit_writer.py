@@ -0,0 +1,254 @@
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from core.database import SessionLocal
+from models.all_models import AuditLog
+from core.event_hub import event_hub, AUDIT
+
+# Entries the database refused (while unreachable, or at shutdown) wait here and are replayed later
+SPILL_FILE = os.getenv("audit_spill_file", "audit_spill.jsonl")
+
+
+class AuditWriter:
+    """
+    Background audit-log pipeline. Callers enqueue entries and return immediately;
+    a single writer thread bulk-inserts them every `batch_size` entries or
+    `flush_interval_ms` milliseconds, whichever comes first.
+    A batch the database refuses is retried with exponential backoff (never dropped);
+    entries that cannot be written inline or at shutdown are spilled to `spill_file`
+    and replayed once the database accepts writes again.
+    Pending entries are flushed on interpreter shutdown.
+    """
+    def __init__(self, batch_size=50, flush_interval_ms=500, max_queue=5000,
+                 retry_ms=500, max_retry_ms=30000, spill_file=SPILL_FILE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.retry_interval = retry_ms / 1000.0
+        self.max_retry_interval = max_retry_ms / 1000.0
+        self.spill_file = spill_file
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pending = [] # Batch the writer thread is retrying
+        self._has_spill = os.path.exists(spill_file)
+
+        # Metrics
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.overflow = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def record(self, user_id, action, details, event_id=None):
+        """Queues one audit entry (timestamped now). Never blocks the caller on the database."""
+        entry = {
+            "user_id": user_id,
+            "action": action,
+            "details": details,
+            "event_id": event_id,
+            "timestamp": datetime.datetime.now()
+        }
+        if self._stopping.is_set():
+            # The writer thread is gone (shutdown): write inline
+            self._write_or_spill([entry])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Back-pressure: never drop an audit entry, write it inline instead
+            with self._lock:
+                self.overflow += 1
+            self._write_or_spill([entry])
+            return
+        if self._stopping.is_set():
+            self.flush() # Raced shutdown(): its final flush may already be done
+
+    def flush(self):
+        """Writes everything currently queued, in the calling thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write_or_spill(batch)
+                batch = []
+        if batch:
+            self._write_or_spill(batch)
+
+    def shutdown(self, timeout=5.0):
+        """Stops the writer thread and durably flushes whatever is left (spilling what the database refuses)."""
+        self._stopping.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                self._write_or_spill(pending)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self.written,
+                "failed": self.failed,
+                "retries": self.retries,
+                "retrying": len(self._pending),
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "overflow": self.overflow,
+                "batches": self.batches,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "max_flush_ms": round(self.max_flush_ms, 2),
+                "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else 0.0
+            }
+
+    # ---------------------------------------------------------
+    # WRITER THREAD
+    # ---------------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        if self._has_spill:
+            self._replay_spill() # Left over from a previous run
+        delay = 0
+        while not self._stopping.is_set():
+            with self._lock:
+                batch = self._pending
+            if not batch:
+                batch = self._next_batch()
+                if not batch:
+                    continue
+            if self._write(batch):
+                with self._lock:
+                    self._pending = []
+                delay = 0
+                if self._has_spill:
+                    self._replay_spill()
+            else:
+                # Database unavailable: keep the batch (shutdown() spills it) and back off
+                with self._lock:
+                    self._pending = batch
+                    self.retries += 1
+                delay = min(delay * 2 or self.retry_interval, self.max_retry_interval)
+                self._stopping.wait(delay)
+
+    def _next_batch(self):
+        """Waits for the first entry, then collects more until the batch is full or the interval ends."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_or_spill(self, batch):
+        if not self._write(batch):
+            self._spill(batch)
+
+    # ---------------------------------------------------------
+    # SPILL FILE
+    # ---------------------------------------------------------
+    def _spill(self, batch):
+        """Appends entries to the spill file (one JSON object per line)."""
+        try:
+            with self._spill_lock, open(self.spill_file, "a", encoding="utf-8") as f:
+                for entry in batch:
+                    f.write(json.dumps(dict(entry, timestamp=entry["timestamp"].isoformat())) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self._has_spill = True
+        except OSError as e:
+            print(f"Failed to spill {len(batch)} audit entries: {e}")
+            return
+        with self._lock:
+            self.spilled += len(batch)
+
+    def _replay_spill(self):
+        """Writes the spilled entries back to the database; whatever it still refuses is spilled again."""
+        with self._spill_lock:
+            try:
+                with open(self.spill_file, encoding="utf-8") as f:
+                    lines = f.readlines()
+                os.remove(self.spill_file)
+            except FileNotFoundError:
+                lines = []
+            self._has_spill = False
+
+        entries = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                entry["timestamp"] = datetime.datetime.fromisoformat(entry["timestamp"])
+                entries.append(entry)
+            except (ValueError, KeyError):
+                print(f"Skipping unreadable spilled audit entry: {line.strip()[:200]}") # Torn last line
+
+        for i in range(0, len(entries), self.batch_size):
+            batch = entries[i:i + self.batch_size]
+            if not self._write(batch):
+                self._spill(entries[i:])
+                return
+            with self._lock:
+                self.replayed += len(batch)
+
+    def _write(self, batch):
+        """Bulk-inserts one batch. Returns True once committed."""
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(AuditLog, batch)
+            db.commit()
+            ok = True
+            event_hub.publish(AUDIT)
+        except Exception as e:
+            db.rollback()
+            ok = False
+            print(f"Failed to write audit batch: {e}")
+        finally:
+            db.close()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if ok: self.written += len(batch)
+            else: self.failed += len(batch)
+            self.batches += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+        return ok
+
+
+# Shared by every session served by this process
+audit_writer = AuditWriter()
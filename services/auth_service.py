@@ -3,7 +3,11 @@ import datetime
 from sqlalchemy.orm import Session
 from models.all_models import User, AuditLog
 from core.database import SessionLocal
+from services.audit_writer import audit_writer
+from core.event_hub import event_hub, AUDIT
+from core.sql_metrics import sql_metrics
 
+@sql_metrics.instrument
 class AuthService:
     def login(self, username, password):
         """
@@ -36,6 +40,7 @@ class AuthService:
                     )
                     db.add(log)
                     db.commit()
+                    event_hub.publish(AUDIT)
                     
                     # FIX: Refresh user to reload attributes because commit() expired them
                     db.refresh(user)
@@ -62,14 +67,7 @@ class AuthService:
         try:
             user = db.query(User).get(user_id)
             if user:
-                log = AuditLog(
-                    user_id=user.id,
-                    action="LOGOUT",
-                    details=f"User '{user.username}' ({user.role}) logged out.",
-                    timestamp=datetime.datetime.now()
-                )
-                db.add(log)
-                db.commit()
+                audit_writer.record(user.id, "LOGOUT", f"User '{user.username}' ({user.role}) logged out.")
         except Exception as e:
             print(f"Logout Log Error: {e}")
         finally:
@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
 from core.database import SessionLocal
 from models.all_models import Contestant
+from core.event_hub import event_hub, CONTESTANTS
+from services.event_revisions import bump_event_revision
+from core.sql_metrics import sql_metrics
 
+@sql_metrics.instrument
 class ContestantService:
     def add_contestant(self, event_id, number, name, gender, image_path=None, assigned_tabulator_id=None):
         db = SessionLocal()
@@ -35,7 +39,9 @@ class ContestantService:
                 assigned_tabulator_id=assigned_tabulator_id
             )
             db.add(new_c)
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(CONTESTANTS, event_id)
             return True, "Contestant added."
         except Exception as e:
             return False, str(e)
@@ -76,7 +82,9 @@ class ContestantService:
             if image_path:
                 c.image_path = image_path
             
+            bump_event_revision(db, c.event_id)
             db.commit()
+            event_hub.publish(CONTESTANTS, c.event_id)
             return True, "Contestant updated."
         except Exception as e:
             return False, str(e)
@@ -105,7 +113,9 @@ class ContestantService:
             for c in higher_candidates:
                 c.candidate_number -= 1
             
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(CONTESTANTS, event_id)
             return True, "Deleted and reordered."
         except Exception as e:
             db.rollback()
@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.database import in_unit_of_work
+from core.sql_metrics import sql_metrics
+from core.event_hub import event_hub, SCORES, SEGMENTS, CONTESTANTS
+from services.event_revisions import read_event_revision
+from services.event_service import EventService
+from services.leaderboard_service import LeaderboardService
+
+
+class _Watcher:
+    def __init__(self, callback, wants_standings):
+        self.callback = callback
+        self.wants_standings = wants_standings
+        self.seen_revision = None # Last revision delivered to this page
+        self.delivering = False
+
+
+class _EventWorker:
+    """The single background loop of one event."""
+    def __init__(self, poller, event_id):
+        self.poller = poller
+        self.event_id = event_id
+        self.watchers = {}   # token -> _Watcher
+        self.snapshot = None
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name=f"event-poller-{event_id}", daemon=True)
+
+    def run(self):
+        while not self.stopped:
+            try:
+                with sql_metrics.route("(event poller)"):
+                    self.tick()
+            except Exception as e:
+                print(f"Event poller error (event {self.event_id}): {e}")
+            self.wake.wait(self.poller.interval)
+            self.wake.clear()
+
+    @in_unit_of_work # Revision, active segment and standings read through one session
+    def tick(self):
+        # 1. One indexed read tells whether anything changed (in any process)
+        revision = read_event_revision(self.event_id)
+        with self.poller._lock:
+            watchers = list(self.watchers.values())
+        wants_standings = any(w.wants_standings for w in watchers)
+
+        snapshot = self.snapshot
+        if snapshot is None or snapshot['revision'] != revision or (wants_standings and snapshot['standings'] is None):
+            # 2. Changed: fetch once for every page watching this event
+            snapshot = {
+                'event_id': self.event_id,
+                'revision': revision,
+                'active_segment': self.poller.event_service.get_active_segment(self.event_id),
+                'standings': self.poller.leaderboard_service.get_standings(self.event_id) if wants_standings else None
+            }
+            self.snapshot = snapshot
+            with self.poller._lock:
+                self.poller.fetches += 1
+
+        # 3. Fan out to pages that have not seen this revision yet
+        for watcher in watchers:
+            if watcher.seen_revision != revision and not watcher.delivering:
+                watcher.delivering = True
+                self.poller._executor.submit(self.poller._deliver, self, watcher, snapshot)
+        with self.poller._lock:
+            self.poller.ticks += 1
+
+
+class EventPoller:
+    """
+    One shared poller per event, no matter how many pages show it.
+    Each tick reads the event's revision; only when it moved are the active segment and
+    standings fetched (once) and handed to every subscribed page. The first subscriber
+    starts an event's poller and the last unsubscribe stops it. In-process changes
+    (event hub) wake the poller immediately; the interval bounds the delay for changes
+    written by other processes.
+    """
+    def __init__(self, interval_s=2.0, workers=8):
+        self.interval = interval_s
+        self.event_service = EventService()
+        self.leaderboard_service = LeaderboardService()
+        self._lock = threading.Lock()
+        self._workers = {}      # event_id -> _EventWorker
+        self._tokens = {}       # token -> event_id
+        self._next_token = 1
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="event-poller-fanout")
+
+        # Metrics
+        self.ticks = 0
+        self.fetches = 0
+        self.deliveries = 0
+        self.failures = 0
+
+    def subscribe(self, event_id, callback, standings=False):
+        """
+        Calls callback(snapshot) whenever the event changes, starting with the current state.
+        snapshot: {'event_id', 'revision', 'active_segment', 'standings'} (standings only
+        fetched while at least one subscriber asked for them). Returns a token for unsubscribe().
+        """
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            worker = self._workers.get(event_id)
+            if worker is None:
+                worker = _EventWorker(self, event_id)
+                self._workers[event_id] = worker
+                worker.thread.start()
+            worker.watchers[token] = _Watcher(callback, standings)
+            self._tokens[token] = event_id
+        worker.wake.set() # Serve the newcomer without waiting a full interval
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            event_id = self._tokens.pop(token, None)
+            worker = self._workers.get(event_id)
+            if worker is None:
+                return
+            worker.watchers.pop(token, None)
+            if not worker.watchers:
+                worker.stopped = True
+                del self._workers[event_id]
+        worker.wake.set()
+
+    def wake(self, event_id=None):
+        """Runs the event's next tick now (event_id=None: every event)."""
+        with self._lock:
+            workers = list(self._workers.values()) if event_id is None else [self._workers.get(event_id)]
+        for worker in workers:
+            if worker: worker.wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pollers": len(self._workers),
+                "subscribers": {e_id: len(w.watchers) for e_id, w in self._workers.items()},
+                "ticks": self.ticks,
+                "fetches": self.fetches,
+                "deliveries": self.deliveries,
+                "failures": self.failures
+            }
+
+    def _deliver(self, worker, watcher, snapshot):
+        delivered = False
+        try:
+            watcher.callback(snapshot)
+            watcher.seen_revision = snapshot['revision']
+            delivered = True
+        except Exception as e:
+            # Keep the subscription: the page has not seen this revision, so the next tick
+            # retries it. Pages leave through unsubscribe() (page_tasks on navigation/disconnect)
+            print(f"Event poller subscriber failed (event {worker.event_id}), retrying next tick: {e}")
+            with self._lock:
+                self.failures += 1
+        finally:
+            watcher.delivering = False
+            with self._lock:
+                self.deliveries += 1
+            # A newer revision arrived while this page was rendering: catch it up now
+            if delivered and worker.snapshot and worker.snapshot['revision'] != watcher.seen_revision and not worker.stopped:
+                worker.wake.set()
+
+
+# Shared by every session served by this process
+event_poller = EventPoller()
+
+# Changes made by this process are picked up without waiting for the next tick
+event_hub.add_listener((SCORES, SEGMENTS, CONTESTANTS), lambda topic, event_id: event_poller.wake(event_id))
@@ -0,0 +1,54 @@
+import datetime
+from core.database import SessionLocal
+from models.all_models import EventRevision
+from services.score_writer import uses_native_upsert, upsert
+
+# ---------------------------------------------------------
+# WRITE SIDE (called inside the mutating transaction)
+# ---------------------------------------------------------
+def bump_event_revision(db, event_id):
+    """
+    Advances an event's revision inside the caller's transaction, so the new number
+    becomes visible (to every app process) exactly when the change itself commits.
+    """
+    if not event_id:
+        return
+    now = datetime.datetime.now()
+
+    if uses_native_upsert(db):
+        # Atomic even when two writers create the row at the same time
+        upsert(db, EventRevision, [{"event_id": event_id, "revision": 1, "updated_at": now}],
+               keys=["event_id"],
+               update=lambda new: {"revision": EventRevision.revision + 1, "updated_at": now})
+        return
+
+    updated = db.query(EventRevision).filter(EventRevision.event_id == event_id).update(
+        {EventRevision.revision: EventRevision.revision + 1, EventRevision.updated_at: now},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(EventRevision(event_id=event_id, revision=1, updated_at=now))
+
+# ---------------------------------------------------------
+# READ SIDE (one indexed row per event)
+# ---------------------------------------------------------
+def get_event_revision(db, event_id):
+    return db.query(EventRevision.revision).filter(EventRevision.event_id == event_id).scalar() or 0
+
+
+def load_event_revisions(db, event_ids):
+    """event_id -> revision for several events in one query (missing rows read as 0)."""
+    rows = db.query(EventRevision.event_id, EventRevision.revision)\
+        .filter(EventRevision.event_id.in_(list(event_ids))).all()
+    revisions = {e_id: 0 for e_id in event_ids}
+    revisions.update({e_id: rev for e_id, rev in rows})
+    return revisions
+
+
+def read_event_revision(event_id):
+    """Current revision of an event, using its own short session (for views and pollers)."""
+    db = SessionLocal()
+    try:
+        return get_event_revision(db, event_id)
+    finally:
+        db.close()
@@ -2,8 +2,12 @@ from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from core.database import SessionLocal
 from models.all_models import Event, Segment, EventJudge, User, Contestant, AuditLog
+from core.event_hub import event_hub, SEGMENTS, EVENTS
+from services.event_revisions import bump_event_revision
 import datetime
+from core.sql_metrics import sql_metrics
 
+@sql_metrics.instrument
 class EventService:
     # ---------------------------------------------------------
     # EVENT FETCHING
@@ -61,7 +65,9 @@ class EventService:
                 is_active=False
             )
             db.add(new_segment)
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, event_id)
             return True, "Segment added."
         except Exception as e:
             return False, str(e)
@@ -84,7 +90,9 @@ class EventService:
                 seg.percentage_weight = weight
                 seg.is_final = is_final
                 seg.qualifier_limit = limit
+                bump_event_revision(db, seg.event_id)
                 db.commit()
+                event_hub.publish(SEGMENTS, seg.event_id)
                 return True, "Updated."
             return False, "Not found."
         finally:
@@ -97,7 +105,9 @@ class EventService:
             seg = db.query(Segment).get(segment_id)
             if seg:
                 seg.is_revealed = not seg.is_revealed
+                bump_event_revision(db, seg.event_id)
                 db.commit()
+                event_hub.publish(SEGMENTS, seg.event_id)
                 status = "Visible" if seg.is_revealed else "Hidden"
                 return True, f"Segment is now {status}"
             return False, "Segment not found"
@@ -132,7 +142,9 @@ class EventService:
             else:
                 msg = "All segments deactivated."
 
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, event_id)
             return True, msg
         except Exception as e:
             return False, str(e)
@@ -204,11 +216,13 @@ class EventService:
                     user_id=admin_id, 
                     action="UPDATE_EVENT_STATUS", 
                     details=f"Changed event '{event.name}' status to {status}", 
+                    event_id=event_id,
                     timestamp=datetime.datetime.now()
                 )
                 db.add(log)
                 
                 db.commit()
+                event_hub.publish(EVENTS, event_id)
                 return True, f"Event set to {status}"
             return False, "Event not found"
         except Exception as e:
@@ -0,0 +1,206 @@
+from sqlalchemy import func
+from core.database import SessionLocal
+from models.all_models import Event, Segment, Score, Contestant
+from services.running_totals import load_segment_totals
+from services.standings_cache import standings_cache
+from services.event_revisions import read_event_revision
+from core.sql_metrics import sql_metrics
+
+
+@sql_metrics.instrument
+class LeaderboardService:
+    def get_standings(self, event_id):
+        """
+        Public standings of an event. Served from the shared standings cache, so all
+        spectators of an event share one computation per change. The event's revision
+        row (one indexed read) also invalidates it after writes from other processes.
+        """
+        return standings_cache.get(event_id, self.compute_standings, db_revision=read_event_revision(event_id))
+
+    def compute_standings(self, event_id):
+        """Builds the leaderboard payload straight from the database (uncached)."""
+        db = SessionLocal()
+        try:
+            event = db.query(Event).get(event_id)
+            event_name = event.name if event else "Unknown Event"
+            event_type = event.event_type if event else "Pageant"
+
+            scores = []
+            mode_label = "LIVE RESULTS"
+        
+            # Headers containers
+            p_headers = [] # Prelim headers (Revealed)
+            f_headers = [] # Final headers (Revealed)
+        
+            # Flags
+            show_prelim_total = False
+
+            # -------------------------------------------------------------
+            # SHARED SEGMENT PROCESSING (For both Quiz & Pageant)
+            # -------------------------------------------------------------
+            # 1. Fetch Segments
+            all_segments = db.query(Segment).filter(Segment.event_id == event_id).order_by(Segment.order_index).all()
+        
+            prelim_segs = []
+            final_segs = []
+            seg_map = {s.id: s for s in all_segments}
+        
+            for seg in all_segments:
+                is_final = seg.is_final
+                if not is_final and seg.related_segment_id:
+                    parent = seg_map.get(seg.related_segment_id)
+                    if parent and parent.is_final: is_final = True
+            
+                if is_final: final_segs.append(seg)
+                else: prelim_segs.append(seg)
+        
+            # Determine Headers based on Visibility
+            if event_type == "QuizBee":
+                # AUTO-SHOW ALL FOR QUIZ BEE
+                revealed_prelims = prelim_segs
+                revealed_finals = final_segs
+            else:
+                # Respect Admin Toggle for Pageants
+                revealed_prelims = [s for s in prelim_segs if s.is_revealed]
+                revealed_finals = [s for s in final_segs if s.is_revealed]
+        
+            p_headers = [s.name for s in revealed_prelims]
+            f_headers = [s.name for s in revealed_finals]
+        
+            # Logic: Show Prelim Total ONLY if ALL prelim segments are revealed
+            # For Quiz Bee, this is effectively always True if there are prelims
+            if prelim_segs:
+                show_prelim_total = (len(revealed_prelims) == len(prelim_segs))
+            else:
+                show_prelim_total = False
+
+            # Ranking Mode: If ANY final round is shown, rank by Final Score.
+            rank_by_final = (len(revealed_finals) > 0)
+
+            # =================================================================
+            # QUIZ BEE LOGIC
+            # =================================================================
+            if event_type == "QuizBee":
+                contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
+            
+                # One grouped query for every (contestant, round) sum
+                segment_sums = {
+                    (c_id, s_id): total or 0
+                    for c_id, s_id, total in db.query(Score.contestant_id, Score.segment_id, func.sum(Score.score_value))
+                        .join(Segment, Score.segment_id == Segment.id)
+                        .filter(Segment.event_id == event_id)
+                        .group_by(Score.contestant_id, Score.segment_id).all()
+                }
+            
+                for c in contestants:
+                    prelim_total = 0; final_total = 0
+                    p_breakdown = []; f_breakdown = []
+                
+                    # Sum Prelims (Calculate ALL, but only store Revealed for breakdown)
+                    for seg in prelim_segs:
+                        val = segment_sums.get((c.id, seg.id), 0)
+                        prelim_total += val
+                        # For Quiz Bee, we decided all are revealed, so always append
+                        p_breakdown.append(int(val))
+                
+                    # Sum Finals
+                    for seg in final_segs:
+                        val = segment_sums.get((c.id, seg.id), 0)
+                        final_total += val
+                        f_breakdown.append(int(val))
+                
+                    dname = c.name + (" (Eliminated)" if c.status == "Eliminated" else "")
+                    scores.append({
+                        "id": c.id,
+                        "name": dname,
+                        "p_bd": p_breakdown, 
+                        "f_bd": f_breakdown,
+                        "p_tot": int(prelim_total), 
+                        "f_tot": int(final_total),
+                        "status": c.status
+                    })
+            
+                # Sort with Tie-Breaker
+                if rank_by_final: 
+                    # Sort by Final, then Prelim (Tie-breaker)
+                    scores.sort(key=lambda x: (x['f_tot'], x['p_tot']), reverse=True)
+                else: 
+                    scores.sort(key=lambda x: x['p_tot'], reverse=True)
+
+            # =================================================================
+            # PAGEANT LOGIC
+            # =================================================================
+            else:
+                mode_label = "OFFICIAL RANKINGS"
+            
+                # Calculate Scores (from the running totals maintained on every score write)
+                contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
+                segment_totals = load_segment_totals(db, event_id)
+            
+                for c in contestants:
+                    prelim_row_scores = []
+                    final_row_scores = []
+                
+                    prelim_weighted_total = 0.0
+                    final_weighted_total = 0.0
+                
+                    # --- CALCULATE PRELIMS ---
+                    for seg in prelim_segs:
+                        # Segment score (Raw)
+                        seg_raw_score = segment_totals.get((c.id, seg.id), 0.0)
+                    
+                        # Accumulate Weighted Total (Score * Percentage Weight)
+                        # e.g. Score 90 * 0.40 = 36.0
+                        prelim_weighted_total += (seg_raw_score * seg.percentage_weight)
+                    
+                        if seg.is_revealed:
+                            prelim_row_scores.append(round(seg_raw_score, 2))
+
+                    # --- CALCULATE FINALS ---
+                    for seg in final_segs:
+                        seg_raw_score = segment_totals.get((c.id, seg.id), 0.0)
+                    
+                        final_weighted_total += seg_raw_score
+                    
+                        if seg.is_revealed:
+                            final_row_scores.append(round(seg_raw_score, 2))
+
+                    # --- FIX: CORRECT PERCENTAGE CALCULATION ---
+                    # Removed the extra division/multiplication. The weighted total is already the 0-100 representation.
+                    prelim_percent = round(prelim_weighted_total, 2)
+                    final_percent = round(final_weighted_total, 2) 
+
+                    scores.append({
+                        "id": c.id,
+                        "name": c.name,
+                        "gender": c.gender,
+                        "segment_scores": prelim_row_scores,
+                        "final_scores": final_row_scores,
+                        "p_tot": prelim_percent,
+                        "f_tot": final_percent
+                    })
+            
+                # Sort with Tie-Breaker
+                if rank_by_final: 
+                    # Sort by Final Score first, break ties with Prelim Score
+                    # The logic: If Final scores are equal (0.0), whoever had higher Prelim wins.
+                    scores.sort(key=lambda x: (x['f_tot'], x['p_tot']), reverse=True)
+                else: 
+                    scores.sort(key=lambda x: x['p_tot'], reverse=True)
+            
+                # Rank within each gender (shared result; viewers must not mutate it)
+                for gender in ['Male', 'Female']:
+                    for idx, s in enumerate([r for r in scores if r.get('gender') == gender]):
+                        s['rank'] = idx + 1
+
+            return {
+                "event_name": event_name,
+                "event_type": event_type,
+                "scores": scores,
+                "mode_label": mode_label,
+                "p_headers": p_headers,
+                "f_headers": f_headers,
+                "show_prelim_total": show_prelim_total
+            }
+        finally:
+            db.close()
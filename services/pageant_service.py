@@ -1,9 +1,17 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
 from core.database import SessionLocal
 from models.all_models import Segment, Criteria, Score, Contestant, Event, User, JudgeProgress, EventJudge, AuditLog
+from services.tabulation_engine import TabulationEngine, ScoreMatrix, rank_by_gender
+from services.running_totals import lock_running_totals, refresh_running_totals, rebuild_running_totals, load_weighted_totals
+from core.event_hub import event_hub, SCORES, SEGMENTS, CONTESTANTS
+from services.audit_writer import audit_writer
+from services.score_writer import uses_native_upsert, upsert_judge_scores
+from services.event_revisions import bump_event_revision
 import datetime
+from core.sql_metrics import sql_metrics
 
+@sql_metrics.instrument
 class PageantService:
     # ---------------------------------------------------------
     # SEGMENT MANAGEMENT
@@ -24,7 +32,9 @@ class PageantService:
                 is_active=False
             )
             db.add(new_segment)
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, event_id)
             return True, "Segment added."
         except Exception as e:
             return False, str(e)
@@ -46,7 +56,9 @@ class PageantService:
                 seg.percentage_weight = weight
                 seg.is_final = is_final
                 seg.qualifier_limit = limit
+                bump_event_revision(db, seg.event_id)
                 db.commit()
+                event_hub.publish(SEGMENTS, seg.event_id)
                 return True, "Updated."
             return False, "Not found."
         finally:
@@ -66,7 +78,10 @@ class PageantService:
 
             new_crit = Criteria(segment_id=segment_id, name=name, weight=weight, max_score=max_score)
             db.add(new_crit)
+            event_id = db.query(Segment.event_id).filter(Segment.id == segment_id).scalar()
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, event_id)
             return True, "Criteria added."
         except Exception as e:
             return False, str(e)
@@ -84,10 +99,19 @@ class PageantService:
                 if (current_total + weight) > 1.0001:
                     return False, f"Criteria total exceeds 100%. Current: {int(current_total*100)}%"
 
+                weight_changed = (crit.weight != weight)
+                event_id = db.query(Segment.event_id).filter(Segment.id == crit.segment_id).scalar()
                 crit.name = name
                 crit.weight = weight
                 crit.max_score = max_score # Fixed: No longer hardcoded to 100
+                
+                # Weighted running totals depend on the criteria weight
+                if weight_changed:
+                    db.flush()
+                    rebuild_running_totals(db, event_id)
+                bump_event_revision(db, event_id)
                 db.commit()
+                event_hub.publish(SEGMENTS, event_id)
                 return True, "Updated."
             return False, "Not found."
         finally:
@@ -99,40 +123,106 @@ class PageantService:
     def submit_score(self, judge_id, contestant_id, criteria_id, score_value):
         db = SessionLocal()
         try:
-            existing_score = db.query(Score).filter(
-                Score.judge_id == judge_id,
-                Score.contestant_id == contestant_id,
-                Score.criteria_id == criteria_id
-            ).first()
+            # Other judges scoring this event wait here until we commit (see running_totals)
+            lock_running_totals(db, [criteria_id])
 
-            if existing_score:
-                existing_score.score_value = score_value
+            if uses_native_upsert(db):
+                # Single INSERT ... ON DUPLICATE KEY UPDATE (segment resolved in SQL)
+                segment_id = select(Criteria.segment_id).where(Criteria.id == criteria_id).scalar_subquery()
+                upsert_judge_scores(db, judge_id, contestant_id, [(criteria_id, segment_id, score_value)])
             else:
-                criteria = db.query(Criteria).get(criteria_id)
-                new_score = Score(
-                    judge_id=judge_id,
-                    contestant_id=contestant_id,
-                    criteria_id=criteria_id,
-                    segment_id=criteria.segment_id,
-                    score_value=score_value
-                )
-                db.add(new_score)
+                existing_score = db.query(Score).filter(
+                    Score.judge_id == judge_id,
+                    Score.contestant_id == contestant_id,
+                    Score.criteria_id == criteria_id
+                ).first()
+
+                if existing_score:
+                    existing_score.score_value = score_value
+                else:
+                    criteria = db.query(Criteria).get(criteria_id)
+                    new_score = Score(
+                        judge_id=judge_id,
+                        contestant_id=contestant_id,
+                        criteria_id=criteria_id,
+                        segment_id=criteria.segment_id,
+                        score_value=score_value
+                    )
+                    db.add(new_score)
+            
+            # Keep the leaderboard's running totals in step with this write
+            touched_events = refresh_running_totals(db, contestant_id, [criteria_id])
             
-            # AUDIT LOG
             c_name = db.query(Contestant.name).filter(Contestant.id == contestant_id).scalar()
             crit_name = db.query(Criteria.name).filter(Criteria.id == criteria_id).scalar()
-            
-            log = AuditLog(
-                user_id=judge_id,
-                action="SCORE_SUBMIT",
-                details=f"Scored {score_value} for '{c_name}' on '{crit_name}'",
-                timestamp=datetime.datetime.now()
-            )
-            db.add(log)
-            
             db.commit()
+            
+            # AUDIT LOG (queued; written in the background)
+            audit_writer.record(judge_id, "SCORE_SUBMIT", f"Scored {score_value} for '{c_name}' on '{crit_name}'", event_id=min(touched_events, default=None))
+            for ev_id in touched_events:
+                event_hub.publish(SCORES, ev_id)
             return True, "Score saved."
         except Exception as e:
+            db.rollback()
+            return False, str(e)
+        finally:
+            db.close()
+
+    def submit_scores_batch(self, judge_id, contestant_id, scores):
+        """
+        Saves a judge's whole scoring card ({criteria_id: value}) in ONE transaction,
+        with a single audit entry instead of one commit per criteria.
+        """
+        if not scores:
+            return True, "Nothing to save."
+
+        db = SessionLocal()
+        try:
+            criteria_ids = list(scores)
+            criterias = {c.id: c for c in db.query(Criteria).filter(Criteria.id.in_(criteria_ids)).all()}
+            if any(crit_id not in criterias for crit_id in criteria_ids):
+                return False, "Criteria not found."
+
+            lock_running_totals(db, criteria_ids)
+
+            if uses_native_upsert(db):
+                # One multi-row INSERT ... ON DUPLICATE KEY UPDATE for the whole card
+                upsert_judge_scores(db, judge_id, contestant_id, [
+                    (crit_id, criterias[crit_id].segment_id, score_value) for crit_id, score_value in scores.items()
+                ])
+            else:
+                existing = {
+                    s.criteria_id: s for s in db.query(Score).filter(
+                        Score.judge_id == judge_id,
+                        Score.contestant_id == contestant_id,
+                        Score.criteria_id.in_(criteria_ids)
+                    ).all()
+                }
+                for crit_id, score_value in scores.items():
+                    if crit_id in existing:
+                        existing[crit_id].score_value = score_value
+                    else:
+                        db.add(Score(
+                            judge_id=judge_id,
+                            contestant_id=contestant_id,
+                            criteria_id=crit_id,
+                            segment_id=criterias[crit_id].segment_id,
+                            score_value=score_value
+                        ))
+
+            touched_events = refresh_running_totals(db, contestant_id, criteria_ids)
+
+            c_name = db.query(Contestant.name).filter(Contestant.id == contestant_id).scalar()
+            db.commit()
+
+            # AUDIT LOG (one queued entry for the whole card)
+            summary = ", ".join(f"{criterias[k].name}: {v}" for k, v in scores.items())
+            audit_writer.record(judge_id, "SCORE_SUBMIT", f"Scored '{c_name}' ({summary})", event_id=min(touched_events, default=None))
+            for ev_id in touched_events:
+                event_hub.publish(SCORES, ev_id)
+            return True, "Scores saved."
+        except Exception as e:
+            db.rollback()
             return False, str(e)
         finally:
             db.close()
@@ -180,18 +270,12 @@ class PageantService:
         try:
             contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
             segments = db.query(Segment).filter(Segment.event_id == event_id).all()
+            
+            # One grouped query for every (contestant, criteria) average
+            engine = TabulationEngine(db, event_id)
 
             for c in contestants:
-                total_event_score = 0.0
-                for s in segments:
-                    segment_score = 0.0
-                    criterias = db.query(Criteria).filter(Criteria.segment_id == s.id).all()
-                    for crit in criterias:
-                        avg_score = db.query(func.avg(Score.score_value))\
-                            .filter(Score.contestant_id == c.id, Score.criteria_id == crit.id)\
-                            .scalar() or 0.0
-                        segment_score += (avg_score * crit.weight)
-                    total_event_score += (segment_score * s.percentage_weight)
+                total_event_score = engine.weighted_total(c.id, segments)
                 
                 results.append({
                     "contestant_id": c.id,
@@ -209,115 +293,63 @@ class PageantService:
     # ---------------------------------------------------------
     # NEW: OVERALL BREAKDOWN (UPDATED WITH JUDGES)
     # ---------------------------------------------------------
-    def get_overall_breakdown(self, event_id):
+    def get_score_matrix(self, event_id):
+        """Bulk-loads an event's scores once so several boards can be rendered from it."""
         db = SessionLocal()
         try:
-            # 1. Get Segments
-            segments = db.query(Segment).filter(Segment.event_id == event_id, Segment.is_final == False).order_by(Segment.order_index).all()
-            segment_names = [s.name for s in segments]
-            
-            # 2. Get Contestants
-            contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
-            
-            # 3. Get Judges
-            assigned = db.query(User).join(EventJudge).filter(EventJudge.event_id == event_id).order_by(User.name).all()
-            judge_list = [u.name for u in assigned]
-            
-            data = {'Male': [], 'Female': []}
-
-            for c in contestants:
-                row = {
-                    "number": c.candidate_number,
-                    "name": c.name,
-                    "segment_scores": [],
-                    "total": 0.0
-                }
-                
-                overall_weighted_score = 0.0
-                
-                for s in segments:
-                    segment_raw_score = 0.0
-                    criterias = db.query(Criteria).filter(Criteria.segment_id == s.id).all()
-                    for crit in criterias:
-                        avg = db.query(func.avg(Score.score_value))\
-                            .filter(Score.contestant_id == c.id, Score.criteria_id == crit.id)\
-                            .scalar() or 0.0
-                        segment_raw_score += (avg * crit.weight)
-                    
-                    row['segment_scores'].append(round(segment_raw_score, 2))
-                    overall_weighted_score += (segment_raw_score * s.percentage_weight)
-                
-                row['total'] = round(overall_weighted_score, 2)
-                if c.gender in data:
-                    data[c.gender].append(row)
-
-            for gender in ['Male', 'Female']:
-                data[gender].sort(key=lambda x: x['total'], reverse=True)
-                for i, r in enumerate(data[gender]):
-                    r['rank'] = i + 1
-            
-            return {
-                'segments': segment_names,
-                'judges': judge_list,
-                'Male': data['Male'],
-                'Female': data['Female']
-            }
+            return ScoreMatrix(db, event_id)
         finally:
             db.close()
 
+    def get_overall_breakdown(self, event_id, matrix=None):
+        matrix = matrix or self.get_score_matrix(event_id)
+
+        # Prelim segments only (Finals are scored separately)
+        segments = [s for s in matrix.segments if not s['is_final']]
+
+        rows = []
+        for c in matrix.contestants:
+            segment_scores = [matrix.segment_score(c['id'], s['id']) for s in segments]
+            overall_weighted_score = sum(score * s['percentage_weight'] for score, s in zip(segment_scores, segments))
+            rows.append({
+                "number": c['number'],
+                "name": c['name'],
+                "gender": c['gender'],
+                "segment_scores": [round(score, 2) for score in segment_scores],
+                "total": round(overall_weighted_score, 2)
+            })
+
+        data = rank_by_gender(rows)
+        return {
+            'segments': [s['name'] for s in segments],
+            'judges': [j['name'] for j in matrix.judges],
+            'Male': data['Male'],
+            'Female': data['Female']
+        }
+
     # ---------------------------------------------------------
     # TABULATION MATRIX
     # ---------------------------------------------------------
-    def get_segment_tabulation(self, event_id, segment_id):
-        db = SessionLocal()
-        try:
-            assigned = db.query(User).join(EventJudge).filter(EventJudge.event_id == event_id).order_by(User.name).all()
-            judge_list = [u.name for u in assigned]
-            judge_ids = [u.id for u in assigned]
-            
-            contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
-            criterias = db.query(Criteria).filter(Criteria.segment_id == segment_id).all()
-
-            data = {'Male': [], 'Female': []}
-
-            for c in contestants:
-                row = {
-                    "number": c.candidate_number,
-                    "name": c.name,
-                    "scores": [],
-                    "total": 0.0
-                }
-                judge_totals = []
-                for j_id in judge_ids:
-                    j_score = 0.0
-                    for crit in criterias:
-                        val = db.query(Score.score_value).filter(
-                            Score.contestant_id == c.id, 
-                            Score.judge_id == j_id, 
-                            Score.criteria_id == crit.id
-                        ).scalar() or 0.0
-                        j_score += (val * crit.weight)
-                    judge_totals.append(round(j_score, 2))
-                
-                row['scores'] = judge_totals
-                if judge_totals:
-                    row['total'] = round(sum(judge_totals) / len(judge_totals), 2)
-                
-                if c.gender in data:
-                    data[c.gender].append(row)
-
-            for gender in ['Male', 'Female']:
-                data[gender].sort(key=lambda x: x['total'], reverse=True)
-                for i, r in enumerate(data[gender]):
-                    r['rank'] = i + 1
-
-            return {
-                'judges': judge_list,
-                'Male': data['Male'],
-                'Female': data['Female']
-            }
-        finally:
-            db.close()
+    def get_segment_tabulation(self, event_id, segment_id, matrix=None):
+        matrix = matrix or self.get_score_matrix(event_id)
+
+        rows = []
+        for c in matrix.contestants:
+            judge_totals = [round(t, 2) for t in matrix.judge_totals(c['id'], segment_id)]
+            rows.append({
+                "number": c['number'],
+                "name": c['name'],
+                "gender": c['gender'],
+                "scores": judge_totals,
+                "total": round(sum(judge_totals) / len(judge_totals), 2) if judge_totals else 0.0
+            })
+
+        data = rank_by_gender(rows)
+        return {
+            'judges': [j['name'] for j in matrix.judges],
+            'Male': data['Male'],
+            'Female': data['Female']
+        }
 
     # ---------------------------------------------------------
     # ADMIN REPORTING
@@ -371,7 +403,9 @@ class PageantService:
             else:
                 msg = "All segments deactivated."
 
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, event_id)
             return True, msg
         except Exception as e:
             return False, str(e)
@@ -398,17 +432,11 @@ class PageantService:
             if prog: prog.is_finished = True
             else: db.add(JudgeProgress(judge_id=judge_id, segment_id=segment_id, is_finished=True))
             
-            # AUDIT LOG
-            seg_name = db.query(Segment.name).filter(Segment.id == segment_id).scalar()
-            log = AuditLog(
-                user_id=judge_id,
-                action="SCORE_FINALIZED",
-                details=f"Judge finalized scores for segment '{seg_name}'",
-                timestamp=datetime.datetime.now()
-            )
-            db.add(log)
-            
+            seg_name, event_id = db.query(Segment.name, Segment.event_id).filter(Segment.id == segment_id).first() or (None, None)
             db.commit()
+            
+            # AUDIT LOG (queued)
+            audit_writer.record(judge_id, "SCORE_FINALIZED", f"Judge finalized scores for segment '{seg_name}'", event_id=event_id)
             return True
         except: return False
         finally: db.close()
@@ -429,19 +457,11 @@ class PageantService:
         results = {'Male': [], 'Female': []}
         try:
             contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
-            segments = db.query(Segment).filter(Segment.event_id == event_id, Segment.is_final == False).all()
+            # Read the maintained running totals instead of re-averaging the scores table
+            prelim_totals = load_weighted_totals(db, event_id, prelim_only=True)
 
             for c in contestants:
-                total_score = 0.0
-                for s in segments:
-                    segment_score = 0.0
-                    criterias = db.query(Criteria).filter(Criteria.segment_id == s.id).all()
-                    for crit in criterias:
-                        avg = db.query(func.avg(Score.score_value))\
-                            .filter(Score.contestant_id == c.id, Score.criteria_id == crit.id)\
-                            .scalar() or 0.0
-                        segment_score += (avg * crit.weight)
-                    total_score += (segment_score * s.percentage_weight)
+                total_score = prelim_totals.get(c.id, 0.0)
                 
                 entry = {"contestant": c, "score": round(total_score, 2)}
                 if c.gender in results:
@@ -482,7 +502,10 @@ class PageantService:
             for s in segments:
                 s.is_active = (s.id == segment_id)
             
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(CONTESTANTS, event_id)
+            event_hub.publish(SEGMENTS, event_id)
             return True, qualifiers, eliminated
         except Exception as e:
             return False, [], []
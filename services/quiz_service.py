@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, and_
 from core.database import SessionLocal
 from models.all_models import Segment, Score, Contestant, AuditLog
+from core.event_hub import event_hub, SCORES, SEGMENTS, CONTESTANTS
+from services.score_writer import uses_native_upsert, upsert_quiz_answers
+from services.event_revisions import bump_event_revision
 import datetime
+from core.sql_metrics import sql_metrics
 
+@sql_metrics.instrument
 class QuizService:
     # ... (Keep existing methods: add_round, update_round, delete_round, submit_answer) ...
     def add_round(self, admin_id, event_id, name, points, total_questions, order, is_final=False, qualifier_limit=0, participating_ids=None, related_id=None):
@@ -34,13 +39,16 @@ class QuizService:
             )
             db.add(new_round)
             
-            log = AuditLog(user_id=admin_id, action="ADD_ROUND", details=f"Added Round {order}: '{name}'", timestamp=datetime.datetime.now())
+            log = AuditLog(user_id=admin_id, action="ADD_ROUND", details=f"Added Round {order}: '{name}'", event_id=event_id, timestamp=datetime.datetime.now())
             db.add(log)
+            bump_event_revision(db, event_id)
             
             db.commit()
             db.refresh(new_round) # Refresh to get the generated ID
+            event_hub.publish(SEGMENTS, event_id)
             return True, new_round.id # Return ID instead of string message
         except Exception as e:
+            db.rollback()
             return False, str(e)
         finally:
             db.close()
@@ -78,13 +86,17 @@ class QuizService:
                 user_id=admin_id,
                 action="UPDATE_ROUND",
                 details=f"Updated Round {order}: '{name}'",
+                event_id=target.event_id,
                 timestamp=datetime.datetime.now()
             )
             db.add(log)
             
+            bump_event_revision(db, target.event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, target.event_id)
             return True, "Round updated."
         except Exception as e:
+            db.rollback()
             return False, str(e)
         finally:
             db.close()
@@ -100,6 +112,7 @@ class QuizService:
                 return False, "Round not found."
             
             round_name = target.name
+            event_id = target.event_id
             
             # 1. Delete associated scores first (Cascade usually handles this, but explicit is safer)
             db.query(Score).filter(Score.segment_id == round_id).delete()
@@ -112,11 +125,14 @@ class QuizService:
                 user_id=admin_id,
                 action="DELETE_ROUND",
                 details=f"Deleted Round: '{round_name}'",
+                event_id=event_id,
                 timestamp=datetime.datetime.now()
             )
             db.add(log)
             
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SEGMENTS, event_id)
             return True, "Round deleted."
         except Exception as e:
             db.rollback()
@@ -130,35 +146,96 @@ class QuizService:
         """
         db: Session = SessionLocal()
         try:
-            # 1. Check if already scored
-            existing_score = db.query(Score).filter(
-                Score.contestant_id == contestant_id,
-                Score.segment_id == round_id,
-                Score.question_number == question_num
-            ).first()
-
             # Calculate points immediately based on the round settings
             round_info = db.query(Segment).get(round_id)
             points = round_info.points_per_question if is_correct else 0
 
-            if existing_score:
-                existing_score.is_correct = is_correct
-                existing_score.score_value = points
-                existing_score.judge_id = tabulator_id 
+            if uses_native_upsert(db):
+                # Single INSERT ... ON DUPLICATE KEY UPDATE on (contestant, round, question)
+                upsert_quiz_answers(db, tabulator_id, contestant_id, round_id, [(question_num, is_correct, points)])
             else:
-                new_score = Score(
-                    contestant_id=contestant_id,
-                    segment_id=round_id,
-                    judge_id=tabulator_id,
-                    question_number=question_num,
-                    is_correct=is_correct,
-                    score_value=points
-                )
-                db.add(new_score)
+                # 1. Check if already scored
+                existing_score = db.query(Score).filter(
+                    Score.contestant_id == contestant_id,
+                    Score.segment_id == round_id,
+                    Score.question_number == question_num
+                ).first()
+
+                if existing_score:
+                    existing_score.is_correct = is_correct
+                    existing_score.score_value = points
+                    existing_score.judge_id = tabulator_id 
+                else:
+                    new_score = Score(
+                        contestant_id=contestant_id,
+                        segment_id=round_id,
+                        judge_id=tabulator_id,
+                        question_number=question_num,
+                        is_correct=is_correct,
+                        score_value=points
+                    )
+                    db.add(new_score)
             
+            bump_event_revision(db, round_info.event_id)
             db.commit()
+            event_hub.publish(SCORES, round_info.event_id)
             return True, "Answer recorded."
         except Exception as e:
+            db.rollback()
+            return False, str(e)
+        finally:
+            db.close()
+
+    def submit_answers_batch(self, tabulator_id, contestant_id, round_id, answers):
+        """
+        Records a team's whole answer sheet ({question_num: is_correct}) in ONE transaction.
+        Returns (True, {question_num: points}) or (False, error message).
+        """
+        if not answers:
+            return True, {}
+
+        db: Session = SessionLocal()
+        try:
+            round_info = db.query(Segment).get(round_id)
+            if not round_info:
+                return False, "Round not found."
+
+            points = {q: (round_info.points_per_question if is_correct else 0) for q, is_correct in answers.items()}
+
+            if uses_native_upsert(db):
+                upsert_quiz_answers(db, tabulator_id, contestant_id, round_id, [
+                    (q, is_correct, points[q]) for q, is_correct in answers.items()
+                ])
+            else:
+                existing = {
+                    s.question_number: s for s in db.query(Score).filter(
+                        Score.contestant_id == contestant_id,
+                        Score.segment_id == round_id,
+                        Score.question_number.in_(list(answers))
+                    ).all()
+                }
+                for q, is_correct in answers.items():
+                    score = existing.get(q)
+                    if score:
+                        score.is_correct = is_correct
+                        score.score_value = points[q]
+                        score.judge_id = tabulator_id
+                    else:
+                        db.add(Score(
+                            contestant_id=contestant_id,
+                            segment_id=round_id,
+                            judge_id=tabulator_id,
+                            question_number=q,
+                            is_correct=is_correct,
+                            score_value=points[q]
+                        ))
+
+            bump_event_revision(db, round_info.event_id)
+            db.commit()
+            event_hub.publish(SCORES, round_info.event_id)
+            return True, points
+        except Exception as e:
+            db.rollback()
             return False, str(e)
         finally:
             db.close()
@@ -200,25 +277,31 @@ class QuizService:
     def check_scoring_completion(self, event_id, active_seg, participants, total_qs_in_round):
         """
         Checks if every participant/tabulator has scored all questions in the active segment.
+        One query for all teams; also reports how many teams answered each question.
         """
         if not active_seg or total_qs_in_round <= 0 or not participants:
-            return {'unsubmitted': [], 'submitted': []}
+            return {'unsubmitted': [], 'submitted': [], 'question_counts': {}, 'outstanding_questions': []}
 
         db = SessionLocal()
         unsubmitted_teams = []
         submitted_teams = []
 
         try:
+            # Every distinct (team, question) answered in this segment
+            answered = db.query(Score.contestant_id, Score.question_number).filter(
+                Score.segment_id == active_seg.id,
+                Score.contestant_id.in_([p['id'] for p in participants]),
+                Score.question_number > 0 # Ignore initialization scores (Q0)
+            ).distinct().all()
+
+            progress = {}
+            question_counts = {q: 0 for q in range(1, total_qs_in_round + 1)}
+            for contestant_id, question_num in answered:
+                progress[contestant_id] = progress.get(contestant_id, 0) + 1
+                question_counts[question_num] = question_counts.get(question_num, 0) + 1
+
             for p in participants:
-                contestant_id = p['id']
-                
-                # Count distinct question numbers scored by this contestant in this segment
-                scores_count = db.query(func.count(func.distinct(Score.question_number))).filter(
-                    Score.contestant_id == contestant_id,
-                    Score.segment_id == active_seg.id,
-                    Score.question_number > 0 # Ignore initialization scores (Q0)
-                ).scalar() or 0
-                
+                scores_count = progress.get(p['id'], 0)
                 is_complete = (scores_count >= total_qs_in_round)
                 p['is_complete'] = is_complete
                 p['progress_count'] = scores_count
@@ -228,14 +311,20 @@ class QuizService:
                 else:
                     submitted_teams.append(p)
 
-            return {'unsubmitted': unsubmitted_teams, 'submitted': submitted_teams}
+            outstanding = [q for q, count in sorted(question_counts.items()) if count < len(participants)]
+            return {
+                'unsubmitted': unsubmitted_teams,
+                'submitted': submitted_teams,
+                'question_counts': question_counts,
+                'outstanding_questions': outstanding
+            }
         finally:
             db.close()
             
 
     def get_live_scores(self, event_id, specific_round_id=None, limit_to_participants=None):
         """
-        Calculates scores. 
+        Calculates scores with ONE grouped query for all contestants.
         - Filters out 'Eliminated' contestants automatically.
         """
         db: Session = SessionLocal()
@@ -254,8 +343,20 @@ class QuizService:
             if target_round_id and not active_segment:
                 active_segment = db.query(Segment).get(target_round_id)
 
-            # 2. Determine Contestants to Fetch
-            query = db.query(Contestant).filter(Contestant.event_id == event_id)
+            # 2. Build the grouped sum (only scores of the current mode are joined in)
+            if target_round_id:
+                # Back-to-Zero mode: only this round's scores count
+                query = db.query(Contestant.id, Contestant.name, func.sum(Score.score_value))\
+                    .outerjoin(Score, and_(Score.contestant_id == Contestant.id, Score.segment_id == target_round_id))
+            else:
+                # Cumulative mode: prelim rounds only (no Final/Clincher rounds)
+                prelim = and_(Segment.id == Score.segment_id, Segment.is_final == False, Segment.related_segment_id == None)
+                query = db.query(Contestant.id, Contestant.name, func.sum(case((Segment.id != None, Score.score_value), else_=0)))\
+                    .outerjoin(Score, Score.contestant_id == Contestant.id)\
+                    .outerjoin(Segment, prelim)
+
+            # 3. Determine Contestants to Fetch
+            query = query.filter(Contestant.event_id == event_id)
             
             # --- FILTER ELIMINATED CONTESTANTS ---
             query = query.filter(Contestant.status == 'Active')
@@ -267,28 +368,11 @@ class QuizService:
                 p_ids = [int(x) for x in active_segment.participating_school_ids.split(",") if x.strip()]
                 query = query.filter(Contestant.id.in_(p_ids))
             
-            contestants = query.all()
-            
-            # 3. Calculate Scores
-            for c in contestants:
-                score_query = db.query(func.sum(Score.score_value))\
-                    .join(Segment, Score.segment_id == Segment.id)\
-                    .filter(Score.contestant_id == c.id, Segment.event_id == event_id)
-                
-                if target_round_id:
-                    # If specific_round_id is set (Back-to-Zero mode), only sum that round's scores
-                    score_query = score_query.filter(Score.segment_id == target_round_id)
-                else:
-                    # If no specific round (Cumulative mode), filter out Final/Clincher rounds
-                    # This ensures only prelim cumulative scores are used if we are NOT in a final round.
-                    score_query = score_query.filter(Segment.is_final == False, Segment.related_segment_id == None) 
-                
-                total_points = score_query.scalar() or 0.0
-                
+            for c_id, c_name, total_points in query.group_by(Contestant.id, Contestant.name).all():
                 results.append({
-                    "contestant_id": c.id,
-                    "name": c.name,
-                    "total_score": int(total_points) 
+                    "contestant_id": c_id,
+                    "name": c_name,
+                    "total_score": int(total_points or 0)
                 })
 
             results.sort(key=lambda x: x['total_score'], reverse=True)
@@ -297,8 +381,10 @@ class QuizService:
         finally:
             db.close()
 
-    def check_round_ties(self, event_id, round_id, limit):
-        scores = self.get_live_scores(event_id, specific_round_id=round_id)
+    def check_round_ties(self, event_id, round_id, limit, scores=None):
+        """Pass `scores` (from get_live_scores) to reuse an already computed result."""
+        if scores is None:
+            scores = self.get_live_scores(event_id, specific_round_id=round_id)
         if len(scores) <= limit:
             return False, scores, [], 0
 
@@ -313,9 +399,10 @@ class QuizService:
         
         return False, scores[:limit], [], 0
     
-    def advance_to_next_round(self, admin_id, event_id, current_round_id, qualified_ids):
+    def advance_to_next_round(self, admin_id, event_id, current_round_id, qualified_ids, scores=None):
         """
         Advances qualified_ids to next round AND eliminates those who failed to qualify.
+        Pass `scores` (the get_live_scores result the decision was made on) to skip re-reading the participants.
         """
         db = SessionLocal()
         try:
@@ -323,19 +410,21 @@ class QuizService:
             if not current_round: return False, "Current round not found."
 
             # --- UPDATE: ELIMINATION LOGIC ---
+            p_ids = None
             if current_round.participating_school_ids:
                 p_ids = [int(x) for x in current_round.participating_school_ids.split(",") if x.strip()]
-                participants_at_risk = db.query(Contestant).filter(Contestant.id.in_(p_ids)).all()
+
+            if scores is not None:
+                at_risk_ids = [s['contestant_id'] for s in scores if p_ids is None or s['contestant_id'] in p_ids]
+                at_risk = Contestant.id.in_(at_risk_ids)
+            elif p_ids is not None:
+                at_risk = Contestant.id.in_(p_ids)
             else:
-                participants_at_risk = db.query(Contestant).filter(
-                    Contestant.event_id == event_id,
-                    Contestant.status == 'Active'
-                ).all()
+                at_risk = and_(Contestant.event_id == event_id, Contestant.status == 'Active')
 
-            # Mark losers as Eliminated
-            for c in participants_at_risk:
-                if c.id not in qualified_ids:
-                    c.status = 'Eliminated'
+            # Mark losers as Eliminated (single UPDATE)
+            db.query(Contestant).filter(at_risk, Contestant.id.notin_(qualified_ids))\
+                .update({Contestant.status: 'Eliminated'}, synchronize_session=False)
 
             # --- NEXT ROUND FINDING LOGIC ---
             base_order_index = current_round.order_index
@@ -351,7 +440,9 @@ class QuizService:
             ).order_by(Segment.order_index).first()
             
             if not next_round:
+                bump_event_revision(db, event_id)
                 db.commit()
+                event_hub.publish(CONTESTANTS, event_id)
                 return True, "Event Concluded. Losers eliminated."
 
             # 3. Deactivate Current
@@ -371,13 +462,18 @@ class QuizService:
                 user_id=admin_id,
                 action="ADVANCE_ROUND",
                 details=f"Advanced to '{next_round.name}'. Elimination processed.",
+                event_id=event_id,
                 timestamp=datetime.datetime.now()
             )
             db.add(log)
             
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(CONTESTANTS, event_id)
+            event_hub.publish(SEGMENTS, event_id)
             return True, f"Advanced to {next_round.name}"
         except Exception as e:
+            db.rollback()
             return False, str(e)
         finally:
             db.close()
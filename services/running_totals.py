@@ -0,0 +1,193 @@
+from sqlalchemy import func
+from models.all_models import Segment, Criteria, Score, CriteriaTotal, SegmentTotal
+from services.event_revisions import bump_event_revision
+from services.score_writer import uses_native_upsert, upsert
+
+TOTAL_COLUMNS = ("score_sum", "score_count", "weighted_score")
+
+# ---------------------------------------------------------
+# WRITE SIDE (called inside the score-writing transaction)
+# ---------------------------------------------------------
+def lock_running_totals(db, criteria_ids):
+    """
+    Serializes score writers per event: bumps (and so row-locks) the revision of every
+    event the criteria belong to, BEFORE the caller writes its scores. Another judge
+    scoring the same event waits here until this transaction commits, so neither
+    refresh_running_totals can miss the other's score.
+    Returns the event ids (already bumped; the caller must not bump them again).
+    """
+    event_ids = sorted({
+        e_id for (e_id,) in db.query(Segment.event_id)
+            .join(Criteria, Criteria.segment_id == Segment.id)
+            .filter(Criteria.id.in_(list(criteria_ids))).distinct().all()
+    })
+    for event_id in event_ids: # Always in the same order, so two writers cannot deadlock
+        bump_event_revision(db, event_id)
+    return event_ids
+
+
+def refresh_running_totals(db, contestant_id, criteria_ids):
+    """
+    Updates the running totals touched by a score write, inside the caller's transaction
+    (which must hold lock_running_totals). Only the (contestant, criteria) and
+    (contestant, segment) rows involved are rewritten, and they are re-derived from the
+    judges' scores for that key, so a judge overwriting an existing score can never be
+    double counted.
+    Returns the ids of the events whose totals changed.
+    """
+    criteria_ids = list(criteria_ids)
+    if not criteria_ids:
+        return set()
+
+    # Pending Score rows must be visible to the reads below (autoflush is off)
+    db.flush()
+
+    criterias = db.query(Criteria.id, Criteria.segment_id, Criteria.weight, Segment.event_id)\
+        .join(Segment, Criteria.segment_id == Segment.id)\
+        .filter(Criteria.id.in_(criteria_ids)).all()
+    if not criterias:
+        return set()
+
+    # Locking reads: under MySQL's REPEATABLE READ a plain SELECT may return a snapshot
+    # taken before another judge's (since committed) score; these read the latest rows.
+    judge_scores = {}
+    for crit_id, value in db.query(Score.criteria_id, Score.score_value).filter(
+        Score.contestant_id == contestant_id,
+        Score.criteria_id.in_(criteria_ids)
+    ).with_for_update(read=True).all():
+        judge_scores.setdefault(crit_id, []).append(value)
+
+    criteria_rows, segment_events = [], {}
+    for crit_id, seg_id, weight, event_id in criterias:
+        # A NULL score (not given yet) is neither summed nor counted in the average
+        values = [v for v in judge_scores.get(crit_id, []) if v is not None]
+        score_sum = sum(values)
+        criteria_rows.append({
+            "criteria_id": crit_id,
+            "segment_id": seg_id,
+            "score_sum": score_sum,
+            "score_count": len(values),
+            "weighted_score": (score_sum / len(values)) * weight if values else 0.0
+        })
+        segment_events[seg_id] = event_id
+
+    _save_totals(db, CriteriaTotal, "criteria_id", contestant_id, criteria_rows)
+    db.flush()
+
+    # Segment rows are the sum of their criteria rows
+    segment_rows = {
+        seg_id: {"segment_id": seg_id, "event_id": event_id, "score_sum": 0.0, "score_count": 0, "weighted_score": 0.0}
+        for seg_id, event_id in segment_events.items()
+    }
+    for seg_id, score_sum, score_count, weighted in db.query(
+        CriteriaTotal.segment_id, CriteriaTotal.score_sum, CriteriaTotal.score_count, CriteriaTotal.weighted_score
+    ).filter(
+        CriteriaTotal.contestant_id == contestant_id,
+        CriteriaTotal.segment_id.in_(list(segment_events))
+    ).with_for_update(read=True).all():
+        row = segment_rows[seg_id]
+        row["score_sum"] += score_sum or 0.0
+        row["score_count"] += score_count or 0
+        row["weighted_score"] += weighted or 0.0
+
+    _save_totals(db, SegmentTotal, "segment_id", contestant_id, list(segment_rows.values()))
+    return set(segment_events.values())
+
+
+def _save_totals(db, model, key, contestant_id, rows):
+    """
+    Writes one contestant's total rows (dicts keyed by `key`). Native backends use one
+    upsert, so two first writes can never collide on the primary key; others update the
+    locked existing rows and add the missing ones.
+    """
+    if not rows:
+        return
+    if uses_native_upsert(db):
+        upsert(db, model, [dict(row, contestant_id=contestant_id) for row in rows],
+               keys=["contestant_id", key],
+               update=lambda new: {col: getattr(new, col) for col in TOTAL_COLUMNS})
+        return
+
+    key_column = getattr(model, key)
+    existing = {
+        getattr(t, key): t for t in db.query(model).filter(
+            model.contestant_id == contestant_id,
+            key_column.in_([row[key] for row in rows])
+        ).with_for_update().all()
+    }
+    for row in rows:
+        tally = existing.get(row[key])
+        if tally is None:
+            db.add(model(contestant_id=contestant_id, **row))
+        else:
+            for col in TOTAL_COLUMNS:
+                setattr(tally, col, row[col])
+
+
+def clear_running_totals(db, event_id):
+    """Removes every running total of an event (used before deleting or rebuilding it)."""
+    segment_ids = [s_id for (s_id,) in db.query(Segment.id).filter(Segment.event_id == event_id).all()]
+    if segment_ids:
+        db.query(CriteriaTotal).filter(CriteriaTotal.segment_id.in_(segment_ids)).delete(synchronize_session=False)
+    db.query(SegmentTotal).filter(SegmentTotal.event_id == event_id).delete(synchronize_session=False)
+
+
+def rebuild_running_totals(db, event_id):
+    """
+    Recomputes all running totals of an event from the raw scores table.
+    Used for backfilling existing databases and after criteria weights change.
+    """
+    clear_running_totals(db, event_id)
+
+    rows = db.query(
+        Score.contestant_id, Criteria.id, Criteria.segment_id, Criteria.weight,
+        func.coalesce(func.sum(Score.score_value), 0.0), func.count(Score.score_value)
+    ).join(Criteria, Score.criteria_id == Criteria.id)\
+     .join(Segment, Criteria.segment_id == Segment.id)\
+     .filter(Segment.event_id == event_id)\
+     .group_by(Score.contestant_id, Criteria.id, Criteria.segment_id, Criteria.weight)\
+     .all()
+
+    segment_rows = {}
+    for contestant_id, crit_id, seg_id, weight, score_sum, score_count in rows:
+        weighted = (score_sum / score_count) * weight if score_count else 0.0
+        db.add(CriteriaTotal(
+            contestant_id=contestant_id, criteria_id=crit_id, segment_id=seg_id,
+            score_sum=score_sum, score_count=score_count, weighted_score=weighted
+        ))
+
+        key = (contestant_id, seg_id)
+        if key not in segment_rows:
+            segment_rows[key] = SegmentTotal(
+                contestant_id=contestant_id, segment_id=seg_id, event_id=event_id,
+                score_sum=0.0, score_count=0, weighted_score=0.0
+            )
+        seg_tally = segment_rows[key]
+        seg_tally.score_sum += score_sum
+        seg_tally.score_count += score_count
+        seg_tally.weighted_score += weighted
+
+    db.add_all(segment_rows.values())
+
+# ---------------------------------------------------------
+# READ SIDE (O(contestants x segments) rows, no score scans)
+# ---------------------------------------------------------
+def load_segment_totals(db, event_id):
+    """(contestant_id, segment_id) -> raw segment score."""
+    rows = db.query(SegmentTotal.contestant_id, SegmentTotal.segment_id, SegmentTotal.weighted_score)\
+        .filter(SegmentTotal.event_id == event_id).all()
+    return {(c_id, s_id): weighted for c_id, s_id, weighted in rows}
+
+
+def load_weighted_totals(db, event_id, prelim_only=False):
+    """contestant_id -> sum of segment scores multiplied by segment percentage weight."""
+    query = db.query(
+        SegmentTotal.contestant_id,
+        func.sum(SegmentTotal.weighted_score * Segment.percentage_weight)
+    ).join(Segment, SegmentTotal.segment_id == Segment.id)\
+     .filter(SegmentTotal.event_id == event_id)
+
+    if prelim_only:
+        query = query.filter(Segment.is_final == False)
+
+    return {c_id: total or 0.0 for c_id, total in query.group_by(SegmentTotal.contestant_id).all()}
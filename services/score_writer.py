@@ -0,0 +1,75 @@
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.all_models import Score
+
+# ---------------------------------------------------------
+# NATIVE UPSERTS
+# MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+# SQLite: INSERT ... ON CONFLICT (...) DO UPDATE
+# Rely on the unique indexes declared on Score.
+# ---------------------------------------------------------
+NATIVE_UPSERT_DIALECTS = ("mysql", "sqlite")
+
+def uses_native_upsert(db):
+    """True when the backend has a one-statement upsert; others use the ORM read-then-write path."""
+    return db.get_bind().dialect.name in NATIVE_UPSERT_DIALECTS
+
+
+def upsert(db, model, rows, keys, update):
+    """
+    Inserts `rows` (list of dicts), updating the existing row when one collides on the
+    unique index `keys` (SQLite needs the conflict target named; MySQL takes any unique key).
+    update(new) -> {column: value}, where `new` refers to the row that failed to insert.
+    """
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(model).values(rows)
+        stmt = stmt.on_duplicate_key_update(**update(stmt.inserted))
+    else:
+        stmt = sqlite_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_=update(stmt.excluded))
+    db.execute(stmt)
+
+
+def upsert_judge_scores(db, judge_id, contestant_id, rows):
+    """
+    Writes a judge's pageant scores in ONE statement.
+    rows: [(criteria_id, segment_id, score_value)]; segment_id may be a SQL expression.
+    """
+    upsert(db, Score, [
+        {
+            "judge_id": judge_id,
+            "contestant_id": contestant_id,
+            "criteria_id": criteria_id,
+            "segment_id": segment_id,
+            "score_value": score_value
+        }
+        for criteria_id, segment_id, score_value in rows
+    ],
+        keys=["judge_id", "contestant_id", "criteria_id"],
+        update=lambda new: {"score_value": new.score_value}
+    )
+
+
+def upsert_quiz_answers(db, tabulator_id, contestant_id, round_id, rows):
+    """
+    Records a team's quiz answers in ONE statement (re-tabulating a question overwrites it).
+    rows: [(question_number, is_correct, points)]
+    """
+    upsert(db, Score, [
+        {
+            "contestant_id": contestant_id,
+            "segment_id": round_id,
+            "judge_id": tabulator_id,
+            "question_number": question_num,
+            "is_correct": is_correct,
+            "score_value": points
+        }
+        for question_num, is_correct, points in rows
+    ],
+        keys=["contestant_id", "segment_id", "question_number"],
+        update=lambda new: {
+            "is_correct": new.is_correct,
+            "score_value": new.score_value,
+            "judge_id": new.judge_id
+        }
+    )
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import threading
+from services.event_poller import event_poller
+from services.leaderboard_service import LeaderboardService
+
+# Fields of the standings payload that describe the table layout (a change forces a full refresh)
+LAYOUT_FIELDS = ("event_name", "event_type", "mode_label", "p_headers", "f_headers", "show_prelim_total")
+
+# Row fields the leaderboard actually displays; anything else (e.g. f_tot, which sums
+# unrevealed final segments) must not reach unauthenticated clients.
+# p_tot is added only when the event shows the prelim total.
+PAGEANT_ROW_FIELDS = ("id", "rank", "name", "gender", "segment_scores", "final_scores")
+QUIZ_ROW_FIELDS = ("id", "rank", "name", "status", "p_bd", "f_bd")
+
+
+class SpectatorFeed:
+    """
+    Read-only standings for plain HTTP spectators (JSON + ETag, Server-Sent Events).
+    Each standings computation is serialized ONCE and shared by every client; SSE clients
+    get deltas (changed rows, removed rows, new order) computed once per change.
+    Live pushes come from the shared event poller, subscribed only while someone listens.
+    """
+    def __init__(self, history=8):
+        self.leaderboard_service = LeaderboardService()
+        self.history = history
+        self._lock = threading.Lock()
+        self._current = {}      # event_id -> (standings, etag, body)
+        self._documents = {}    # event_id -> {etag: document} (recent versions, for deltas)
+        self._deltas = {}       # (event_id, since_etag, etag) -> body
+        self._listeners = {}    # event_id -> {token: callback}
+        self._subscriptions = {} # event_id -> event poller token
+        self._next_token = 1
+
+        # Metrics
+        self.serializations = 0
+
+    # ---------------------------------------------------------
+    # SNAPSHOTS
+    # ---------------------------------------------------------
+    def snapshot(self, event_id, standings=None):
+        """
+        Returns (etag, json bytes) of the event's current standings. While SSE clients keep the
+        shared poller subscribed, its last push is served from memory (no query per request).
+        """
+        pushed = standings is not None
+        if not pushed:
+            with self._lock:
+                current = self._current.get(event_id)
+                if current and event_id in self._subscriptions:
+                    return current[1], current[2]
+            standings = self.leaderboard_service.get_standings(event_id)
+        with self._lock:
+            current = self._current.get(event_id)
+            # The standings cache hands out the same object until something changes
+            if current and current[0] is standings:
+                return current[1], current[2]
+
+        document = self._document(standings)
+        body = json.dumps(document, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        with self._lock:
+            self.serializations += 1
+            # While subscribed only the poller's pushes are kept: a read that raced a push may be older
+            if pushed or event_id not in self._subscriptions:
+                self._current[event_id] = (standings, etag, body)
+            versions = self._documents.setdefault(event_id, {})
+            versions[etag] = document
+            while len(versions) > self.history:
+                versions.pop(next(iter(versions)))
+        return etag, body
+
+    def delta(self, event_id, since_etag=None):
+        """
+        Returns (etag, json bytes) of the change since `since_etag`: a 'delta' message when that
+        version is still known and the layout is unchanged, otherwise a 'full' message.
+        Returns (etag, None) when the client is already up to date.
+        """
+        etag, body = self.snapshot(event_id)
+        if since_etag == etag:
+            return etag, None
+
+        key = (event_id, since_etag, etag)
+        with self._lock:
+            if key in self._deltas:
+                return etag, self._deltas[key]
+            versions = self._documents.get(event_id, {})
+            old, new = versions.get(since_etag), versions.get(etag)
+
+        if old is None or new is None or any(old[f] != new[f] for f in LAYOUT_FIELDS):
+            message = b'{"type":"full","etag":' + json.dumps(etag).encode() + b',"standings":' + body + b'}'
+        else:
+            old_rows = {r["id"]: r for r in old["rows"]}
+            new_ids = [r["id"] for r in new["rows"]]
+            message = json.dumps({
+                "type": "delta",
+                "etag": etag,
+                "since": since_etag,
+                "rows": [r for r in new["rows"] if old_rows.get(r["id"]) != r],
+                "removed": [r_id for r_id in old_rows if r_id not in set(new_ids)],
+                "order": new_ids
+            }, separators=(",", ":")).encode("utf-8")
+
+        with self._lock:
+            self._deltas = {k: v for k, v in self._deltas.items() if k[2] == etag} # Only deltas to the newest version
+            self._deltas[key] = message
+        return etag, message
+
+    # ---------------------------------------------------------
+    # LIVE LISTENERS (SSE streams)
+    # ---------------------------------------------------------
+    def listen(self, event_id, callback):
+        """Calls callback() (from a poller thread) whenever the event's standings change. Returns a token."""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._listeners.setdefault(event_id, {})[token] = callback
+            first = event_id not in self._subscriptions
+            if first:
+                self._subscriptions[event_id] = None
+                self._current.pop(event_id, None) # Read before the subscription; wait for the poller's first push
+        if first:
+            poller_token = event_poller.subscribe(event_id, lambda snap: self._on_change(event_id, snap), standings=True)
+            with self._lock:
+                self._subscriptions[event_id] = poller_token
+        return token
+
+    def unlisten(self, event_id, token):
+        poller_token = None
+        with self._lock:
+            listeners = self._listeners.get(event_id, {})
+            listeners.pop(token, None)
+            if not listeners:
+                self._listeners.pop(event_id, None)
+                poller_token = self._subscriptions.pop(event_id, None)
+        if poller_token:
+            event_poller.unsubscribe(poller_token)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "serializations": self.serializations,
+                "listeners": {e_id: len(l) for e_id, l in self._listeners.items()}
+            }
+
+    def _on_change(self, event_id, snapshot):
+        self.snapshot(event_id, snapshot["standings"]) # Serialize once, before waking the clients
+        with self._lock:
+            callbacks = list(self._listeners.get(event_id, {}).values())
+        for callback in callbacks:
+            callback()
+
+    @staticmethod
+    def _document(standings):
+        """Public JSON shape of the standings (the shared cached object is never mutated)."""
+        document = {f: standings[f] for f in LAYOUT_FIELDS}
+        fields = QUIZ_ROW_FIELDS if standings["event_type"] == "QuizBee" else PAGEANT_ROW_FIELDS
+        if standings["show_prelim_total"]:
+            fields += ("p_tot",)
+        rows = []
+        for position, row in enumerate(standings["scores"]):
+            row = dict(row, rank=row.get("rank", position + 1)) # Quiz Bee: overall position
+            rows.append({f: row[f] for f in fields if f in row})
+        document["rows"] = rows
+        return document
+
+
+# Shared by every HTTP client served by this process
+spectator_feed = SpectatorFeed()
@@ -0,0 +1,87 @@
+import threading
+from core.event_hub import event_hub, SCORES, SEGMENTS, CONTESTANTS, EVENTS
+
+
+class StandingsCache:
+    """
+    Process-wide cache of computed standings, keyed by (event_id, revision).
+    An event's revision is bumped whenever a score, segment reveal or contestant status
+    change is published on the event hub; every viewer of that event then shares ONE
+    recomputation. Callers may also pass the event's database revision (see
+    services.event_revisions), which catches writes made by other app processes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revisions = {}     # event_id -> revision
+        self._entries = {}       # event_id -> ((revision, db_revision), standings)
+        self._compute_locks = {} # event_id -> Lock (only one viewer computes per change)
+        self.hits = 0
+        self.misses = 0
+
+    def bump(self, event_id):
+        """Marks an event's standings as stale."""
+        if not event_id: return
+        with self._lock:
+            self._revisions[event_id] = self._revisions.get(event_id, 0) + 1
+
+    def revision(self, event_id):
+        with self._lock:
+            return self._revisions.get(event_id, 0)
+
+    def forget(self, event_id):
+        """Drops everything cached for an event (e.g. after it is deleted)."""
+        with self._lock:
+            self._entries.pop(event_id, None)
+            self._revisions.pop(event_id, None)
+
+    def get(self, event_id, compute, db_revision=None):
+        """Returns cached standings for the current revision, calling compute(event_id) on a miss."""
+        cached = self._lookup(event_id, db_revision)
+        if cached is not None:
+            return cached
+
+        with self._compute_lock(event_id):
+            # Another viewer may have filled it while we waited
+            cached = self._lookup(event_id, db_revision)
+            if cached is not None:
+                return cached
+
+            # Read the revision BEFORE computing: a bump during compute must cause a later miss
+            key = (self.revision(event_id), db_revision)
+            standings = compute(event_id)
+            with self._lock:
+                self.misses += 1
+                self._entries[event_id] = (key, standings)
+            return standings
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "events_cached": len(self._entries)
+            }
+
+    def _lookup(self, event_id, db_revision):
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry and entry[0] == (self._revisions.get(event_id, 0), db_revision):
+                self.hits += 1
+                return entry[1]
+            return None
+
+    def _compute_lock(self, event_id):
+        with self._lock:
+            if event_id not in self._compute_locks:
+                self._compute_locks[event_id] = threading.Lock()
+            return self._compute_locks[event_id]
+
+
+# Shared by every session served by this process
+standings_cache = StandingsCache()
+
+# Any score, segment (reveal/activation) or contestant (status) change invalidates the event
+event_hub.add_listener((SCORES, SEGMENTS, CONTESTANTS), lambda topic, event_id: standings_cache.bump(event_id))
+event_hub.add_listener((EVENTS,), lambda topic, event_id: standings_cache.forget(event_id))
@@ -0,0 +1,138 @@
+from sqlalchemy import func
+from models.all_models import Segment, Criteria, Score, Contestant, User, EventJudge
+
+
+class TabulationEngine:
+    """
+    Loads every per-criteria average of an event in ONE grouped query
+    (joined to criteria weights) and computes segment / event totals in memory.
+    Cost no longer grows with contestants x segments x criteria.
+    """
+    def __init__(self, db, event_id):
+        self.event_id = event_id
+        # (contestant_id, segment_id) -> raw segment score (sum of avg * criteria weight)
+        self.segment_scores = {}
+
+        rows = db.query(
+            Score.contestant_id,
+            Criteria.segment_id,
+            Criteria.weight,
+            func.avg(Score.score_value)
+        ).join(Criteria, Score.criteria_id == Criteria.id)\
+         .join(Segment, Criteria.segment_id == Segment.id)\
+         .filter(Segment.event_id == event_id)\
+         .group_by(Score.contestant_id, Criteria.segment_id, Criteria.id, Criteria.weight)\
+         .all()
+
+        for contestant_id, segment_id, weight, avg_score in rows:
+            key = (contestant_id, segment_id)
+            self.segment_scores[key] = self.segment_scores.get(key, 0.0) + ((avg_score or 0.0) * weight)
+
+    def segment_score(self, contestant_id, segment_id):
+        """Raw (unweighted by percentage) score of a contestant in one segment."""
+        return self.segment_scores.get((contestant_id, segment_id), 0.0)
+
+    def weighted_total(self, contestant_id, segments):
+        """Sum of segment scores multiplied by each segment's percentage weight."""
+        total = 0.0
+        for s in segments:
+            total += self.segment_score(contestant_id, s.id) * s.percentage_weight
+        return total
+
+
+class ScoreMatrix:
+    """
+    Dense contestant x judge x criteria matrix of one event's pageant scores.
+    Built from a handful of bulk queries; every judge total, criteria average,
+    segment score and ranking is then derived in memory.
+    Holds plain values only, so it stays usable after the session is closed.
+    """
+    def __init__(self, db, event_id):
+        self.event_id = event_id
+
+        # --- AXES ---
+        contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
+        self.contestants = [
+            {"id": c.id, "number": c.candidate_number, "name": c.name, "gender": c.gender}
+            for c in contestants
+        ]
+
+        assigned = db.query(User).join(EventJudge).filter(EventJudge.event_id == event_id).order_by(User.name).all()
+        self.judges = [{"id": u.id, "name": u.name} for u in assigned]
+
+        segments = db.query(Segment).filter(Segment.event_id == event_id).order_by(Segment.order_index).all()
+        self.segments = [
+            {"id": s.id, "name": s.name, "percentage_weight": s.percentage_weight, "is_final": s.is_final}
+            for s in segments
+        ]
+
+        criterias = db.query(Criteria).join(Segment, Criteria.segment_id == Segment.id)\
+            .filter(Segment.event_id == event_id).all()
+        self.criteria = [{"id": c.id, "segment_id": c.segment_id, "weight": c.weight} for c in criterias]
+
+        scores = db.query(Score.contestant_id, Score.judge_id, Score.criteria_id, Score.score_value)\
+            .join(Criteria, Score.criteria_id == Criteria.id)\
+            .join(Segment, Criteria.segment_id == Segment.id)\
+            .filter(Segment.event_id == event_id).all()
+
+        # Judges who scored but are no longer assigned still count towards averages
+        known_judges = {j["id"] for j in self.judges}
+        self.judge_axis = [j["id"] for j in self.judges]
+        for _, judge_id, _, _ in scores:
+            if judge_id not in known_judges:
+                known_judges.add(judge_id)
+                self.judge_axis.append(judge_id)
+
+        self.c_index = {c["id"]: i for i, c in enumerate(self.contestants)}
+        self.j_index = {j_id: i for i, j_id in enumerate(self.judge_axis)}
+        self.k_index = {k["id"]: i for i, k in enumerate(self.criteria)}
+
+        # --- DENSE FILL (None = not scored) ---
+        self.values = [
+            [[None] * len(self.criteria) for _ in self.judge_axis]
+            for _ in self.contestants
+        ]
+        for contestant_id, judge_id, criteria_id, value in scores:
+            ci = self.c_index.get(contestant_id)
+            if ci is None: continue
+            self.values[ci][self.j_index[judge_id]][self.k_index[criteria_id]] = value
+
+    def _segment_criteria(self, segment_id):
+        return [(self.k_index[k["id"]], k["weight"]) for k in self.criteria if k["segment_id"] == segment_id]
+
+    def judge_totals(self, contestant_id, segment_id):
+        """Weighted segment total given by each ASSIGNED judge (missing scores count as 0)."""
+        ci = self.c_index[contestant_id]
+        crits = self._segment_criteria(segment_id)
+        totals = []
+        for j in self.judges:
+            row = self.values[ci][self.j_index[j["id"]]]
+            totals.append(sum((row[ki] or 0.0) * weight for ki, weight in crits))
+        return totals
+
+    def _average(self, ci, ki):
+        given = [judge_row[ki] for judge_row in self.values[ci] if judge_row[ki] is not None]
+        return (sum(given) / len(given)) if given else 0.0
+
+    def criteria_average(self, contestant_id, criteria_id):
+        """Average across all judges who scored the criteria (SQL AVG semantics)."""
+        return self._average(self.c_index[contestant_id], self.k_index[criteria_id])
+
+    def segment_score(self, contestant_id, segment_id):
+        """Raw segment score: sum of criteria averages multiplied by criteria weight."""
+        ci = self.c_index[contestant_id]
+        return sum(self._average(ci, ki) * weight for ki, weight in self._segment_criteria(segment_id))
+
+
+def rank_by_gender(rows, key='total'):
+    """Splits rows into Male/Female lists, sorts them descending by key and assigns ranks."""
+    data = {'Male': [], 'Female': []}
+    for r in rows:
+        if r.get('gender') in data:
+            data[r['gender']].append(r)
+
+    for gender in ['Male', 'Female']:
+        data[gender].sort(key=lambda x: x[key], reverse=True)
+        for i, r in enumerate(data[gender]):
+            r['rank'] = i + 1
+    return data
@@ -3,6 +3,10 @@ from unittest.mock import MagicMock, patch, ANY
 import sys
 import os
 import datetime
+import json
+import threading
+import time
+import tempfile
 
 # Add the parent directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -12,7 +16,20 @@ from services.pageant_service import PageantService
 from services.quiz_service import QuizService
 from services.admin_service import AdminService
 from services.event_service import EventService
-from models.all_models import User, Event, Segment, Score, Criteria
+from services.contestant_service import ContestantService
+from services.standings_cache import StandingsCache
+from services.audit_writer import AuditWriter
+from services.event_revisions import bump_event_revision
+from services.event_poller import EventPoller
+from services.spectator_feed import SpectatorFeed
+from services.audit_archive import AuditArchive
+import core.database as database
+from core.database import MeteredQueuePool, pool_metrics
+from core.sql_metrics import sql_metrics
+from migrations import run_migrations
+from core.event_hub import EventHub, SCORES, SEGMENTS, AUDIT
+from core.page_tasks import PageTasks
+from models.all_models import User, Event, Segment, Score, Criteria, Contestant, EventRevision, AuditLog
 
 class TestJudgeMeNotCore(unittest.TestCase):
 
@@ -29,10 +46,11 @@ class TestJudgeMeNotCore(unittest.TestCase):
     # =================================================================
 
     # --- TEST: USER CREATION ---
+    @patch('services.admin_service.audit_writer')
     @patch('services.admin_service.SessionLocal')
     @patch('bcrypt.gensalt')
     @patch('bcrypt.hashpw')
-    def test_user_creation(self, mock_hashpw, mock_gensalt, mock_session):
+    def test_user_creation(self, mock_hashpw, mock_gensalt, mock_session, mock_audit):
         """Verify Admin can create a user and password is hashed."""
         mock_db = MagicMock()
         mock_session.return_value = mock_db
@@ -165,9 +183,10 @@ class TestJudgeMeNotCore(unittest.TestCase):
     # 3. INTEGRATION TEST (WORKFLOW SIMULATION)
     # =================================================================
     
+    @patch('services.admin_service.audit_writer')
     @patch('services.event_service.SessionLocal')
     @patch('services.admin_service.SessionLocal')
-    def test_integration_event_lifecycle(self, mock_admin_session, mock_event_session):
+    def test_integration_event_lifecycle(self, mock_admin_session, mock_event_session, mock_audit):
         """
         Simulate Full Lifecycle: Admin Creates Event -> Adds Round -> Activates it.
         """
@@ -221,10 +240,11 @@ class TestJudgeMeNotCore(unittest.TestCase):
         print("✅ TEST PASSED: Integration Workflow (Event Creation -> Activation).")
 
     # --- RECOMMENDED: AUTH TO RESTRICTED ACTION ---
+    @patch('services.pageant_service.audit_writer')
     @patch('services.pageant_service.SessionLocal')
     @patch('services.auth_service.SessionLocal')
     @patch('bcrypt.checkpw')
-    def test_integration_login_and_scoring(self, mock_checkpw, mock_auth_session, mock_pageant_session):
+    def test_integration_login_and_scoring(self, mock_checkpw, mock_auth_session, mock_pageant_session, mock_audit):
         """
         Simulate Full Flow: Login as Judge -> Submit Score.
         """
@@ -269,5 +289,1153 @@ class TestJudgeMeNotCore(unittest.TestCase):
         self.assertTrue(score_added, "Score was not recorded after login.")
         print("✅ TEST PASSED: Integration Workflow (Login -> Submit Score).")
 
+    # =================================================================
+    # 4. PERFORMANCE (QUERY COUNT) TESTS
+    # =================================================================
+
+    @patch('services.pageant_service.SessionLocal')
+    def test_standing_uses_single_grouped_query(self, mock_session):
+        """
+        Verify calculate_standing computes weighted totals from one grouped query.
+        Scores: 90 (40% segment) and 80 (60% segment) -> 84.0 (see MAN-07).
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+
+        contestant = MagicMock(id=1, candidate_number=1, gender="Male")
+        contestant.name = "Juan"
+        seg_a = MagicMock(id=10, percentage_weight=0.4)
+        seg_b = MagicMock(id=20, percentage_weight=0.6)
+
+        contestant_q, segment_q, avg_q = MagicMock(), MagicMock(), MagicMock()
+        contestant_q.filter.return_value.all.return_value = [contestant]
+        segment_q.filter.return_value.all.return_value = [seg_a, seg_b]
+        # (contestant_id, segment_id, criteria weight, avg score)
+        avg_q.join.return_value.join.return_value.filter.return_value.group_by.return_value.all.return_value = [
+            (1, 10, 0.5, 90.0), (1, 10, 0.5, 90.0), (1, 20, 1.0, 80.0)
+        ]
+        mock_db.query.side_effect = [contestant_q, segment_q, avg_q]
+
+        results = self.pageant_service.calculate_standing(1)
+
+        self.assertEqual(results[0]['total_score'], 84.0)
+        self.assertEqual(mock_db.query.call_count, 3)
+        print("✅ TEST PASSED: Standings computed from a single grouped query.")
+
+    @patch('services.pageant_service.SessionLocal')
+    def test_segment_tabulation_from_score_matrix(self, mock_session):
+        """Verify the tabulation board is built from one bulk score fetch."""
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+
+        def named(name, **kw):
+            m = MagicMock(**kw); m.name = name; return m
+
+        contestants = [named("Ana", id=1, candidate_number=1, gender="Female"),
+                       named("Bea", id=2, candidate_number=2, gender="Female")]
+        judges = [named("Judge A", id=7), named("Judge B", id=8)]
+        segments = [named("Talent", id=10, percentage_weight=1.0, is_final=False)]
+        criteria = [MagicMock(id=100, segment_id=10, weight=0.5), MagicMock(id=101, segment_id=10, weight=0.5)]
+        scores = [(1, 7, 100, 80.0), (1, 7, 101, 90.0), (1, 8, 100, 70.0), (1, 8, 101, 100.0),
+                  (2, 7, 100, 90.0), (2, 7, 101, 96.0), (2, 8, 100, 90.0), (2, 8, 101, 90.0)]
+
+        contestant_q, judge_q, segment_q, criteria_q, score_q = (MagicMock() for _ in range(5))
+        contestant_q.filter.return_value.all.return_value = contestants
+        judge_q.join.return_value.filter.return_value.order_by.return_value.all.return_value = judges
+        segment_q.filter.return_value.order_by.return_value.all.return_value = segments
+        criteria_q.join.return_value.filter.return_value.all.return_value = criteria
+        score_q.join.return_value.join.return_value.filter.return_value.all.return_value = scores
+        mock_db.query.side_effect = [contestant_q, judge_q, segment_q, criteria_q, score_q]
+
+        data = self.pageant_service.get_segment_tabulation(1, 10)
+
+        self.assertEqual(data['judges'], ["Judge A", "Judge B"])
+        self.assertEqual(data['Female'][0]['name'], "Bea")
+        self.assertEqual(data['Female'][0]['scores'], [93.0, 90.0])
+        self.assertEqual(data['Female'][0]['total'], 91.5)
+        self.assertEqual(data['Female'][1]['rank'], 2)
+        self.assertEqual(mock_db.query.call_count, 5)
+        print("✅ TEST PASSED: Segment tabulation from a single score matrix.")
+
+    def test_standings_cache_shared_until_bumped(self):
+        """
+        Verify many viewers of one event share a single standings computation,
+        and that bumping the event's revision forces exactly one recompute.
+        """
+        cache = StandingsCache()
+        compute = MagicMock(return_value={"scores": []})
+
+        for _ in range(300):
+            cache.get(1, compute)
+        self.assertEqual(compute.call_count, 1)
+
+        cache.bump(1)
+        cache.get(1, compute)
+        cache.get(1, compute)
+        self.assertEqual(compute.call_count, 2)
+
+        stats = cache.stats()
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hits'], 300)
+        print("✅ TEST PASSED: Standings cache shared across viewers.")
+
+    @patch('services.pageant_service.audit_writer')
+    @patch('services.pageant_service.lock_running_totals', return_value=[])
+    @patch('services.pageant_service.refresh_running_totals', return_value=set())
+    @patch('services.pageant_service.SessionLocal')
+    def test_scoring_card_saved_in_one_transaction(self, mock_session, mock_refresh, mock_lock, mock_audit):
+        """
+        Verify a whole scoring card is upserted with one commit and one audit entry.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+
+        existing = Score(judge_id=7, contestant_id=1, criteria_id=100, score_value=50.0)
+        crit_a, crit_b = MagicMock(id=100, segment_id=10), MagicMock(id=101, segment_id=10)
+        crit_a.name, crit_b.name = "Poise", "Beauty"
+
+        score_q, criteria_q, name_q = MagicMock(), MagicMock(), MagicMock()
+        score_q.filter.return_value.all.return_value = [existing]
+        criteria_q.filter.return_value.all.return_value = [crit_a, crit_b]
+        name_q.filter.return_value.scalar.return_value = "Juan"
+        mock_db.query.side_effect = [criteria_q, score_q, name_q]
+
+        success, _ = self.pageant_service.submit_scores_batch(7, 1, {100: 90.0, 101: 85.0})
+
+        self.assertTrue(success)
+        self.assertEqual(existing.score_value, 90.0)
+        added = [call.args[0] for call in mock_db.add.call_args_list]
+        self.assertEqual([a.criteria_id for a in added if isinstance(a, Score)], [101])
+        mock_audit.record.assert_called_once_with(7, "SCORE_SUBMIT", ANY, event_id=None)
+        mock_lock.assert_called_once_with(mock_db, [100, 101])
+        mock_refresh.assert_called_once_with(mock_db, 1, [100, 101])
+        mock_db.commit.assert_called_once()
+        print("✅ TEST PASSED: Scoring card saved in one transaction.")
+
+    @patch('services.audit_writer.SessionLocal')
+    def test_audit_writer_batches_and_flushes_on_shutdown(self, mock_session):
+        """
+        Verify queued audit entries are bulk-inserted in batches and none are lost on shutdown.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+
+        writer = AuditWriter(batch_size=3, flush_interval_ms=50)
+        for i in range(7):
+            writer.record(1, "SCORE_SUBMIT", f"Entry {i}")
+        writer.shutdown()
+
+        batches = [call.args[1] for call in mock_db.bulk_insert_mappings.call_args_list]
+        self.assertTrue(all(len(b) <= 3 for b in batches))
+        self.assertEqual([e['details'] for b in batches for e in b], [f"Entry {i}" for i in range(7)])
+
+        stats = writer.stats()
+        self.assertEqual(stats['written'], 7)
+        self.assertEqual(stats['queue_depth'], 0)
+        print("✅ TEST PASSED: Audit writer batches and flushes on shutdown.")
+
+    @patch('services.audit_writer.SessionLocal')
+    def test_audit_writer_retries_and_spills_failed_batches(self, mock_session):
+        """
+        Verify a batch the database refuses is retried (not lost), entries still refused at
+        shutdown or recorded after it are spilled to a file, and the next writer replays them.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+        spill_file = os.path.join(tempfile.mkdtemp(), "audit_spill.jsonl")
+        inserted = lambda: [e['details'] for call in mock_db.bulk_insert_mappings.call_args_list for e in call.args[1]]
+
+        mock_db.commit.side_effect = [Exception("server gone"), Exception("server gone"), None]
+        writer = AuditWriter(batch_size=10, flush_interval_ms=20, retry_ms=10, spill_file=spill_file)
+        for i in range(3):
+            writer.record(1, "SCORE_SUBMIT", f"Entry {i}")
+        deadline = time.monotonic() + 5
+        while writer.stats()['written'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = writer.stats()
+        self.assertEqual((stats['written'], stats['failed'], stats['retries']), (3, 6, 2))
+        self.assertEqual(inserted()[-3:], ["Entry 0", "Entry 1", "Entry 2"])
+
+        mock_db.commit.side_effect = Exception("server gone")
+        writer.record(1, "SCORE_SUBMIT", "Entry 3")
+        writer.shutdown()
+        writer.record(1, "SCORE_SUBMIT", "Entry 4") # After shutdown: inline, then spilled
+        self.assertEqual(writer.stats()['spilled'], 2)
+        with open(spill_file, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)['details'] for line in f], ["Entry 3", "Entry 4"])
+
+        mock_db.reset_mock()
+        mock_db.commit.side_effect = None
+        writer = AuditWriter(batch_size=10, flush_interval_ms=20, spill_file=spill_file)
+        writer.record(1, "LOGIN", "Entry 5")
+        writer.shutdown()
+        self.assertEqual(sorted(inserted()), ["Entry 3", "Entry 4", "Entry 5"])
+        self.assertIsInstance(mock_db.bulk_insert_mappings.call_args_list[0].args[1][0]['timestamp'], datetime.datetime)
+        self.assertEqual(writer.stats()['replayed'], 2)
+        self.assertFalse(os.path.exists(spill_file))
+        print("✅ TEST PASSED: Audit writer retries and spills failed batches.")
+
+    @patch('services.quiz_service.SessionLocal')
+    def test_live_scores_single_grouped_query(self, mock_session):
+        """
+        Verify cumulative quiz scores for every contestant come from one grouped query.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+
+        active_q, live_q = MagicMock(), MagicMock()
+        active_q.filter.return_value.first.return_value = None # No active round -> cumulative mode
+        live_q.outerjoin.return_value.outerjoin.return_value.filter.return_value.filter.return_value\
+            .group_by.return_value.all.return_value = [(1, "Alpha", 5.0), (2, "Bravo", None), (3, "Charlie", 9.0)]
+        mock_db.query.side_effect = [active_q, live_q]
+
+        results = self.quiz_service.get_live_scores(1)
+
+        self.assertEqual([r['name'] for r in results], ["Charlie", "Alpha", "Bravo"])
+        self.assertEqual([r['total_score'] for r in results], [9, 5, 0])
+        self.assertEqual(mock_db.query.call_count, 2)
+        print("✅ TEST PASSED: Live quiz scores from a single grouped query.")
+
+    @patch('services.quiz_service.SessionLocal')
+    def test_scoring_completion_single_query(self, mock_session):
+        """
+        Verify round completion for all teams (and per-question counts) comes from one query.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+        # (contestant_id, question_number) pairs answered so far
+        mock_db.query.return_value.filter.return_value.distinct.return_value.all.return_value = [
+            (1, 1), (1, 2), (2, 1)
+        ]
+
+        participants = [{'id': 1, 'name': "Alpha"}, {'id': 2, 'name': "Bravo"}]
+        status = self.quiz_service.check_scoring_completion(1, MagicMock(id=10), participants, 2)
+
+        self.assertEqual([p['name'] for p in status['submitted']], ["Alpha"])
+        self.assertEqual([p['progress_count'] for p in participants], [2, 1])
+        self.assertEqual(status['question_counts'], {1: 2, 2: 1})
+        self.assertEqual(status['outstanding_questions'], [2])
+        self.assertEqual(mock_db.query.call_count, 1)
+        print("✅ TEST PASSED: Scoring completion from a single query.")
+
+    @patch('services.quiz_service.SessionLocal')
+    def test_answer_sheet_saved_in_one_transaction(self, mock_session):
+        """
+        Verify a tabulator's answer sheet is written with one round lookup and one commit.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+
+        round_q, score_q, revision_q = MagicMock(), MagicMock(), MagicMock()
+        round_q.get.return_value = Segment(id=10, event_id=1, points_per_question=2)
+        existing = Score(contestant_id=3, segment_id=10, question_number=1, is_correct=False, score_value=0)
+        score_q.filter.return_value.all.return_value = [existing]
+        revision_q.filter.return_value.update.return_value = 1
+        mock_db.query.side_effect = [round_q, score_q, revision_q]
+
+        success, points = self.quiz_service.submit_answers_batch(5, 3, 10, {1: True, 2: False, 3: True})
+
+        self.assertTrue(success)
+        self.assertEqual(points, {1: 2, 2: 0, 3: 2})
+        self.assertEqual((existing.is_correct, existing.score_value, existing.judge_id), (True, 2, 5))
+        self.assertEqual(sorted(call.args[0].question_number for call in mock_db.add.call_args_list), [2, 3])
+        mock_db.commit.assert_called_once()
+        print("✅ TEST PASSED: Answer sheet saved in one transaction.")
+
+    def test_event_hub_delivers_relevant_changes_once(self):
+        """
+        Verify a burst of changes reaches each interested subscriber once,
+        and subscribers of other events or topics are not woken up.
+        """
+        hub = EventHub(debounce_ms=50)
+        delivered = {'event_1': threading.Event(), 'event_2': threading.Event()}
+        calls = {'event_1': 0, 'event_2': 0, 'audit': 0}
+
+        def on_event_1():
+            calls['event_1'] += 1; delivered['event_1'].set()
+        def on_event_2():
+            calls['event_2'] += 1; delivered['event_2'].set()
+        def on_audit():
+            calls['audit'] += 1
+
+        hub.subscribe((SCORES, SEGMENTS), on_event_1, event_id=1)
+        hub.subscribe((SCORES,), on_event_2, event_id=2)
+        hub.subscribe((AUDIT,), on_audit)
+        bumped = []
+        hub.add_listener((SCORES,), lambda topic, event_id: bumped.append(event_id))
+
+        for _ in range(20):
+            hub.publish(SCORES, 1)
+        hub.publish(SEGMENTS, 1)
+
+        self.assertTrue(delivered['event_1'].wait(2))
+        time.sleep(0.2)
+        self.assertEqual(calls, {'event_1': 1, 'event_2': 0, 'audit': 0})
+        self.assertEqual(len(bumped), 20) # Sync listeners run on every publish
+        print("✅ TEST PASSED: Event hub coalesces and filters change notifications.")
+
+    def test_event_revision_bumped_in_place(self):
+        """
+        Verify a change bumps the event's single revision row (inserting it only when missing),
+        and that a new database revision invalidates cached standings.
+        """
+        mock_db = MagicMock()
+        mock_db.get_bind.return_value.dialect.name = "postgresql" # No native upsert path
+        revision_q = mock_db.query.return_value
+
+        revision_q.filter.return_value.update.return_value = 1
+        bump_event_revision(mock_db, 1)
+        mock_db.add.assert_not_called()
+
+        revision_q.filter.return_value.update.return_value = 0
+        bump_event_revision(mock_db, 2)
+        added = mock_db.add.call_args.args[0]
+        self.assertIsInstance(added, EventRevision)
+        self.assertEqual((added.event_id, added.revision), (2, 1))
+
+        cache = StandingsCache()
+        compute = MagicMock(return_value={"scores": []})
+        cache.get(1, compute, db_revision=7)
+        cache.get(1, compute, db_revision=7)
+        cache.get(1, compute, db_revision=8) # Written by another process
+        self.assertEqual(compute.call_count, 2)
+        print("✅ TEST PASSED: Event revision bumped in place.")
+
+    @patch('services.event_poller.read_event_revision', return_value=3)
+    def test_event_poller_shared_by_all_pages(self, mock_revision):
+        """
+        Verify all pages watching an event share one poller that fetches the active segment
+        and standings once per change, and that the poller stops with its last subscriber.
+        """
+        poller = EventPoller(interval_s=0.05)
+        poller.event_service = MagicMock()
+        poller.leaderboard_service = MagicMock()
+        poller.leaderboard_service.get_standings.return_value = {"scores": []}
+
+        received = []
+        all_served = threading.Event()
+        def on_snapshot(snapshot):
+            received.append(snapshot['revision'])
+            if len(received) == 200: all_served.set()
+
+        tokens = [poller.subscribe(1, on_snapshot, standings=(i % 2 == 0)) for i in range(200)]
+        self.assertTrue(all_served.wait(2))
+        time.sleep(0.2) # Several more ticks with an unchanged revision
+
+        self.assertEqual(poller.stats()['pollers'], 1)
+        self.assertEqual(poller.event_service.get_active_segment.call_count, 1)
+        self.assertEqual(poller.leaderboard_service.get_standings.call_count, 1)
+        self.assertEqual(received, [3] * 200)
+
+        for token in tokens:
+            poller.unsubscribe(token)
+        self.assertEqual(poller.stats()['pollers'], 0)
+        print("✅ TEST PASSED: One event poller shared by all pages.")
+
+    def test_page_tasks_cancelled_on_route_change(self):
+        """
+        Verify every worker a page registered is stopped when it navigates away,
+        without touching the workers of other pages.
+        """
+        tasks = PageTasks()
+        page_a, page_b = MagicMock(session_id="a"), MagicMock(session_id="b")
+        stops = {'a1': MagicMock(), 'a2': MagicMock(), 'b1': MagicMock()}
+
+        tasks.add(page_a, "leaderboard-updates", stops['a1'])
+        task_a2 = tasks.add(page_a, "judge-segment-updates", stops['a2'])
+        tasks.add(page_b, "tabulator-updates", stops['b1'])
+        finished = threading.Event()
+        tasks.start(page_b, "initial-load", finished.set)
+        self.assertTrue(finished.wait(1))
+        time.sleep(0.05)
+
+        self.assertEqual((tasks.count(page_a), tasks.count(page_b)), (2, 1))
+        tasks.cancel(page_a, task_a2)
+        tasks.cancel(page_a, task_a2) # Back button and route change may both stop it
+        stops['a2'].assert_called_once()
+
+        self.assertEqual(tasks.cancel_all(page_a), 1)
+        stops['a1'].assert_called_once()
+        stops['b1'].assert_not_called()
+        self.assertEqual(tasks.stats()['workers'], 1)
+        print("✅ TEST PASSED: Page tasks cancelled on route change.")
+
+    def test_spectator_feed_serializes_once_per_change(self):
+        """
+        Verify spectators share one JSON serialization (and ETag) per standings version,
+        and that a change is sent as a delta holding only the rows that moved.
+        """
+        feed = SpectatorFeed()
+        feed.leaderboard_service = MagicMock()
+        rows = [
+            {"id": 1, "name": "A", "gender": "Male", "segment_scores": [80], "final_scores": [], "p_tot": 40, "f_tot": 0, "rank": 1},
+            {"id": 2, "name": "B", "gender": "Male", "segment_scores": [70], "final_scores": [], "p_tot": 35, "f_tot": 0, "rank": 2},
+            {"id": 3, "name": "C", "gender": "Male", "segment_scores": [60], "final_scores": [], "p_tot": 30, "f_tot": 0, "rank": 3},
+        ]
+        layout = {"event_name": "E", "event_type": "Pageant", "mode_label": "OFFICIAL RANKINGS",
+                  "p_headers": ["Gown"], "f_headers": [], "show_prelim_total": True}
+        feed.leaderboard_service.get_standings.return_value = dict(layout, scores=rows)
+
+        etags = {feed.snapshot(1)[0] for _ in range(200)}
+        self.assertEqual(len(etags), 1)
+        self.assertEqual(feed.serializations, 1)
+        old_etag = etags.pop()
+
+        moved = [dict(rows[1], p_tot=45, rank=1), dict(rows[0], rank=2), rows[2]]
+        feed.leaderboard_service.get_standings.return_value = dict(layout, scores=moved)
+        new_etag, message = feed.delta(1, old_etag)
+
+        delta = json.loads(message)
+        self.assertNotEqual(new_etag, old_etag)
+        self.assertEqual(delta["type"], "delta")
+        self.assertEqual([r["id"] for r in delta["rows"]], [2, 1])
+        self.assertEqual(delta["order"], [2, 1, 3])
+        self.assertEqual(feed.delta(1, new_etag), (new_etag, None))
+        print("✅ TEST PASSED: Spectator feed serialized once per change.")
+
+    @patch('services.spectator_feed.event_poller')
+    def test_spectator_feed_served_from_poller_push(self, mock_poller):
+        """
+        Verify that while SSE clients keep the shared poller subscribed, JSON requests and SSE
+        wake-ups are served from its last push: many clients, one change, no standings reads.
+        """
+        feed = SpectatorFeed()
+        feed.leaderboard_service = MagicMock()
+        layout = {"event_name": "E", "event_type": "Pageant", "mode_label": "OFFICIAL RANKINGS",
+                  "p_headers": ["Gown"], "f_headers": [], "show_prelim_total": True}
+        rows = [{"id": 1, "name": "A", "gender": "Male", "segment_scores": [80], "final_scores": [], "p_tot": 40, "rank": 1}]
+        wakeups = []
+        tokens = [feed.listen(1, lambda: wakeups.append(1)) for _ in range(50)]
+        self.assertEqual(mock_poller.subscribe.call_count, 1)
+        on_change = mock_poller.subscribe.call_args.args[1]
+
+        on_change({"standings": dict(layout, scores=rows)}) # Poller's first push
+        old_etag = feed.snapshot(1)[0]
+        on_change({"standings": dict(layout, scores=[dict(rows[0], segment_scores=[90], p_tot=45)])}) # One change
+        self.assertEqual(len(wakeups), 100)
+
+        etags = {feed.snapshot(1)[0] for _ in range(200)}                   # JSON requests
+        messages = {feed.delta(1, old_etag)[1] for _ in range(len(wakeups))} # Woken SSE clients
+        self.assertEqual(len(etags), 1)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(json.loads(messages.pop())["type"], "delta")
+        self.assertEqual(feed.leaderboard_service.get_standings.call_count, 0)
+        self.assertEqual(feed.serializations, 2)
+
+        for token in tokens: feed.unlisten(1, token)
+        mock_poller.unsubscribe.assert_called_once()
+        feed.leaderboard_service.get_standings.return_value = dict(layout, scores=rows)
+        feed.snapshot(1) # Nobody subscribed: read again
+        self.assertEqual(feed.leaderboard_service.get_standings.call_count, 1)
+        print("✅ TEST PASSED: Spectator feed served from the poller's push.")
+
+    def test_spectator_feed_hides_unrevealed_totals(self):
+        """
+        Verify the public feed only carries the fields the leaderboard displays: no final
+        total (it includes unrevealed segments) and no prelim total unless the event shows it.
+        """
+        feed = SpectatorFeed()
+        feed.leaderboard_service = MagicMock()
+        layout = {"event_name": "E", "event_type": "Pageant", "mode_label": "OFFICIAL RANKINGS",
+                  "p_headers": ["Gown"], "f_headers": [], "show_prelim_total": False}
+        row = {"id": 1, "name": "A", "gender": "Female", "segment_scores": [80], "final_scores": [], "p_tot": 40, "f_tot": 97.5, "rank": 1}
+        feed.leaderboard_service.get_standings.return_value = dict(layout, scores=[row])
+
+        etag, body = feed.snapshot(1)
+        self.assertEqual(json.loads(body)["rows"], [{"id": 1, "rank": 1, "name": "A", "gender": "Female", "segment_scores": [80], "final_scores": []}])
+
+        # A hidden total changing is not a visible change: nothing to send
+        feed.leaderboard_service.get_standings.return_value = dict(layout, scores=[dict(row, p_tot=45, f_tot=99.0)])
+        self.assertEqual(feed.delta(1, etag), (etag, None))
+
+        quiz = {"event_name": "Q", "event_type": "QuizBee", "mode_label": "ELIMINATION ROUND",
+                "p_headers": ["Easy"], "f_headers": ["Final"], "show_prelim_total": True}
+        team = {"id": 5, "name": "Team A", "p_bd": [10], "f_bd": [4], "p_tot": 10, "f_tot": 4, "status": "Active"}
+        feed.leaderboard_service.get_standings.return_value = dict(quiz, scores=[team])
+        self.assertEqual(json.loads(feed.snapshot(2)[1])["rows"],
+                         [{"id": 5, "rank": 1, "name": "Team A", "status": "Active", "p_bd": [10], "f_bd": [4], "p_tot": 10}])
+        print("✅ TEST PASSED: Spectator feed hides unrevealed totals.")
+
+    @patch('services.admin_service.SessionLocal')
+    def test_audit_logs_keyset_paged(self, mock_session):
+        """
+        Verify audit logs are fetched one bounded page at a time: older pages are keyed
+        on the anchor entry and the live tail only asks for newer ids.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+        anchor_q, page_q, tail_q = MagicMock(), MagicMock(), MagicMock()
+        anchor_q.filter.return_value.scalar.return_value = datetime.datetime(2025, 1, 1, 9, 0)
+        for q in (page_q, tail_q):
+            q.options.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
+        mock_db.query.side_effect = [page_q, anchor_q, tail_q]
+
+        self.admin_service.get_security_logs(before_id=500, limit=50)
+        self.admin_service.get_security_logs(after_id=900)
+
+        page_q.options.return_value.filter.return_value.order_by.return_value.limit.assert_called_once_with(50)
+        tail_q.options.return_value.filter.return_value.order_by.return_value.limit.assert_called_once_with(100)
+        self.assertIn("audit_logs.id > ", str(tail_q.options.return_value.filter.call_args.args[0]))
+        self.assertEqual(mock_db.query.call_count, 3) # No full-table load
+        print("✅ TEST PASSED: Audit logs keyset paged.")
+
+    @patch('services.admin_service.SessionLocal')
+    def test_audit_log_filters_run_in_sql(self, mock_session):
+        """
+        Verify audit log filters become SQL predicates (search as a FULLTEXT word-prefix MATCH
+        on MySQL) instead of loading every row and filtering in the view.
+        """
+        from sqlalchemy.dialects import mysql
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+        mock_db.get_bind.return_value.dialect.name = "mysql"
+        log_q = MagicMock()
+        for step in ("options", "filter", "order_by", "limit"):
+            getattr(log_q, step).return_value = log_q
+        log_q.all.return_value = []
+        mock_db.query.return_value = log_q
+
+        self.admin_service.get_security_logs(action="SCORE_SUBMIT", user_id=4, event_id=2,
+                                             since=datetime.datetime(2025, 1, 1), search="Gown que")
+
+        compiled = [c.args[0].compile(dialect=mysql.dialect()) for c in log_q.filter.call_args_list]
+        predicates = " ".join(map(str, compiled))
+        for expected in ("audit_logs.action =", "audit_logs.user_id =", "audit_logs.event_id =",
+                         "audit_logs.timestamp >=", "MATCH (audit_logs.details) AGAINST (%s IN BOOLEAN MODE)"):
+            self.assertIn(expected, predicates)
+        self.assertIn("+Gown* +que*", compiled[-1].params.values())
+        log_q.limit.assert_called_once_with(100)
+
+        # No word long enough for the FULLTEXT index: falls back to the escaped LIKE
+        log_q.filter.reset_mock()
+        self.admin_service.get_security_logs(search="on")
+        self.assertIn("lower(audit_logs.details) LIKE", str(log_q.filter.call_args.args[0].compile(dialect=mysql.dialect())))
+        print("✅ TEST PASSED: Audit log filters run in SQL.")
+
+    @patch('services.admin_service.SessionLocal')
+    @patch('services.audit_archive.SessionLocal')
+    def test_audit_archive_moves_rows_and_reads_them_back(self, mock_archive_session, mock_admin_session):
+        """
+        Verify old audit entries are written to a compressed segment before being deleted
+        from the hot table, and that get_security_logs still returns them (filters included).
+        """
+        archive = AuditArchive(tempfile.mkdtemp())
+        old = [MagicMock(id=i, user_id=1, action="LOGIN" if i % 2 else "SCORE_SUBMIT", details=f"entry {i}",
+                         event_id=None, timestamp=datetime.datetime(2024, 1, 1, 9, i)) for i in range(1, 6)]
+        for log in old:
+            log.user.username, log.user.role = "admin", "Admin"
+        archive_db = MagicMock()
+        mock_archive_session.return_value = archive_db
+        batch_q = archive_db.query.return_value.options.return_value.filter.return_value.order_by.return_value.limit.return_value
+        batch_q.all.side_effect = [old, []]
+
+        success, msg = archive.archive(older_than_days=30, closed_events=False)
+
+        self.assertTrue(success)
+        self.assertEqual(msg, "Archived 5 audit entries.")
+        archive_db.query.return_value.filter.return_value.delete.assert_called_once()
+        self.assertEqual(archive.stats()["entries"], 5)
+
+        # Hot table now empty: the page comes from the archive, newest first
+        admin_db = MagicMock()
+        mock_admin_session.return_value = admin_db
+        admin_db.query.return_value.options.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
+        admin_db.query.return_value.options.return_value.order_by.return_value.limit.return_value.all.return_value = []
+        with patch('services.admin_service.audit_archive', archive):
+            self.assertEqual([log.id for log in self.admin_service.get_security_logs(limit=3)], [5, 4, 3])
+            logins = self.admin_service.get_security_logs(action="LOGIN")
+        self.assertEqual([log.id for log in logins], [5, 3, 1])
+        self.assertEqual(logins[0].user.username, "admin")
+        print("✅ TEST PASSED: Audit archive round trip.")
+
+    def test_audit_search_same_in_hot_table_and_archive(self):
+        """
+        Verify that without FULLTEXT (SQLite) a search returns the same entries whether they are
+        still in audit_logs or already archived: partial words, short words, case and LIKE wildcards.
+        """
+        from sqlalchemy.orm import sessionmaker
+        from models.all_models import AuditLog
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            database.Base.metadata.create_all(engine)
+            TestSession = sessionmaker(bind=engine)
+            details = ["Scored 95 for 'Queen' on 'Gown'", "Scored 80 for 'Duchess' on 'Swimwear'",
+                       "Deleted event 'Gown Night'", "Progress 100% done", "Progress 1000 done"]
+            db = TestSession()
+            # Same entries twice: the older copy gets archived, the newer one stays hot
+            for day, action in ((1, "OLD"), (20, "NEW")):
+                db.add_all([AuditLog(action=action, details=d, timestamp=datetime.datetime(2025, 1, day, 9, i)) for i, d in enumerate(details)])
+            db.commit()
+            db.close()
+
+            archive = AuditArchive(tempfile.mkdtemp())
+            with patch('services.audit_archive.SessionLocal', TestSession), \
+                 patch('services.audit_archive.datetime') as mock_dt:
+                mock_dt.datetime.now.return_value = datetime.datetime(2025, 1, 10)
+                mock_dt.timedelta = datetime.timedelta
+                self.assertTrue(archive.archive(older_than_days=0, closed_events=False)[0])
+
+            with patch('services.admin_service.SessionLocal', TestSession), patch('services.admin_service.audit_archive', archive):
+                for search in ("own", "GOWN", "on", "100%", "Duchess"):
+                    found = self.admin_service.get_security_logs(search=search)
+                    hot = sorted(log.details for log in found if log.action == "NEW")
+                    archived = sorted(log.details for log in found if log.action == "OLD")
+                    self.assertTrue(hot, search)
+                    self.assertEqual(hot, archived, search)
+                self.assertEqual(len(self.admin_service.get_security_logs(search="100%")), 2) # % is literal
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Audit search consistent across hot table and archive.")
+
+    def test_pool_metrics_track_checkouts_and_timeouts(self):
+        """
+        Verify the metered pool reports connections in use, overflow, wait time and
+        checkout failures when every pooled connection is taken.
+        """
+        from sqlalchemy import create_engine
+        engine = create_engine("sqlite://", poolclass=MeteredQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.1)
+        app_pool = pool_metrics.pool
+        pool_metrics.reset()
+        pool_metrics.attach(engine)
+        try:
+            held = [engine.connect(), engine.connect()]
+            stats = pool_metrics.stats()
+            self.assertEqual((stats["checked_out"], stats["overflow_in_use"], stats["checkouts"]), (2, 1, 2))
+            self.assertEqual((stats["pool_size"], stats["max_overflow"]), (1, 1))
+
+            with self.assertRaises(Exception):
+                engine.connect() # Pool exhausted: waits pool_timeout, then fails
+            stats = pool_metrics.stats()
+            self.assertEqual((stats["failures"], stats["timeouts"]), (1, 1))
+            self.assertGreaterEqual(stats["wait_max_ms"], 100)
+
+            for conn in held: conn.close()
+            self.assertEqual(pool_metrics.stats()["checkins"], 2)
+        finally:
+            engine.dispose()
+            pool_metrics.pool = app_pool
+            pool_metrics.reset()
+        print("✅ TEST PASSED: Pool metrics tracked.")
+
+    def test_pool_diagnostics_not_public(self):
+        """
+        Verify the pool diagnostics endpoint (served on the public spectator port) answers
+        only the server machine itself or a caller with the diagnostics token.
+        """
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.diagnostics_api import router
+        app = FastAPI()
+        app.include_router(router)
+
+        phone = TestClient(app, client=("192.168.1.50", 50000))
+        self.assertEqual(phone.get("/api/diagnostics/pool").status_code, 403)
+        with patch('api.diagnostics_api.DIAGNOSTICS_TOKEN', "s3cret"):
+            self.assertEqual(phone.get("/api/diagnostics/pool", headers={"X-Diagnostics-Token": "guess"}).status_code, 403)
+            self.assertEqual(phone.get("/api/diagnostics/pool", headers={"X-Diagnostics-Token": "s3cret"}).status_code, 200)
+        self.assertEqual(TestClient(app, client=("127.0.0.1", 50000)).get("/api/diagnostics/pool").status_code, 200)
+        print("✅ TEST PASSED: Pool diagnostics not public.")
+
+    @patch('core.database.create_database_if_not_exists', return_value=True)
+    def test_database_bootstrapped_once(self, mock_create):
+        """
+        Verify importing the app no longer creates an engine, and the CREATE DATABASE check
+        runs once per process, then is skipped on warm restarts thanks to the marker.
+        """
+        marker = os.path.join(tempfile.mkdtemp(), ".db_bootstrapped")
+        with patch.object(database, 'BOOTSTRAP_MARKER', marker), patch.object(database, '_bootstrapped', False):
+            self.assertTrue(database.bootstrap_database())
+            self.assertTrue(database.bootstrap_database())
+            self.assertEqual(mock_create.call_count, 1)
+            self.assertTrue(os.path.exists(marker))
+
+            database._bootstrapped = False # Warm restart: new process, marker on disk
+            self.assertTrue(database.bootstrap_database())
+            self.assertEqual(mock_create.call_count, 1)
+
+            database.bootstrap_database(force=True) # init_db.py always checks
+            self.assertEqual(mock_create.call_count, 2)
+        print("✅ TEST PASSED: Database bootstrapped once.")
+
+    @patch('services.pageant_service.audit_writer')
+    def test_sqlite_backend_upserts_in_place(self, mock_audit):
+        """
+        Verify the embedded SQLite backend against a real database file: WAL journaling,
+        and re-submitted scores/answers overwrite their row through the native upsert.
+        """
+        from sqlalchemy import text
+        from sqlalchemy.orm import sessionmaker
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            database.Base.metadata.create_all(engine)
+            TestSession = sessionmaker(bind=engine, autoflush=False)
+            db = TestSession()
+            pageant, quiz = Event(name="Gala", event_type="Pageant"), Event(name="Bee", event_type="QuizBee")
+            judge = User(name="Judge", username="judge", role="Judge")
+            db.add_all([pageant, quiz, judge]); db.flush()
+            segment = Segment(event_id=pageant.id, name="Gown", percentage_weight=1.0, order_index=1)
+            round_ = Segment(event_id=quiz.id, name="Easy", points_per_question=2, total_questions=5, order_index=1)
+            db.add_all([segment, round_]); db.flush()
+            criteria = Criteria(segment_id=segment.id, name="Poise", weight=1.0)
+            queen = Contestant(event_id=pageant.id, candidate_number=1, name="Queen", gender="Female")
+            team = Contestant(event_id=quiz.id, candidate_number=1, name="Team A")
+            db.add_all([criteria, queen, team]); db.commit()
+            ids = (judge.id, queen.id, criteria.id, team.id, round_.id, pageant.id)
+            db.close()
+            judge_id, queen_id, criteria_id, team_id, round_id, pageant_id = ids
+
+            with patch('services.pageant_service.SessionLocal', TestSession), patch('services.quiz_service.SessionLocal', TestSession):
+                self.assertTrue(self.pageant_service.submit_score(judge_id, queen_id, criteria_id, 80)[0])
+                self.assertTrue(self.pageant_service.submit_score(judge_id, queen_id, criteria_id, 95)[0])
+                self.assertTrue(self.quiz_service.submit_answer(judge_id, team_id, round_id, 1, True)[0])
+                self.assertTrue(self.quiz_service.submit_answer(judge_id, team_id, round_id, 1, False)[0])
+
+            db = TestSession()
+            self.assertEqual(db.query(Score.score_value).filter(Score.criteria_id == criteria_id).all(), [(95,)])
+            self.assertEqual(db.query(Score.score_value, Score.is_correct).filter(Score.segment_id == round_id).all(), [(0, False)])
+            self.assertEqual(db.query(EventRevision.revision).filter(EventRevision.event_id == pageant_id).scalar(), 2)
+            self.assertEqual(db.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            db.close()
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: SQLite backend upserts in place.")
+
+    def test_unit_of_work_shares_one_session(self):
+        """
+        Verify a screen load inside unit_of_work() runs every service call through one
+        session, i.e. one pooled connection checkout instead of one per call.
+        """
+        from sqlalchemy import event as sa_event
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            database.Base.metadata.create_all(engine)
+            TestSession = database.LazySessionmaker(bind=engine, autoflush=False)
+            db = TestSession()
+            pageant = Event(name="Gala", event_type="Pageant")
+            db.add(pageant); db.flush()
+            db.add(Segment(event_id=pageant.id, name="Gown", percentage_weight=1.0, order_index=1, is_active=True))
+            db.add_all(Contestant(event_id=pageant.id, candidate_number=n, name=f"C{n}", gender="Female") for n in range(1, 6))
+            db.commit(); event_id = pageant.id; db.close()
+
+            checkouts = []
+            sa_event.listen(engine, "checkout", lambda *args: checkouts.append(1))
+
+            contestant_service = ContestantService()
+
+            def load_screen():
+                self.event_service.get_active_segment(event_id)
+                self.pageant_service.get_event_structure(event_id)
+                for c in contestant_service.get_contestants(event_id, active_only=True):
+                    self.pageant_service.get_judge_scores(1, c.id)
+
+            with patch('services.event_service.SessionLocal', TestSession), \
+                 patch('services.pageant_service.SessionLocal', TestSession), \
+                 patch('services.contestant_service.SessionLocal', TestSession):
+                load_screen()
+                separate = len(checkouts)
+                checkouts.clear()
+                with database.unit_of_work() as unit:
+                    load_screen()
+                    shared = unit.session
+                self.assertFalse(shared.owned_by_unit) # Really closed at the end of the block
+
+            self.assertEqual(separate, 8)
+            self.assertEqual(len(checkouts), 1)
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Unit of work shares one session.")
+
+    @patch('services.quiz_service.event_hub')
+    def test_unit_of_work_recovers_after_failed_call(self, mock_hub):
+        """
+        Verify a call that fails inside unit_of_work() does not poison the shared session:
+        the next call in the same unit succeeds and the failed call's writes are never committed.
+        """
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            database.Base.metadata.create_all(engine)
+            TestSession = database.LazySessionmaker(bind=engine, autoflush=False)
+            db = TestSession()
+            quiz = Event(name="Bee", event_type="QuizBee")
+            judge = User(name="Tabulator", username="tab", role="Tabulator")
+            db.add_all([quiz, judge]); db.flush()
+            round_ = Segment(event_id=quiz.id, name="Easy", points_per_question=2, total_questions=5, order_index=1)
+            team = Contestant(event_id=quiz.id, candidate_number=1, name="Team A")
+            db.add_all([round_, team]); db.commit()
+            judge_id, team_id, round_id, event_id = judge.id, team.id, round_.id, quiz.id
+            db.close()
+
+            def careless_call():
+                # An except-block that swallows the error without rolling back
+                db = TestSession()
+                try:
+                    db.add(AuditLog(user_id=judge_id, action="HALF_WRITTEN", details="never committed"))
+                    db.flush()
+                    raise RuntimeError("boom")
+                except RuntimeError:
+                    return False
+                finally:
+                    db.close()
+
+            with patch('services.quiz_service.SessionLocal', TestSession):
+                with database.unit_of_work():
+                    self.assertFalse(self.quiz_service.submit_answer(judge_id, 999, round_id, 1, True)[0]) # Unknown team
+                    self.assertTrue(self.quiz_service.submit_answer(judge_id, team_id, round_id, 1, True)[0])
+                    self.assertFalse(careless_call())
+                    self.assertTrue(self.quiz_service.submit_answer(judge_id, team_id, round_id, 2, True)[0])
+
+            db = TestSession()
+            self.assertEqual(db.query(Score.question_number).filter(Score.segment_id == round_id).order_by(Score.question_number).all(), [(1,), (2,)])
+            self.assertEqual(db.query(AuditLog).filter(AuditLog.action == "HALF_WRITTEN").count(), 0)
+            self.assertEqual(db.query(EventRevision.revision).filter(EventRevision.event_id == event_id).scalar(), 2)
+            db.close()
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Unit of work recovers after a failed call.")
+
+    def test_sql_metrics_attributed_to_route_and_service(self):
+        """
+        Verify every statement is counted (with latency percentiles) against the screen
+        route and the outermost service method, and slow statements are logged with parameters.
+        """
+        from sqlalchemy.orm import sessionmaker
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            database.Base.metadata.create_all(engine)
+            sql_metrics.reset()
+            sql_metrics.attach(engine)
+            TestSession = sessionmaker(bind=engine)
+            with patch('services.contestant_service.SessionLocal', TestSession), patch.object(sql_metrics, 'slow_ms', 0):
+                with sql_metrics.route("/leaderboard/7"):
+                    ContestantService().get_contestants(7)
+                    ContestantService().get_contestants(8)
+
+            stats = sql_metrics.stats()
+            route = stats["routes"]["/leaderboard/{id}"]
+            scope = stats["scopes"]["ContestantService.get_contestants"]
+            self.assertEqual((route["calls"], route["statements"]), (1, 2))
+            self.assertEqual((scope["calls"], scope["statements_per_call"]), (2, 1.0))
+            self.assertGreater(scope["p95_ms"], 0)
+            self.assertIn("contestants", stats["slow_queries"][0]["statement"])
+            self.assertIn("8", stats["slow_queries"][0]["parameters"])
+            self.assertNotIn("parameters", sql_metrics.stats(include_parameters=False)["slow_queries"][0])
+        finally:
+            engine.dispose()
+            sql_metrics.reset()
+        print("✅ TEST PASSED: SQL metrics attributed.")
+
+    def test_sql_diagnostics_not_public(self):
+        """
+        Verify the SQL diagnostics endpoint (statement text and timings, on the public
+        spectator port) answers only the server machine or a caller with the token.
+        """
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.diagnostics_api import router
+        app = FastAPI()
+        app.include_router(router)
+
+        phone = TestClient(app, client=("192.168.1.50", 50000))
+        self.assertEqual(phone.get("/api/diagnostics/sql").status_code, 403)
+        with patch('api.diagnostics_api.DIAGNOSTICS_TOKEN', "s3cret"):
+            self.assertEqual(phone.get("/api/diagnostics/sql", headers={"X-Diagnostics-Token": "s3cret"}).status_code, 200)
+        server_machine = TestClient(app, base_url="http://192.168.1.10:8550", client=("192.168.1.10", 50000))
+        self.assertIn("routes", server_machine.get("/api/diagnostics/sql").json())
+        print("✅ TEST PASSED: SQL diagnostics not public.")
+
+    def test_migrations_apply_once_in_order(self):
+        """
+        Verify pending migrations run in version order and are recorded, so an existing
+        database gains the new performance indexes and a second run applies nothing.
+        """
+        from sqlalchemy import inspect, text
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            # A database created before versioning: tables exist, the new index does not
+            database.Base.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(text("DROP INDEX ix_contestants_event_status"))
+
+            self.assertEqual(run_migrations(engine), [1, 2])
+            indexes = {ix["name"] for ix in inspect(engine).get_indexes("contestants")}
+            self.assertIn("ix_contestants_event_status", indexes)
+            self.assertEqual(run_migrations(engine), [])
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Migrations applied once, in order.")
+
+    def test_baseline_migration_upgrades_old_schema(self):
+        """
+        Verify migration 0001 brings a pre-versioning database to its pinned schema (audit
+        log column, score unique keys after removing duplicates) without reading the models.
+        """
+        from sqlalchemy import inspect, text
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        try:
+            database.Base.metadata.create_all(engine)
+            from sqlalchemy.orm import Session
+            with Session(bind=engine) as db:
+                event, judge = Event(name="Gala", event_type="Pageant"), User(name="Judge", username="judge", role="Judge")
+                db.add_all([event, judge]); db.flush()
+                segment = Segment(event_id=event.id, name="Gown", percentage_weight=1.0, order_index=1)
+                db.add(segment); db.flush()
+                db.add_all([Criteria(segment_id=segment.id, name="Poise", weight=1.0), Contestant(event_id=event.id, candidate_number=1, name="Queen")])
+                db.commit()
+            with engine.begin() as conn:
+                conn.execute(text("DROP TABLE audit_logs"))
+                conn.execute(text("CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, user_id INTEGER, action VARCHAR(50), details TEXT, timestamp DATETIME)"))
+                conn.execute(text("DROP INDEX uq_scores_judge_contestant_criteria"))
+                conn.execute(text("INSERT INTO scores (judge_id, contestant_id, criteria_id, score_value) VALUES (1, 1, 1, 80), (1, 1, 1, 90)"))
+
+            self.assertEqual(run_migrations(engine), [1, 2])
+
+            inspector = inspect(engine)
+            self.assertIn("event_id", {c["name"] for c in inspector.get_columns("audit_logs")})
+            audit_indexes = {ix["name"]: ix["column_names"] for ix in inspector.get_indexes("audit_logs")}
+            self.assertEqual(audit_indexes["ix_audit_logs_event_timestamp"], ["event_id", "timestamp", "id"])
+            score_keys = {ix["name"]: ix for ix in inspector.get_indexes("scores")}
+            self.assertTrue(score_keys["uq_scores_judge_contestant_criteria"]["unique"])
+            with engine.connect() as conn:
+                self.assertEqual(conn.execute(text("SELECT score_value FROM scores")).all(), [(90.0,)])
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Baseline migration upgrades an old schema.")
+
+    def _running_totals_db(self):
+        """A real SQLite database with one pageant (two criteria in one segment), two judges and a contestant."""
+        from sqlalchemy.orm import sessionmaker
+        engine = database.create_app_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "judgemenot.db"))
+        database.Base.metadata.create_all(engine)
+        TestSession = sessionmaker(bind=engine, autoflush=False)
+        db = TestSession()
+        event = Event(name="Gala", event_type="Pageant")
+        judges = [User(name="Judge A", username="judge_a", role="Judge"), User(name="Judge B", username="judge_b", role="Judge")]
+        db.add_all([event] + judges); db.flush()
+        segment = Segment(event_id=event.id, name="Gown", percentage_weight=1.0, order_index=1)
+        db.add(segment); db.flush()
+        poise, beauty = Criteria(segment_id=segment.id, name="Poise", weight=0.5), Criteria(segment_id=segment.id, name="Beauty", weight=0.5)
+        queen = Contestant(event_id=event.id, candidate_number=1, name="Queen", gender="Female")
+        db.add_all([poise, beauty, queen]); db.commit()
+        ids = {"event": event.id, "segment": segment.id, "poise": poise.id, "beauty": beauty.id,
+               "queen": queen.id, "judge_a": judges[0].id, "judge_b": judges[1].id}
+        db.close()
+        return engine, TestSession, ids
+
+    @patch('services.pageant_service.audit_writer')
+    def test_running_totals_created_on_first_score(self, mock_audit):
+        """
+        Verify the first score for a contestant creates its criteria and segment totals
+        (an upsert, so two judges' first writes cannot collide on the primary key).
+        """
+        from models.all_models import CriteriaTotal, SegmentTotal
+        engine, TestSession, ids = self._running_totals_db()
+        try:
+            with patch('services.pageant_service.SessionLocal', TestSession):
+                self.assertTrue(self.pageant_service.submit_score(ids["judge_a"], ids["queen"], ids["poise"], 80)[0])
+
+            db = TestSession()
+            self.assertEqual(db.query(CriteriaTotal.criteria_id, CriteriaTotal.score_sum, CriteriaTotal.score_count, CriteriaTotal.weighted_score).all(),
+                             [(ids["poise"], 80.0, 1, 40.0)])
+            self.assertEqual(db.query(SegmentTotal.segment_id, SegmentTotal.event_id, SegmentTotal.score_count, SegmentTotal.weighted_score).all(),
+                             [(ids["segment"], ids["event"], 1, 40.0)])
+            self.assertEqual(db.query(EventRevision.revision).filter(EventRevision.event_id == ids["event"]).scalar(), 1)
+            db.close()
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Running totals created on first score.")
+
+    @patch('services.pageant_service.audit_writer')
+    def test_running_totals_overwritten_on_rescore(self, mock_audit):
+        """
+        Verify a judge re-scoring replaces their contribution (never double counted) while
+        other judges' scores stay in the total, on both the upsert and the ORM write paths.
+        """
+        from models.all_models import CriteriaTotal, SegmentTotal
+        for native in (True, False):
+            with self.subTest(native_upsert=native):
+                engine, TestSession, ids = self._running_totals_db()
+                try:
+                    with patch('services.pageant_service.SessionLocal', TestSession), \
+                         patch('services.running_totals.uses_native_upsert', return_value=native):
+                        self.pageant_service.submit_scores_batch(ids["judge_a"], ids["queen"], {ids["poise"]: 80, ids["beauty"]: 70})
+                        self.pageant_service.submit_score(ids["judge_b"], ids["queen"], ids["poise"], 90)
+                        self.assertTrue(self.pageant_service.submit_score(ids["judge_a"], ids["queen"], ids["poise"], 100)[0])
+
+                    db = TestSession()
+                    poise = db.query(CriteriaTotal).filter(CriteriaTotal.criteria_id == ids["poise"]).one()
+                    self.assertEqual((poise.score_sum, poise.score_count, poise.weighted_score), (190.0, 2, 47.5))
+                    segment = db.query(SegmentTotal).one()
+                    self.assertEqual((segment.score_sum, segment.score_count, segment.weighted_score), (260.0, 3, 82.5))
+                    db.close()
+                finally:
+                    engine.dispose()
+        print("✅ TEST PASSED: Running totals overwritten on re-score.")
+
+    def test_running_totals_ignore_null_scores(self):
+        """
+        Verify a NULL score row (criteria not scored yet) is neither summed nor counted, so it
+        does not drag the average down, both when refreshed and when rebuilt from the scores table.
+        """
+        from models.all_models import CriteriaTotal
+        from services.running_totals import refresh_running_totals, rebuild_running_totals
+        from sqlalchemy import null
+        engine, TestSession, ids = self._running_totals_db()
+        try:
+            db = TestSession()
+            db.add_all([
+                Score(judge_id=ids["judge_a"], contestant_id=ids["queen"], criteria_id=ids["poise"], segment_id=ids["segment"], score_value=80),
+                Score(judge_id=ids["judge_b"], contestant_id=ids["queen"], criteria_id=ids["poise"], segment_id=ids["segment"], score_value=null()) # The column default would store 0
+            ])
+            db.commit()
+            for refresh in (lambda: refresh_running_totals(db, ids["queen"], [ids["poise"]]),
+                            lambda: rebuild_running_totals(db, ids["event"])):
+                refresh(); db.commit()
+                poise = db.query(CriteriaTotal).filter(CriteriaTotal.criteria_id == ids["poise"]).one()
+                self.assertEqual((poise.score_sum, poise.score_count, poise.weighted_score), (80.0, 1, 40.0))
+                db.expire_all()
+            db.close()
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Running totals ignore NULL scores.")
+
+    @patch('services.pageant_service.refresh_running_totals', return_value={3})
+    @patch('services.pageant_service.upsert_judge_scores')
+    @patch('services.running_totals.bump_event_revision')
+    @patch('services.pageant_service.SessionLocal')
+    def test_score_write_locks_event_before_totals(self, mock_session, mock_bump, mock_upsert, mock_refresh):
+        """
+        Verify the event's revision row is locked (bumped) before the score is written and
+        the totals re-derived, so concurrent judges on one event are serialized.
+        """
+        mock_db = MagicMock()
+        mock_session.return_value = mock_db
+        mock_db.get_bind.return_value.dialect.name = "mysql"
+        mock_db.query.return_value.join.return_value.filter.return_value.distinct.return_value.all.return_value = [(3,)]
+        order = MagicMock()
+        order.attach_mock(mock_bump, "lock")
+        order.attach_mock(mock_upsert, "write")
+        order.attach_mock(mock_refresh, "totals")
+
+        with patch('services.pageant_service.audit_writer'):
+            self.assertTrue(self.pageant_service.submit_score(7, 1, 100, 90)[0])
+
+        self.assertEqual([c[0] for c in order.mock_calls], ["lock", "write", "totals"])
+        mock_bump.assert_called_once_with(mock_db, 3)
+        print("✅ TEST PASSED: Score write locks the event first.")
+
+    def test_clear_running_totals_only_touches_event(self):
+        """Verify clearing an event's running totals removes its rows and leaves other events alone."""
+        from models.all_models import CriteriaTotal, SegmentTotal
+        from services.running_totals import clear_running_totals
+        engine, TestSession, ids = self._running_totals_db()
+        try:
+            db = TestSession()
+            other = Event(name="Other", event_type="Pageant")
+            db.add(other); db.flush()
+            other_segment = Segment(event_id=other.id, name="Swimwear", percentage_weight=1.0, order_index=1)
+            db.add(other_segment); db.flush()
+            db.add_all([
+                CriteriaTotal(contestant_id=ids["queen"], criteria_id=ids["poise"], segment_id=ids["segment"], score_sum=80, score_count=1, weighted_score=40),
+                SegmentTotal(contestant_id=ids["queen"], segment_id=ids["segment"], event_id=ids["event"], score_sum=80, score_count=1, weighted_score=40),
+                SegmentTotal(contestant_id=ids["queen"], segment_id=other_segment.id, event_id=other.id, score_sum=50, score_count=1, weighted_score=50)
+            ])
+            db.commit()
+
+            clear_running_totals(db, ids["event"])
+            db.commit()
+
+            self.assertEqual(db.query(CriteriaTotal).count(), 0)
+            self.assertEqual([t.event_id for t in db.query(SegmentTotal).all()], [other.id])
+            db.close()
+        finally:
+            engine.dispose()
+        print("✅ TEST PASSED: Running totals cleared for one event.")
+
+    @patch('services.event_poller.read_event_revision', return_value=3)
+    def test_subscribers_survive_a_failed_refresh(self, mock_revision):
+        """
+        Verify a view whose refresh fails once (e.g. a transient DB error) stays subscribed:
+        the hub delivers the next change and the poller retries the revision on its next tick.
+        """
+        hub = EventHub(debounce_ms=10)
+        hub_calls, hub_recovered = [], threading.Event()
+        def on_change():
+            hub_calls.append(1)
+            if len(hub_calls) == 1: raise RuntimeError("Lost connection to MySQL server")
+            hub_recovered.set()
+
+        hub.subscribe((SCORES,), on_change, event_id=1)
+        hub.publish(SCORES, 1)
+        time.sleep(0.2)
+        hub.publish(SCORES, 1)
+        self.assertTrue(hub_recovered.wait(2))
+        self.assertEqual((hub.stats()['subscribers'], hub.stats()['failures']), (1, 1))
+
+        poller = EventPoller(interval_s=0.05)
+        poller.event_service = MagicMock()
+        poller.leaderboard_service = MagicMock()
+        received, poller_recovered = [], threading.Event()
+        def on_snapshot(snapshot):
+            received.append(snapshot['revision'])
+            if len(received) == 1: raise RuntimeError("Lost connection to MySQL server")
+            poller_recovered.set()
+
+        token = poller.subscribe(1, on_snapshot)
+        self.assertTrue(poller_recovered.wait(2))
+        time.sleep(0.2) # Delivered revision: no further retries
+        self.assertEqual(received, [3, 3])
+        self.assertEqual((poller.stats()['subscribers'], poller.stats()['failures']), ({1: 1}, 1))
+        poller.unsubscribe(token)
+        print("✅ TEST PASSED: Subscribers survive a failed refresh.")
+
+    @patch('views.viewer_dashboard.page_tasks')
+    @patch('views.viewer_dashboard.event_poller')
+    @patch('views.viewer_dashboard.SessionLocal')
+    def test_leaderboard_patches_only_changed_cells(self, mock_session, mock_poller, mock_tasks):
+        """
+        Verify the leaderboard sends nothing when the standings are unchanged, and that a
+        changed score updates only that cell (every other cell and row is left as-is).
+        """
+        import flet as ft
+        from views.viewer_dashboard import EventLeaderboardView
+        mock_session.return_value.query.return_value.get.return_value = Event(id=1, name="Gala", event_type="Pageant")
+        page = MagicMock(width=1200)
+        view = EventLeaderboardView(page, 1)
+        on_change = mock_poller.subscribe.call_args.args[1]
+
+        def snapshot(queen_score):
+            return {'standings': {
+                'event_name': "Gala", 'mode_label': "Preliminaries", 'p_headers': ["Gown"], 'f_headers': [], 'show_prelim_total': True,
+                'scores': [
+                    {'id': 1, 'name': "Queen", 'gender': "Female", 'rank': 1, 'segment_scores': [queen_score], 'p_tot': queen_score, 'final_scores': []},
+                    {'id': 2, 'name': "Duchess", 'gender': "Female", 'rank': 2, 'segment_scores': [80.0], 'p_tot': 80.0, 'final_scores': []}
+                ]
+            }}
+
+        def find_table(control):
+            if isinstance(control, ft.DataTable): return control
+            children = getattr(control, 'controls', None) or [getattr(control, 'content', None)]
+            return next((t for t in map(find_table, filter(None, children)) if t), None)
+
+        on_change(snapshot(90.0))
+        table = find_table(view)
+        queen_row, duchess_row = table.rows
+        queen_cells, duchess_cells = list(queen_row.cells), list(duchess_row.cells)
+        queen_texts = [c.content for c in queen_cells]
+        self.assertEqual(page.update.call_count, 1)
+
+        on_change(snapshot(90.0))
+        self.assertEqual(page.update.call_count, 1) # Identical standings: nothing sent
+
+        on_change(snapshot(95.0))
+        self.assertEqual(page.update.call_count, 2)
+        self.assertIs(find_table(view), table) # Patched in place, not rebuilt
+        self.assertEqual(table.rows, [queen_row, duchess_row])
+        self.assertEqual(queen_row.cells, queen_cells) # Same cell controls, patched in place
+        self.assertEqual([c.content for c in queen_row.cells], queen_texts)
+        self.assertEqual([c.content.value for c in queen_row.cells[1:]], ["Queen", "95.0", "95.0%"])
+        self.assertEqual(duchess_row.cells, duchess_cells) # Untouched row keeps its cells
+        print("✅ TEST PASSED: Leaderboard patches only changed cells.")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
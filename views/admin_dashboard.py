@@ -3,6 +3,7 @@ from services.admin_service import AdminService
 from services.event_service import EventService
 from components.dialogs import show_about_dialog, show_contact_dialog
 from views.audit_log_view import AuditLogView
+from views.diagnostics_view import DiagnosticsView
 
 def AdminDashboardView(page: ft.Page, on_logout_callback):
     admin_service = AdminService()
@@ -324,6 +325,19 @@ def AdminDashboardView(page: ft.Page, on_logout_callback):
         main_content_area.controls = [content]
         page.update()
 
+    def load_diagnostics():
+        content = ft.Container(
+            content=DiagnosticsView(page, on_back_click=lambda e: load_welcome_view()),
+            padding=0,
+            bgcolor="white",
+            border_radius=15,
+            shadow=ft.BoxShadow(blur_radius=10, color=ft.Colors.BLACK12),
+            margin=20,
+            expand=True,
+        )
+        main_content_area.controls = [content]
+        page.update()
+
     # --- HOME VIEW ---
     def load_welcome_view():
         # Stats Fetching
@@ -393,7 +407,9 @@ def AdminDashboardView(page: ft.Page, on_logout_callback):
                 menu_card("User Management", "View active judges and staff.", ft.Icons.MANAGE_ACCOUNTS, "#64AEFF", lambda e: load_users_view()),
                 menu_card("Event Management", "Monitor pageants and quizzes.", ft.Icons.EVENT_NOTE, "#FFB74D", lambda e: load_events_view()),
                 menu_card("Security Audit", "View system logs and activity trails.", ft.Icons.SECURITY, "#E57373", lambda e: load_audit_logs()),
-            ], wrap=True, spacing=30, alignment="start")
+            ] + ([
+                menu_card("Diagnostics", "Database load per screen and slow queries.", ft.Icons.SPEED, "#81C784", lambda e: load_diagnostics()),
+            ] if user_role == "Admin" else []), wrap=True, spacing=30, alignment="start")
         ], scroll="adaptive")
 
         main_content_area.controls = [ft.Container(content, padding=40)]
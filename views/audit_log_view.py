@@ -1,12 +1,16 @@
 import flet as ft
 import threading
 import time
+import datetime
 from services.admin_service import AdminService
+from core.event_hub import event_hub, AUDIT, SEGMENTS, EVENTS
+from core.page_tasks import page_tasks
 
 def AuditLogView(page: ft.Page, on_back_click=None):
     admin_service = AdminService()
+    current_admin_id = page.session.get("user_id")
     
-    # State for polling
+    # State for live updates
     is_active = True
     
     # UI Components - Initial Setup
@@ -32,8 +36,97 @@ def AuditLogView(page: ft.Page, on_back_click=None):
     
     last_updated_text = ft.Text("Loading...", size=12, color="grey", italic=True)
 
+    # Paging state: rows on screen span [oldest_id .. newest_id]
+    PAGE_SIZE = 100
+    paging = {'newest_id': None, 'oldest_id': None}
+    paging_lock = threading.Lock() # Live tail (hub thread) vs "Load older" (click)
+    load_more_btn = ft.TextButton("Load older entries", icon=ft.Icons.EXPAND_MORE, visible=False)
+
+    # ---------------------------------------------------------
+    # FILTERS (sent to the database, never applied client-side)
+    # ---------------------------------------------------------
+    filters = {}
+    ALL = "all"
+    action_dd = ft.Dropdown(label="Action", width=190, value=ALL, options=[ft.dropdown.Option(ALL, "All actions")] + [ft.dropdown.Option(a) for a in admin_service.get_audit_actions()])
+    user_dd = ft.Dropdown(label="User", width=190, value=ALL, options=[ft.dropdown.Option(ALL, "All users")] + [ft.dropdown.Option(str(u.id), u.username) for u in admin_service.get_all_users()])
+    event_dd = ft.Dropdown(label="Event", width=190, value=ALL, options=[ft.dropdown.Option(ALL, "All events")] + [ft.dropdown.Option(str(ev.id), ev.name) for ev in admin_service.get_all_events()])
+    since_field = ft.TextField(label="From (YYYY-MM-DD)", width=160)
+    until_field = ft.TextField(label="To (YYYY-MM-DD)", width=160)
+    search_field = ft.TextField(label="Search details", width=220, prefix_icon=ft.Icons.SEARCH)
+
+    def parse_day(field):
+        if not field.value or not field.value.strip(): return None
+        return datetime.datetime.strptime(field.value.strip(), "%Y-%m-%d")
+
+    def apply_filters(e):
+        try:
+            since, until = parse_day(since_field), parse_day(until_field)
+        except ValueError:
+            page.open(ft.SnackBar(ft.Text("Dates must look like 2025-01-31"), bgcolor="red"))
+            return
+        filters.clear()
+        if action_dd.value and action_dd.value != ALL: filters['action'] = action_dd.value
+        if user_dd.value and user_dd.value != ALL: filters['user_id'] = int(user_dd.value)
+        if event_dd.value and event_dd.value != ALL: filters['event_id'] = int(event_dd.value)
+        if since: filters['since'] = since
+        if until: filters['until'] = until + datetime.timedelta(days=1) # Inclusive end day
+        if search_field.value and search_field.value.strip(): filters['search'] = search_field.value.strip()
+        fetch_logs()
+
+    def clear_filters(e):
+        action_dd.value = user_dd.value = event_dd.value = ALL
+        since_field.value = until_field.value = search_field.value = ""
+        apply_filters(e)
+
+    search_field.on_submit = apply_filters
+    filter_bar = ft.Row([
+        action_dd, user_dd, event_dd, since_field, until_field, search_field,
+        ft.ElevatedButton("Apply", icon=ft.Icons.FILTER_ALT, on_click=apply_filters),
+        ft.TextButton("Clear", on_click=clear_filters)
+    ], wrap=True, spacing=10)
+
+    def build_row(log):
+        ts_str = log.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Color code specific actions for text
+        action_color = ft.Colors.BLACK87
+        if "LOGIN" in log.action: action_color = ft.Colors.BLUE_700
+        elif "DELETE" in log.action: action_color = ft.Colors.RED_700
+        elif "SCORE" in log.action: action_color = ft.Colors.GREEN_700
+        elif "CREATE" in log.action: action_color = ft.Colors.PURPLE_700
+
+        # Handle potentially missing user (if deleted)
+        user_display = "Unknown"
+        if log.user:
+            user_display = f"{log.user.username} ({log.user.role})"
+        else:
+            user_display = f"User ID: {log.user_id} (Deleted)"
+
+        # Zebra Striping Logic (by id, so prepending new rows keeps the stripes stable)
+        row_bg_color = "#F9FAFB" if log.id % 2 == 0 else "white"
+
+        return ft.DataRow(
+            color=row_bg_color,
+            cells=[
+                ft.DataCell(ft.Text(str(log.id), size=12)),
+                ft.DataCell(ft.Text(user_display, weight="bold", size=12)),
+                ft.DataCell(ft.Container(
+                    content=ft.Text(log.action, color=action_color, weight="bold", size=11),
+                    padding=ft.padding.symmetric(horizontal=8, vertical=4),
+                    bgcolor=ft.Colors.with_opacity(0.1, action_color),
+                    border_radius=5
+                )),
+                ft.DataCell(ft.Text(log.details, size=12, overflow=ft.TextOverflow.ELLIPSIS)),
+                ft.DataCell(ft.Text(ts_str, size=12, color="grey")),
+            ]
+        )
+
+    def mark_updated():
+        now_str = time.strftime("%H:%M:%S")
+        last_updated_text.value = f"Updated at: {now_str}"
+
     def fetch_logs():
-        """Fetches logs from DB and updates the table rows"""
+        """(Re)loads the newest page of logs"""
         try:
             # --- DYNAMIC WIDTH CALCULATION ---
             # This ensures the table tries to fill the screen width minus padding
@@ -43,67 +136,75 @@ def AuditLogView(page: ft.Page, on_back_click=None):
                 # Ensure it doesn't get too small (min 800px)
                 data_table.width = max(target_width, 800)
             
-            logs = admin_service.get_security_logs()
-            new_rows = []
-            
-            for i, log in enumerate(logs):
-                ts_str = log.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Color code specific actions for text
-                action_color = ft.Colors.BLACK87
-                if "LOGIN" in log.action: action_color = ft.Colors.BLUE_700
-                elif "DELETE" in log.action: action_color = ft.Colors.RED_700
-                elif "SCORE" in log.action: action_color = ft.Colors.GREEN_700
-                elif "CREATE" in log.action: action_color = ft.Colors.PURPLE_700
-
-                # Handle potentially missing user (if deleted)
-                user_display = "Unknown"
-                if log.user:
-                    user_display = f"{log.user.username} ({log.user.role})"
-                else:
-                    user_display = f"User ID: {log.user_id} (Deleted)"
-
-                # Zebra Striping Logic
-                row_bg_color = "#F9FAFB" if i % 2 == 0 else "white"
-
-                new_rows.append(
-                    ft.DataRow(
-                        color=row_bg_color,
-                        cells=[
-                            ft.DataCell(ft.Text(str(log.id), size=12)),
-                            ft.DataCell(ft.Text(user_display, weight="bold", size=12)),
-                            ft.DataCell(ft.Container(
-                                content=ft.Text(log.action, color=action_color, weight="bold", size=11),
-                                padding=ft.padding.symmetric(horizontal=8, vertical=4),
-                                bgcolor=ft.Colors.with_opacity(0.1, action_color),
-                                border_radius=5
-                            )),
-                            ft.DataCell(ft.Text(log.details, size=12, overflow=ft.TextOverflow.ELLIPSIS)),
-                            ft.DataCell(ft.Text(ts_str, size=12, color="grey")),
-                        ]
-                    )
-                )
-            
-            data_table.rows = new_rows
-            now_str = time.strftime("%H:%M:%S")
-            last_updated_text.value = f"Auto-updated at: {now_str}"
+            with paging_lock:
+                logs = admin_service.get_security_logs(limit=PAGE_SIZE, **filters)
+                data_table.rows = [build_row(log) for log in logs]
+                paging['newest_id'] = max((log.id for log in logs), default=None)
+                paging['oldest_id'] = logs[-1].id if logs else None
+                load_more_btn.visible = len(logs) == PAGE_SIZE
+            mark_updated()
             page.update()
         except Exception as e:
             print(f"Error fetching logs: {e}")
 
-    def poll_logs():
-        """Background thread to refresh logs every 3 seconds"""
-        while is_active:
-            fetch_logs()
-            time.sleep(3)
+    def fetch_new_logs():
+        """Prepends only the entries written since the last fetch"""
+        if paging['newest_id'] is None:
+            return fetch_logs()
+        try:
+            with paging_lock:
+                logs = admin_service.get_security_logs(after_id=paging['newest_id'], limit=PAGE_SIZE, **filters)
+                if len(logs) == PAGE_SIZE:
+                    logs = None # Too far behind: start over from the newest page
+                elif logs:
+                    data_table.rows[0:0] = [build_row(log) for log in logs]
+                    paging['newest_id'] = max(paging['newest_id'], max(log.id for log in logs))
+            if logs is None:
+                return fetch_logs()
+            if logs:
+                mark_updated()
+                page.update()
+        except Exception as e:
+            print(f"Error fetching logs: {e}")
 
-    # Start Polling
-    threading.Thread(target=poll_logs, daemon=True).start()
+    def load_older_logs(e):
+        """Appends the next page of older entries"""
+        if paging['oldest_id'] is None: return
+        try:
+            with paging_lock:
+                logs = admin_service.get_security_logs(before_id=paging['oldest_id'], limit=PAGE_SIZE, **filters)
+                data_table.rows.extend(build_row(log) for log in logs)
+                if logs: paging['oldest_id'] = logs[-1].id
+                load_more_btn.visible = len(logs) == PAGE_SIZE
+            page.update()
+        except Exception as e:
+            print(f"Error fetching logs: {e}")
 
-    # Cleanup when leaving
-    def stop_polling(e):
+    load_more_btn.on_click = load_older_logs
+
+    def archive_old_logs(e):
+        """Moves old entries to the compressed archive; they stay visible through paging and filters"""
+        success, msg = admin_service.archive_audit_logs(current_admin_id)
+        page.open(ft.SnackBar(ft.Text(msg if success else f"Error: {msg}"), bgcolor=ft.Colors.GREEN if success else ft.Colors.RED))
+        if success: fetch_logs()
+
+    def on_new_logs():
+        """Runs when audit rows were written (directly or by the background writer)"""
+        if is_active: fetch_new_logs()
+
+    # Config changes (rounds, event status) write their log row in the same transaction
+    def stop_updates():
         nonlocal is_active
         is_active = False
+        event_hub.unsubscribe(subscription)
+
+    subscription = event_hub.subscribe((AUDIT, SEGMENTS, EVENTS), on_new_logs)
+    updates_task = page_tasks.add(page, "audit-log-updates", stop_updates)
+    page_tasks.start(page, "audit-log-initial-load", fetch_logs)
+
+    # Cleanup when leaving
+    def stop_polling(e):
+        page_tasks.cancel(page, updates_task)
         if on_back_click:
             on_back_click(e)
 
@@ -114,7 +215,9 @@ def AuditLogView(page: ft.Page, on_back_click=None):
             ft.Column([
                 ft.Text("Security Audit Logs", size=24, weight="bold", color="#1A1A1A"),
                 last_updated_text
-            ], spacing=2)
+            ], spacing=2),
+            ft.Container(expand=True),
+            ft.OutlinedButton("Archive old entries", icon=ft.Icons.ARCHIVE, on_click=archive_old_logs)
         ],
         vertical_alignment=ft.CrossAxisAlignment.CENTER
     )
@@ -127,6 +230,8 @@ def AuditLogView(page: ft.Page, on_back_click=None):
             controls=[
                 header_row,
                 ft.Divider(height=20, color="transparent"),
+                filter_bar,
+                ft.Divider(height=10, color="transparent"),
                 
                 # The "Card" Container for the Table
                 ft.Container(
@@ -139,7 +244,8 @@ def AuditLogView(page: ft.Page, on_back_click=None):
                                 vertical_alignment=ft.CrossAxisAlignment.START,
                                 # Ensure the Row fills width if table is smaller
                                 alignment=ft.MainAxisAlignment.START 
-                            )
+                            ),
+                            ft.Row([load_more_btn], alignment=ft.MainAxisAlignment.CENTER)
                         ], 
                         # Enable Vertical Scroll for the Column
                         scroll=ft.ScrollMode.ADAPTIVE, 
@@ -892,10 +892,13 @@ def PageantConfigView(page: ft.Page, event_id: int):
         db = SessionLocal()
         segments = db.query(Segment).filter(Segment.event_id == event_id).order_by(Segment.order_index).all()
         db.close()
+        
+        # One bulk fetch feeds the OVERALL tab and every segment tab
+        score_matrix = pageant_service.get_score_matrix(event_id)
 
         def build_matrix(seg_id):
             if seg_id is None: # Overall
-                data = pageant_service.get_overall_breakdown(event_id)
+                data = pageant_service.get_overall_breakdown(event_id, matrix=score_matrix)
                 cols = ["Rank", "#", "Name"] + data['segments'] + ["Total"]
                 rows = []
                 for gender in ['Male', 'Female']:
@@ -917,7 +920,7 @@ def PageantConfigView(page: ft.Page, event_id: int):
                         cells.append(ft.DataCell(ft.Text(str(r['total']), weight="bold", color="#64AEFF")))
                         rows.append(ft.DataRow(cells, color=row_color))
             else: # Segment
-                data = pageant_service.get_segment_tabulation(event_id, seg_id)
+                data = pageant_service.get_segment_tabulation(event_id, seg_id, matrix=score_matrix)
                 cols = ["Rank", "#", "Name"] + data['judges'] + ["Average"]
                 rows = []
                 for gender in ['Male', 'Female']:
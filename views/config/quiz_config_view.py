@@ -6,6 +6,9 @@ from services.contestant_service import ContestantService
 from services.admin_service import AdminService
 from services.event_service import EventService
 from core.database import SessionLocal
+from core.event_hub import event_hub, SCORES, SEGMENTS, CONTESTANTS
+from services.event_revisions import bump_event_revision
+from core.page_tasks import page_tasks
 from models.all_models import Segment, Contestant, User, Score, Event
 from sqlalchemy import func
 from components.dialogs import show_about_dialog, show_contact_dialog
@@ -31,7 +34,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
 
     editing_round_id = None 
     editing_contestant_id = None 
-    is_polling = False
+    live_subscription = None
     
     # Global component references
     eval_btn_ref = ft.Ref[ft.ElevatedButton]()
@@ -348,6 +351,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
         is_ready_to_advance = False
         completion_status = quiz_service.check_scoring_completion(event_id, active_seg, participants, total_qs_in_round)
         unsubmitted_count = len(completion_status['unsubmitted'])
+        outstanding_qs = completion_status['outstanding_questions']
         
         if active_seg and active_seg.qualifier_limit > 0 and unsubmitted_count == 0 and total_qs_in_round > 0:
             is_ready_to_advance = True
@@ -357,8 +361,9 @@ def QuizConfigView(page: ft.Page, event_id: int):
             warning_msg = ft.Container(
                 content=ft.Row([
                     ft.Icon(ft.Icons.WARNING, color="white"),
-                    ft.Text(f"{unsubmitted_count} team(s) incomplete. Cannot evaluate.", size=14, color="white", weight="bold")
-                ], alignment="center"),
+                    ft.Text(f"{unsubmitted_count} team(s) incomplete. Cannot evaluate.", size=14, color="white", weight="bold"),
+                    ft.Text(f"Outstanding: {', '.join(f'Q{q}' for q in outstanding_qs)}", size=12, color="white", visible=bool(outstanding_qs))
+                ], alignment="center", wrap=True),
                 bgcolor=ft.Colors.RED_400, padding=10, border_radius=5, visible=True
             )
             
@@ -366,6 +371,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
         rows = []
         limit = active_seg.qualifier_limit if active_seg else 0
         max_possible_score = total_qs_in_round * active_seg.points_per_question if active_seg else 100
+        participants_by_id = {p['id']: p for p in participants}
         
         for i, res in enumerate(results):
             rank = i+1
@@ -375,7 +381,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
             current_score = res['total_score']
             
             # Calculate actual completion ratio from participant data
-            p_info = next((p for p in participants if p['id'] == res['contestant_id']), None)
+            p_info = participants_by_id.get(res['contestant_id'])
             
             if p_info and total_qs_in_round > 0:
                 completion_ratio = min(p_info.get('progress_count', 0) / total_qs_in_round, 1.0)
@@ -480,7 +486,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
 
     def add_clincher_question(seg_id):
         db = SessionLocal(); seg = db.query(Segment).get(seg_id)
-        if seg: seg.total_questions += 1; db.commit(); page.open(ft.SnackBar(ft.Text("Question Added!"), bgcolor="green")); refresh_tabulation_tab()
+        if seg: seg.total_questions += 1; bump_event_revision(db, event_id); db.commit(); event_hub.publish(SEGMENTS, event_id); page.open(ft.SnackBar(ft.Text("Question Added!"), bgcolor="green")); refresh_tabulation_tab()
         db.close()
 
     def evaluate_round(is_ready):
@@ -517,7 +523,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
 
         if not is_final_chain:
             if len(results) < limit: 
-                show_advance_dialog(results, active_seg.id, is_event_end=False)
+                show_advance_dialog(results, active_seg.id, is_event_end=False, scores=results)
                 return
             last_in_score = results[limit-1]['total_score']
             first_out_score = results[limit]['total_score']
@@ -531,13 +537,13 @@ def QuizConfigView(page: ft.Page, event_id: int):
                     page.close(dlg)
                     clean_ids = [r['contestant_id'] for r in clean_winners]
                     if clean_ids:
-                        perform_advance(active_seg.id, clean_ids)
+                        perform_advance(active_seg.id, clean_ids, scores=results)
                     trigger_clincher_round(active_seg, tied, "Cutoff", spots_remaining)
                 
                 dlg = ft.AlertDialog(title=ft.Text("Tie at Cutoff!"), content=ft.Column([ft.Text(f"We need Top {limit}, but there is a tie for the last spots."), ft.Text(f"Qualified (Clean): {len(clean_winners)}"), ft.Text(f"Fighting for: {spots_remaining} spot(s)"), ft.Text(f"Candidates Tied: {len(tied)}")], tight=True), actions=[ft.ElevatedButton("Create Cutoff Clincher", bgcolor="orange", color="white", on_click=execute_tie_break)])
                 page.open(dlg)
             else:
-                show_advance_dialog(results[:limit], active_seg.id, is_event_end=False)
+                show_advance_dialog(results[:limit], active_seg.id, is_event_end=False, scores=results)
             return
 
         ties_found = [] 
@@ -572,7 +578,7 @@ def QuizConfigView(page: ft.Page, event_id: int):
             dlg = ft.AlertDialog(title=ft.Row([ft.Icon(ft.Icons.WARNING, color="red"), ft.Text("Ties Detected!")]), content=ft.Column([ft.Text(f"Sudden Death / Tie Breaker Required."), ft.Divider(), ft.Column(tie_controls, spacing=10, scroll="auto", height=200)], tight=True, width=500), actions=[ft.TextButton("Cancel", on_click=lambda e: page.close(dlg))])
             page.open(dlg)
         else:
-            show_advance_dialog(results[:limit], active_seg.id, is_event_end=is_final_chain)
+            show_advance_dialog(results[:limit], active_seg.id, is_event_end=is_final_chain, scores=results)
 
     def end_event():
         event_service.set_active_segment(event_id, None)
@@ -581,14 +587,14 @@ def QuizConfigView(page: ft.Page, event_id: int):
         time.sleep(1)
         page.go(f"/leaderboard/{event_id}")
 
-    def show_advance_dialog(qualifiers, seg_id, is_event_end=False):
+    def show_advance_dialog(qualifiers, seg_id, is_event_end=False, scores=None):
         
         def on_confirm(e):
             page.close(adv_dlg)
             if is_event_end:
                 end_event()
             else:
-                perform_advance(seg_id, [q['contestant_id'] for q in qualifiers])
+                perform_advance(seg_id, [q['contestant_id'] for q in qualifiers], scores=scores)
 
         btn_text = "End Event & Leaderboard" if is_event_end else "Advance/Finalize"
         btn_col = "purple" if is_event_end else "green"
@@ -611,7 +617,9 @@ def QuizConfigView(page: ft.Page, event_id: int):
         if success:
             for p_id in tied_ids:
                 db.add(Score(contestant_id=p_id, segment_id=clincher_id, judge_id=current_admin_id, question_number=1, score_value=0, is_correct=False)) 
+            bump_event_revision(db, event_id)
             db.commit()
+            event_hub.publish(SCORES, event_id)
             
             event_service.set_active_segment(event_id, clincher_id)
             page.open(ft.SnackBar(ft.Text(f"Clincher Created: {new_name}"), bgcolor="orange"))
@@ -619,18 +627,16 @@ def QuizConfigView(page: ft.Page, event_id: int):
         
         db.close()
 
-    def perform_advance(current_round_id, qual_ids):
-        success, msg = quiz_service.advance_to_next_round(current_admin_id, event_id, current_round_id, qual_ids)
+    def perform_advance(current_round_id, qual_ids, scores=None):
+        # scores: the live results the qualifiers were picked from (reused, not re-queried)
+        success, msg = quiz_service.advance_to_next_round(current_admin_id, event_id, current_round_id, qual_ids, scores=scores)
         if success: page.open(ft.SnackBar(ft.Text(msg), bgcolor="green")); refresh_tabulation_tab()
         else: page.open(ft.SnackBar(ft.Text(msg), bgcolor="red"))
 
-    # --- AUTO REFRESH ---
-    def poll_updates():
-        while is_polling:
-            if page: 
-                try: refresh_tabulation_tab()
-                except: break
-            time.sleep(3)
+    # --- AUTO REFRESH (only while Mission Control is open, only on changes to this event) ---
+    def on_live_change():
+        if live_subscription and page:
+            refresh_tabulation_tab()
 
     main_tabs = ft.Tabs(
         tabs=[
@@ -645,11 +651,14 @@ def QuizConfigView(page: ft.Page, event_id: int):
         unselected_label_color="grey"
     )
     def load_tab(idx):
-        nonlocal is_polling
-        is_polling = (idx == 2)
-        if is_polling: 
-            if not any(t.daemon and t.is_alive() for t in threading.enumerate() if t.name == "QuizPoll"):
-                 threading.Thread(target=poll_updates, daemon=True, name="QuizPoll").start()
+        nonlocal live_subscription
+        if idx != 2 and live_subscription:
+            page_tasks.cancel(page, live_subscription); live_subscription = None
+
+        if idx == 2:
+            if not live_subscription:
+                token = event_hub.subscribe((SCORES, SEGMENTS, CONTESTANTS), on_live_change, event_id=event_id)
+                live_subscription = page_tasks.add(page, "mission-control-updates", lambda: event_hub.unsubscribe(token))
             refresh_tabulation_tab()
         elif idx==0: refresh_config_tab()
         elif idx==1: refresh_c_tab()
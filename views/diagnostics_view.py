@@ -0,0 +1,122 @@
+import flet as ft
+import time
+from core.database import pool_metrics
+from core.sql_metrics import sql_metrics
+from core.page_tasks import page_tasks
+
+def DiagnosticsView(page: ft.Page, on_back_click=None):
+    """Admin-only: which screens and service methods hit the database, and how hard."""
+    last_updated_text = ft.Text("Loading...", size=12, color="grey", italic=True)
+    pool_row = ft.Row(wrap=True, spacing=15)
+
+    def make_table(first_column):
+        return ft.DataTable(
+            columns=[ft.DataColumn(ft.Text(first_column, color="white", weight="bold"))] + [
+                ft.DataColumn(ft.Text(title, color="white", weight="bold"), numeric=True)
+                for title in ("Calls", "Queries", "Queries/Call", "Total ms", "p50", "p95", "p99", "Max")
+            ],
+            rows=[],
+            heading_row_color="#64AEFF",
+            heading_row_height=45,
+            column_spacing=20,
+            horizontal_lines=ft.border.BorderSide(1, "#F0F0F0"),
+            border_radius=10,
+        )
+
+    routes_table = make_table("Route")
+    scopes_table = make_table("Service Method")
+    slow_table = ft.DataTable(
+        columns=[ft.DataColumn(ft.Text(title, color="white", weight="bold")) for title in ("Time", "ms", "Where", "Statement / Parameters")],
+        rows=[],
+        heading_row_color="#E57373",
+        heading_row_height=45,
+        data_row_max_height=80,
+        column_spacing=20,
+        horizontal_lines=ft.border.BorderSide(1, "#F0F0F0"),
+        border_radius=10,
+    )
+
+    def timing_row(name, t):
+        cells = [name, t["calls"], t["statements"], t["statements_per_call"] if t["statements_per_call"] is not None else "-",
+                 t["total_ms"], t["p50_ms"], t["p95_ms"], t["p99_ms"], t["max_ms"]]
+        return ft.DataRow(cells=[ft.DataCell(ft.Text(str(v), size=12, weight="bold" if i == 0 else None)) for i, v in enumerate(cells)])
+
+    def stat_chip(title, value):
+        return ft.Container(
+            content=ft.Column([ft.Text(title, color="grey", size=11), ft.Text(str(value), weight="bold", size=18)], spacing=0),
+            padding=12, bgcolor="white", border_radius=10, border=ft.border.all(1, "#E0E0E0"), width=150
+        )
+
+    def refresh(e=None):
+        stats = sql_metrics.stats()
+        pool = pool_metrics.stats()
+        pool_row.controls = [
+            stat_chip("Connections in use", pool["checked_out"]),
+            stat_chip("Overflow in use", pool["overflow_in_use"]),
+            stat_chip("Avg wait (ms)", pool["wait_avg_ms"]),
+            stat_chip("Max wait (ms)", pool["wait_max_ms"]),
+            stat_chip("Checkout failures", pool["failures"]),
+        ]
+        routes_table.rows = [timing_row(name, t) for name, t in stats["routes"].items()]
+        scopes_table.rows = [timing_row(name, t) for name, t in list(stats["scopes"].items())[:30]]
+        slow_table.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(q["at"][11:], size=12)),
+                ft.DataCell(ft.Text(str(q["ms"]), size=12, color="red", weight="bold")),
+                ft.DataCell(ft.Text(f"{q['scope']}\n{q['route']}", size=11)),
+                ft.DataCell(ft.Text(f"{q['statement'][:300]}\n{q['parameters'][:150]}", size=11, selectable=True)),
+            ])
+            for q in stats["slow_queries"][:20]
+        ]
+        last_updated_text.value = f"Since {stats['since'].replace('T', ' ')} • Updated at: {time.strftime('%H:%M:%S')} • Slow query threshold: {stats['slow_query_ms']:.0f} ms"
+        page.update()
+
+    def reset(e):
+        sql_metrics.reset()
+        refresh()
+
+    def export(e):
+        try:
+            path = sql_metrics.dump_json()
+            page.open(ft.SnackBar(ft.Text(f"Saved to {path}"), bgcolor=ft.Colors.GREEN))
+        except Exception as ex:
+            page.open(ft.SnackBar(ft.Text(f"Error: {ex}"), bgcolor=ft.Colors.RED))
+
+    def section(title, table):
+        return ft.Column([
+            ft.Text(title, size=18, weight="bold"),
+            ft.Row([table], scroll=ft.ScrollMode.ADAPTIVE)
+        ], spacing=10)
+
+    header_row = ft.Row(
+        controls=[
+            ft.IconButton(icon=ft.Icons.ARROW_BACK, icon_size=30, on_click=on_back_click),
+            ft.Column([
+                ft.Text("Database Diagnostics", size=24, weight="bold", color="#1A1A1A"),
+                last_updated_text
+            ], spacing=2),
+            ft.Container(expand=True),
+            ft.IconButton(icon=ft.Icons.REFRESH, tooltip="Refresh", on_click=refresh),
+            ft.OutlinedButton("Reset", icon=ft.Icons.RESTART_ALT, on_click=reset),
+            ft.ElevatedButton("Export JSON", icon=ft.Icons.DOWNLOAD, on_click=export),
+        ],
+        vertical_alignment=ft.CrossAxisAlignment.CENTER
+    )
+
+    body = ft.Column(
+        controls=[
+            header_row,
+            ft.Divider(height=20, color="transparent"),
+            pool_row,
+            ft.Divider(height=10, color="transparent"),
+            section("By Screen / Route", routes_table),
+            section("By Service Method (top 30 by total time)", scopes_table),
+            section("Slow Queries", slow_table),
+        ],
+        scroll=ft.ScrollMode.ADAPTIVE,
+        expand=True,
+        spacing=15
+    )
+    page_tasks.start(page, "diagnostics-initial-load", refresh)
+
+    return ft.Container(padding=40, expand=True, content=body)
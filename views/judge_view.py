@@ -2,6 +2,9 @@ import flet as ft
 from services.pageant_service import PageantService
 from services.contestant_service import ContestantService
 from services.event_service import EventService
+from services.event_poller import event_poller
+from core.page_tasks import page_tasks
+from core.database import in_unit_of_work
 import time, threading
 from datetime import datetime
 # IMPORT SHARED DIALOGS
@@ -20,7 +23,7 @@ def JudgeView(page: ft.Page, on_logout_callback):
     # We store the generated UI cards here so they persist when switching tabs
     cached_cards_ui = {'Male': [], 'Female': []} 
 
-    is_polling = False; last_check_text = ft.Text("Initializing...", size=12, color="grey")
+    segment_subscription = None; last_check_text = ft.Text("Initializing...", size=12, color="grey")
     main_container = ft.Container(expand=True, padding=10,
                                                   gradient=ft.LinearGradient(
                     begin=ft.alignment.top_left,
@@ -29,27 +32,29 @@ def JudgeView(page: ft.Page, on_logout_callback):
                 ))
 
     # ---------------------------------------------------------
-    # POLLING
+    # LIVE UPDATES (shared event poller: one active-segment read per change for all judges)
     # ---------------------------------------------------------
     def start_polling():
-        nonlocal is_polling; 
-        if is_polling: return 
-        is_polling = True; threading.Thread(target=poll_active_segment, daemon=True).start()
-    def stop_polling(): nonlocal is_polling; is_polling = False
-    def poll_active_segment():
-        while is_polling and current_event:
-            try:
-                active_seg_db = pageant_service.get_active_segment(current_event.id)
-                try: new_seg_id = active_seg_db.id if active_seg_db else None
-                except: new_seg_id = None
-                current_seg_id = selected_segment['segment'].id if selected_segment else None
-                if last_check_text.page:
-                    now = datetime.now().strftime("%H:%M:%S"); last_check_text.value = f"Last checked: {now}"; last_check_text.update()
-                if new_seg_id != current_seg_id:
-                    if page.dialog and page.dialog.open: page.close(page.dialog)
-                    enter_scoring_dashboard(current_event)
-            except: pass
-            time.sleep(2)
+        nonlocal segment_subscription
+        if segment_subscription or not current_event: return
+        token = event_poller.subscribe(current_event.id, check_active_segment)
+        segment_subscription = page_tasks.add(page, "judge-segment-updates", lambda: event_poller.unsubscribe(token))
+    def stop_polling():
+        nonlocal segment_subscription
+        if segment_subscription: page_tasks.cancel(page, segment_subscription); segment_subscription = None
+    def check_active_segment(snapshot):
+        if not current_event or snapshot['event_id'] != current_event.id: return
+        try:
+            active_seg_db = snapshot['active_segment']
+            try: new_seg_id = active_seg_db.id if active_seg_db else None
+            except: new_seg_id = None
+            current_seg_id = selected_segment['segment'].id if selected_segment else None
+            if last_check_text.page:
+                now = datetime.now().strftime("%H:%M:%S"); last_check_text.value = f"Last update: {now}"; last_check_text.update()
+            if new_seg_id != current_seg_id:
+                if page.dialog and page.dialog.open: page.close(page.dialog)
+                enter_scoring_dashboard(current_event)
+        except: pass
 
     # ---------------------------------------------------------
     # IMAGE POPUP LOGIC (NEW)
@@ -133,7 +138,7 @@ def JudgeView(page: ft.Page, on_logout_callback):
                 ft.TextButton("Contact", style=ft.ButtonStyle(color=ft.Colors.WHITE), on_click=lambda e: show_contact_dialog(page)),
                 ft.VerticalDivider(width=10, color="white24"),
                 submit_all_btn,
-                ft.IconButton(icon=ft.Icons.LOGOUT, icon_color="white", on_click=on_logout_callback)
+                ft.IconButton(icon=ft.Icons.LOGOUT, icon_color="white", on_click=lambda e: (stop_polling(), on_logout_callback(e)))
             ])
         ], alignment="spaceBetween"),
         padding=15, bgcolor=ft.Colors.BLUE_800
@@ -152,6 +157,7 @@ def JudgeView(page: ft.Page, on_logout_callback):
         for e in events: grid.controls.append(ft.Container(bgcolor="white", border_radius=15, padding=20, shadow=ft.BoxShadow(blur_radius=10, color="grey"), content=ft.Column([ft.Icon(ft.Icons.STAR_ROUNDED, size=50, color="orange"), ft.Text(e.name, weight="bold", size=18, text_align="center"), ft.Text(f"Status: {e.status}", color="green"), ft.ElevatedButton("Start Judging", on_click=lambda x, ev=e: enter_scoring_dashboard(ev))], alignment="center", horizontal_alignment="center"), on_click=lambda x, ev=e: enter_scoring_dashboard(ev)))
         main_container.content = ft.Column([ft.Text("Select Active Event", size=24, weight="bold"), ft.Divider(), grid], expand=True); page.update()
 
+    @in_unit_of_work # One session (one pooled connection) for the whole screen load
     def enter_scoring_dashboard(event):
         nonlocal current_event, selected_segment; current_event = event
         if not event_service.is_judge_assigned(judge_id, event.id): page.open(ft.SnackBar(ft.Text("Access Denied"), bgcolor="red")); return
@@ -204,13 +210,18 @@ def JudgeView(page: ft.Page, on_logout_callback):
                 nonlocal is_locked; btn = e.control
                 if not is_locked:
                     btn.content = ft.ProgressRing(width=16, height=16, stroke_width=2, color="white"); btn.disabled = True; page.update(); valid = True
+                    card_scores = {}
                     for crit_id, ref in local_inputs.items():
                         val_str = ref['field'].value; 
                         if not val_str: valid=False; ref['field'].border_color="red"; continue
                         try: val = float(val_str); 
                         except: valid=False; ref['field'].border_color="red"; continue
                         if val < 0 or val > ref['max']: valid=False; ref['field'].border_color="red"
-                        else: ref['field'].border_color="green"; pageant_service.submit_score(judge_id, contestant.id, crit_id, val)
+                        else: ref['field'].border_color="green"; card_scores[crit_id] = val
+                    # Save the whole card in one round-trip
+                    if card_scores:
+                        saved, _ = pageant_service.submit_scores_batch(judge_id, contestant.id, card_scores)
+                        if not saved: valid = False
                     btn.disabled = False
                     if valid: 
                         is_locked = True; btn.bgcolor = ft.Colors.ORANGE; btn.content = ft.Row([ft.Icon(ft.Icons.LOCK, color="white", size=16), ft.Text("Unlock", color="white")], alignment="center")
@@ -4,7 +4,10 @@ import time
 from services.quiz_service import QuizService
 from services.event_service import EventService
 from services.contestant_service import ContestantService
-from core.database import SessionLocal
+from core.database import SessionLocal, in_unit_of_work
+from core.event_hub import event_hub, EVENTS, SEGMENTS, CONTESTANTS
+from services.event_revisions import read_event_revision
+from core.page_tasks import page_tasks
 from models.all_models import Contestant, Segment, Score, Event
 from components.dialogs import show_about_dialog, show_contact_dialog
 
@@ -25,6 +28,7 @@ def TabulatorView(page: ft.Page, on_logout_callback):
     # State tracking for Auto-Refresh
     last_round_id = None
     last_question_count = 0
+    last_revision = None # Event revision the scoring screen was built from
     is_polling = True
     
     # Track available events to prevent UI flicker
@@ -46,11 +50,12 @@ def TabulatorView(page: ft.Page, on_logout_callback):
     # 1. LOGIC: EVENT SWITCHING
     # ---------------------------------------------------------
     def switch_event_click(e):
-        nonlocal current_event, active_round, assigned_contestant, last_round_id, cached_available_event_ids
+        nonlocal current_event, active_round, assigned_contestant, last_round_id, last_revision, cached_available_event_ids
         current_event = None
         active_round = None
         assigned_contestant = None
         last_round_id = None
+        last_revision = None
         
         # FIX: Reset the cache so the menu knows it needs to re-render
         cached_available_event_ids = set() 
@@ -93,16 +98,21 @@ def TabulatorView(page: ft.Page, on_logout_callback):
         bgcolor=ft.Colors.BLUE_800
     )
 
-    def stop_and_logout(e):
+    def stop_updates():
         nonlocal is_polling
         is_polling = False
+        event_hub.unsubscribe(subscription)
+
+    def stop_and_logout(e):
+        page_tasks.cancel(page, updates_task)
         on_logout_callback(e)
 
     # ---------------------------------------------------------
     # 3. DATA LOADING & POLLING
     # ---------------------------------------------------------
+    @in_unit_of_work # Revision check, round and assignment reads share one session
     def load_dashboard():
-        nonlocal current_event, active_round, assigned_contestant, last_round_id, last_question_count, cached_available_event_ids
+        nonlocal current_event, active_round, assigned_contestant, last_round_id, last_question_count, last_revision, cached_available_event_ids
         
         # --- MODE A: NO EVENT SELECTED (Show Menu) ---
         if not current_event:
@@ -145,6 +155,12 @@ def TabulatorView(page: ft.Page, on_logout_callback):
             return
 
         # --- MODE B: EVENT SELECTED (Show Scoring) ---
+
+        # 0. Nothing in this event changed (e.g. another event's round moved): skip the reload
+        revision = read_event_revision(current_event.id)
+        if revision == last_revision:
+            return
+        last_revision = revision
         
         # 1. Check Active Round
         active_round = event_service.get_active_segment(current_event.id)
@@ -180,22 +196,22 @@ def TabulatorView(page: ft.Page, on_logout_callback):
             last_round_id = active_round.id
             last_question_count = active_round.total_questions
 
-    def poll_updates():
-        while is_polling:
-            if page:
-                try:
-                    load_dashboard()
-                except Exception as e: 
-                    print(f"Polling error: {e}")
-            time.sleep(2)
+    def on_change():
+        # Event list, active round and assignments only change through these topics
+        if is_polling and page:
+            try:
+                load_dashboard()
+            except Exception as e: 
+                print(f"Refresh error: {e}")
 
     # ---------------------------------------------------------
     # 4. UI RENDERERS
     # ---------------------------------------------------------
     def render_event_selector(events):
         def select_event(e):
-            nonlocal current_event
+            nonlocal current_event, last_revision
             current_event = e.control.data
+            last_revision = None
             # Centered loading screen
             main_container.content = ft.Column(
                 controls=[
@@ -305,15 +321,15 @@ def TabulatorView(page: ft.Page, on_logout_callback):
     def save_all_scores(e):
         if not answers_cache: page.open(ft.SnackBar(ft.Text("No answers marked yet."), bgcolor="orange")); return
         e.control.text = "Saving..."; e.control.disabled = True; page.update()
-        errors = 0
-        for q_num, is_correct in answers_cache.items():
-            success, msg = quiz_service.submit_answer(tabulator_id, assigned_contestant.id, active_round.id, q_num, is_correct)
-            if not success: errors += 1
-        if errors > 0: page.open(ft.SnackBar(ft.Text(f"Saved with {errors} errors."), bgcolor="red"))
-        else: page.open(ft.SnackBar(ft.Text("All scores saved successfully!"), bgcolor="green"))
+        # Whole sheet in one transaction (all or nothing)
+        success, result = quiz_service.submit_answers_batch(tabulator_id, assigned_contestant.id, active_round.id, dict(answers_cache))
+        if not success: page.open(ft.SnackBar(ft.Text(f"Save failed: {result}"), bgcolor="red"))
+        else: page.open(ft.SnackBar(ft.Text(f"All scores saved successfully! ({len(result)} answers)"), bgcolor="green"))
         e.control.text = "Save & Submit Answers"; e.control.disabled = False; page.update()
 
-    # Initial Load & Start Polling
-    threading.Thread(target=poll_updates, daemon=True).start()
+    # Initial Load & Live Updates
+    subscription = event_hub.subscribe((EVENTS, SEGMENTS, CONTESTANTS), on_change)
+    updates_task = page_tasks.add(page, "tabulator-updates", stop_updates)
+    page_tasks.start(page, "tabulator-initial-load", on_change)
 
     return ft.Column([header, main_container], expand=True)
\ No newline at end of file
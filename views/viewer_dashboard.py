@@ -1,12 +1,9 @@
 import flet as ft
-import threading
-import time
-# IMPORT BOTH SERVICES
-from services.quiz_service import QuizService
-from services.pageant_service import PageantService
+from services.leaderboard_service import LeaderboardService
+from services.event_poller import event_poller
+from core.page_tasks import page_tasks
 from core.database import SessionLocal
-from models.all_models import Event, Segment, Score, Contestant, Criteria
-from sqlalchemy import func
+from models.all_models import Event
 
 # ---------------------------------------------------------
 # VIEW 1: EVENT GALLERY (List of All Events)
@@ -107,8 +104,7 @@ def EventListView(page: ft.Page):
 # ---------------------------------------------------------
 def EventLeaderboardView(page: ft.Page, event_id: int):
     # Services
-    quiz_service = QuizService()
-    pageant_service = PageantService()
+    leaderboard_service = LeaderboardService()
 
     # State
     is_active = True
@@ -131,183 +127,20 @@ def EventLeaderboardView(page: ft.Page, event_id: int):
         horizontal_alignment=ft.CrossAxisAlignment.CENTER
     )
 
-    def get_data():
-        db = SessionLocal()
-        event = db.query(Event).get(event_id)
-        if event:
-            title_text.value = event.name
-        
-        scores = []
-        mode_label = "LIVE RESULTS"
-        
-        # Headers containers
-        p_headers = [] # Prelim headers (Revealed)
-        f_headers = [] # Final headers (Revealed)
-        
-        # Flags
-        show_prelim_total = False
-
-        # -------------------------------------------------------------
-        # SHARED SEGMENT PROCESSING (For both Quiz & Pageant)
-        # -------------------------------------------------------------
-        # 1. Fetch Segments
-        all_segments = db.query(Segment).filter(Segment.event_id == event_id).order_by(Segment.order_index).all()
-        
-        prelim_segs = []
-        final_segs = []
-        seg_map = {s.id: s for s in all_segments}
-        
-        for seg in all_segments:
-            is_final = seg.is_final
-            if not is_final and seg.related_segment_id:
-                parent = seg_map.get(seg.related_segment_id)
-                if parent and parent.is_final: is_final = True
-            
-            if is_final: final_segs.append(seg)
-            else: prelim_segs.append(seg)
-        
-        # Determine Headers based on Visibility
-        if event_type == "QuizBee":
-            # AUTO-SHOW ALL FOR QUIZ BEE
-            revealed_prelims = prelim_segs
-            revealed_finals = final_segs
-        else:
-            # Respect Admin Toggle for Pageants
-            revealed_prelims = [s for s in prelim_segs if s.is_revealed]
-            revealed_finals = [s for s in final_segs if s.is_revealed]
-        
-        p_headers = [s.name for s in revealed_prelims]
-        f_headers = [s.name for s in revealed_finals]
-        
-        # Logic: Show Prelim Total ONLY if ALL prelim segments are revealed
-        # For Quiz Bee, this is effectively always True if there are prelims
-        if prelim_segs:
-            show_prelim_total = (len(revealed_prelims) == len(prelim_segs))
-        else:
-            show_prelim_total = False
-
-        # Ranking Mode: If ANY final round is shown, rank by Final Score.
-        rank_by_final = (len(revealed_finals) > 0)
-
-        # =================================================================
-        # QUIZ BEE LOGIC
-        # =================================================================
-        if event_type == "QuizBee":
-            contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
-            for c in contestants:
-                prelim_total = 0; final_total = 0
-                p_breakdown = []; f_breakdown = []
-                
-                # Sum Prelims (Calculate ALL, but only store Revealed for breakdown)
-                for seg in prelim_segs:
-                    val = db.query(func.sum(Score.score_value)).filter(Score.contestant_id==c.id, Score.segment_id==seg.id).scalar() or 0
-                    prelim_total += val
-                    # For Quiz Bee, we decided all are revealed, so always append
-                    p_breakdown.append(int(val))
-                
-                # Sum Finals
-                for seg in final_segs:
-                    val = db.query(func.sum(Score.score_value)).filter(Score.contestant_id==c.id, Score.segment_id==seg.id).scalar() or 0
-                    final_total += val
-                    f_breakdown.append(int(val))
-                
-                dname = c.name + (" (Eliminated)" if c.status == "Eliminated" else "")
-                scores.append({
-                    "name": dname,
-                    "p_bd": p_breakdown, 
-                    "f_bd": f_breakdown,
-                    "p_tot": int(prelim_total), 
-                    "f_tot": int(final_total),
-                    "status": c.status
-                })
-            
-            # Sort with Tie-Breaker
-            if rank_by_final: 
-                # Sort by Final, then Prelim (Tie-breaker)
-                scores.sort(key=lambda x: (x['f_tot'], x['p_tot']), reverse=True)
-            else: 
-                scores.sort(key=lambda x: x['p_tot'], reverse=True)
-
-        # =================================================================
-        # PAGEANT LOGIC
-        # =================================================================
-        else:
-            mode_label = "OFFICIAL RANKINGS"
-            
-            # Calculate Scores
-            contestants = db.query(Contestant).filter(Contestant.event_id == event_id).all()
-            
-            for c in contestants:
-                prelim_row_scores = []
-                final_row_scores = []
-                
-                prelim_weighted_total = 0.0
-                final_weighted_total = 0.0
-                
-                # --- CALCULATE PRELIMS ---
-                for seg in prelim_segs:
-                    # Calculate segment score (Raw)
-                    criterias = db.query(Criteria).filter(Criteria.segment_id == seg.id).all()
-                    seg_raw_score = 0.0
-                    for crit in criterias:
-                        avg_val = db.query(func.avg(Score.score_value)).filter(Score.contestant_id == c.id, Score.criteria_id == crit.id).scalar() or 0.0
-                        seg_raw_score += (avg_val * crit.weight)
-                    
-                    # Accumulate Weighted Total (Score * Percentage Weight)
-                    # e.g. Score 90 * 0.40 = 36.0
-                    prelim_weighted_total += (seg_raw_score * seg.percentage_weight)
-                    
-                    if seg.is_revealed:
-                        prelim_row_scores.append(round(seg_raw_score, 2))
-
-                # --- CALCULATE FINALS ---
-                for seg in final_segs:
-                    criterias = db.query(Criteria).filter(Criteria.segment_id == seg.id).all()
-                    seg_raw_score = 0.0
-                    for crit in criterias:
-                        avg_val = db.query(func.avg(Score.score_value)).filter(Score.contestant_id == c.id, Score.criteria_id == crit.id).scalar() or 0.0
-                        seg_raw_score += (avg_val * crit.weight)
-                    
-                    final_weighted_total += seg_raw_score
-                    
-                    if seg.is_revealed:
-                        final_row_scores.append(round(seg_raw_score, 2))
-
-                # --- FIX: CORRECT PERCENTAGE CALCULATION ---
-                # Removed the extra division/multiplication. The weighted total is already the 0-100 representation.
-                prelim_percent = round(prelim_weighted_total, 2)
-                final_percent = round(final_weighted_total, 2) 
-
-                scores.append({
-                    "name": c.name,
-                    "gender": c.gender,
-                    "segment_scores": prelim_row_scores,
-                    "final_scores": final_row_scores,
-                    "p_tot": prelim_percent,
-                    "f_tot": final_percent
-                })
-            
-            # Sort with Tie-Breaker
-            if rank_by_final: 
-                # Sort by Final Score first, break ties with Prelim Score
-                # The logic: If Final scores are equal (0.0), whoever had higher Prelim wins.
-                scores.sort(key=lambda x: (x['f_tot'], x['p_tot']), reverse=True)
-            else: 
-                scores.sort(key=lambda x: x['p_tot'], reverse=True)
-
-        db.close()
-        return scores, mode_label, p_headers, f_headers, show_prelim_total
-
-    def refresh_leaderboard():
-        try:
-            results, mode, p_headers, f_headers, show_p_total = get_data()
-            status_text.value = f"{mode} • Live Updates"
-            content_wrapper.controls.clear()
+    def get_data(data=None):
+        if data is None: data = leaderboard_service.get_standings(event_id)
+        return data['event_name'], data['scores'], data['mode_label'], data['p_headers'], data['f_headers'], data['show_prelim_total']
 
-            if not results:
-                content_wrapper.controls.append(ft.Text("No scores available yet.", color="white70"))
-                page.update()
-                return
+    # Keyed model of what is on screen, so a refresh only re-sends the cells that changed
+    rendered = {'layout': None, 'tables': {}, 'rows': {}} # tables: key -> DataTable, rows: (table, id) -> [values, DataRow]
+
+    def refresh_leaderboard(data=None):
+        try:
+            event_name, results, mode, p_headers, f_headers, show_p_total = get_data(data)
+            changed = False
+            for control, value in ((title_text, event_name), (status_text, f"{mode} • Live Updates")):
+                if control.value != value:
+                    control.value = value; changed = True
 
             # --- RESPONSIVE SETTINGS ---
             current_width = page.width if page.width > 0 else 400
@@ -318,7 +151,101 @@ def EventLeaderboardView(page: ft.Page, event_id: int):
             badge_size = 16 if is_mobile else 30
             row_height = 32 if is_mobile else 50 
 
-            def create_modern_table(rows, cols, color_theme, title):
+            # --- TABLES: (key, rows in display order, theme color, title) ---
+            if event_type == "QuizBee":
+                tables = [("Quiz", [(i + 1, r) for i, r in enumerate(results)], "#64AEFF", "Quiz Standings")] if results else []
+            else:
+                # Already sorted and ranked by the leaderboard service (shared, read-only)
+                tables = []
+                for gender, color_code in (("Male", "#64AEFF"), ("Female", "#FF64AE")): # Login Blue / Pink
+                    subset = [(r['rank'], r) for r in results if r.get('gender') == gender]
+                    if subset: tables.append((gender, subset, color_code, f"{gender} Category"))
+
+            def row_values(rank, r):
+                """Everything a row displays, one (text, color, bold) per cell; the rank cell holds the rank."""
+                if event_type == "QuizBee":
+                    name, is_elim, prelim_scores, prelim_total, final_scores = r['name'], "Eliminated" in r['name'], r['p_bd'], r['p_tot'], r['f_bd']
+                else:
+                    name, is_elim, prelim_scores, prelim_total, final_scores = r['name'], False, r['segment_scores'], f"{r['p_tot']}%", r['final_scores']
+                text_col = "grey" if is_elim else "black"
+                values = [rank, (name, text_col, True)]
+                values += [(str(s_val), text_col, False) for s_val in prelim_scores]
+                if show_p_total: values.append((str(prelim_total), "#64AEFF" if not is_elim else "grey", True))
+                if event_type == "QuizBee": values += [(str(s_val), text_col, False) for s_val in final_scores]
+                else: values += [(str(s_val), "black", True) for s_val in final_scores]
+                return values
+
+            def rank_badge(rank):
+                # Modern Rank Badge
+                badge_color = {1: "#FFD700", 2: "#C0C0C0", 3: "#CD7F32"}.get(rank) # Gold / Silver / Bronze
+                if badge_color is None: return ft.Text(str(rank), weight="bold", size=data_size)
+                return ft.Container(content=ft.Text(str(rank), color="white", weight="bold", size=data_size), bgcolor=badge_color, border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center)
+
+            def build_cells(values):
+                cells = [ft.DataCell(rank_badge(values[0]))]
+                for text, color, bold in values[1:]:
+                    cells.append(ft.DataCell(ft.Text(text, color=color, weight="bold" if bold else None)))
+                return cells
+
+            def patch_cells(row, old, new):
+                """Updates only the cells whose value changed; the others are not re-sent."""
+                if len(old) != len(new):
+                    row.cells = build_cells(new)
+                    return
+                for i, (cell, before, after) in enumerate(zip(row.cells, old, new)):
+                    if before == after: continue
+                    if i == 0:
+                        cell.content = rank_badge(after)
+                    else:
+                        cell.content.value, cell.content.color = after[0], after[1]
+
+            def row_color(rank):
+                return "#F9FAFB" if (rank - 1) % 2 == 0 else "white"
+
+            # Same headers, tables and contestants as on screen: patch rows in place
+            layout = (event_type, is_mobile, tuple(p_headers), tuple(f_headers), show_p_total,
+                      tuple((key, frozenset(r['id'] for _, r in rows)) for key, rows, _, _ in tables))
+            if layout == rendered['layout']:
+                for key, rows, _, _ in tables:
+                    ordered = []
+                    for rank, r in rows:
+                        entry = rendered['rows'][(key, r['id'])]
+                        values = row_values(rank, r)
+                        if entry[0] != values:
+                            patch_cells(entry[1], entry[0], values)
+                            entry[1].color = row_color(rank)
+                            entry[0] = values
+                            changed = True
+                        ordered.append(entry[1])
+                    table = rendered['tables'][key]
+                    if any(a is not b for a, b in zip(table.rows, ordered)):
+                        table.rows = ordered # Rank changes only move existing rows
+                        changed = True
+                if changed: page.update()
+                return
+
+            # --- FULL BUILD (first load, or headers/contestants changed) ---
+            rendered.update(layout=layout, tables={}, rows={})
+            content_wrapper.controls.clear()
+
+            if not results:
+                content_wrapper.controls.append(ft.Text("No scores available yet.", color="white70"))
+                page.update()
+                return
+
+            def create_modern_table(key, rows, cols, color_theme, title):
+                table = ft.DataTable(
+                    columns=cols,
+                    rows=rows,
+                    heading_row_height=row_height,
+                    data_row_max_height=row_height + 10,
+                    heading_text_style=ft.TextStyle(weight="bold", color="black", size=heading_size),
+                    data_text_style=ft.TextStyle(size=data_size, color="black"),
+                    column_spacing=10 if is_mobile else 20,
+                    vertical_lines=ft.border.BorderSide(1, "#F0F0F0"),
+                    heading_row_color=ft.Colors.with_opacity(0.1, color_theme), 
+                )
+                rendered['tables'][key] = table
                 return ft.Container(
                     content=ft.Column([
                         ft.Container(
@@ -327,19 +254,7 @@ def EventLeaderboardView(page: ft.Page, event_id: int):
                             bgcolor=color_theme, 
                             border_radius=ft.border_radius.only(top_left=10, top_right=10)
                         ),
-                        ft.Row([
-                            ft.DataTable(
-                                columns=cols,
-                                rows=rows,
-                                heading_row_height=row_height,
-                                data_row_max_height=row_height + 10,
-                                heading_text_style=ft.TextStyle(weight="bold", color="black", size=heading_size),
-                                data_text_style=ft.TextStyle(size=data_size, color="black"),
-                                column_spacing=10 if is_mobile else 20,
-                                vertical_lines=ft.border.BorderSide(1, "#F0F0F0"),
-                                heading_row_color=ft.Colors.with_opacity(0.1, color_theme), 
-                            )
-                        ], scroll="adaptive", expand=True) 
+                        ft.Row([table], scroll="adaptive", expand=True) 
                     ]),
                     bgcolor="white",
                     border_radius=10,
@@ -350,104 +265,44 @@ def EventLeaderboardView(page: ft.Page, event_id: int):
                     width=None 
                 )
 
-            if event_type == "QuizBee":
-                # --- QUIZ BEE TABLE ---
-                cols = [
-                    ft.DataColumn(ft.Text("Rank")), 
-                    ft.DataColumn(ft.Text("Name"))
-                ]
-                
+            for key, rows, color_code, title in tables:
+                # --- COLUMNS ---
+                if event_type == "QuizBee":
+                    cols = [ft.DataColumn(ft.Text("Rank")), ft.DataColumn(ft.Text("Name"))]
+                    total_label = ft.Text("PRELIM TOTAL", weight="bold", size=heading_size)
+                else:
+                    cols = [ft.DataColumn(ft.Text("Rank")), ft.DataColumn(ft.Text(f"{key.upper()} CANDIDATE"))]
+                    total_label = ft.Text("PRELIM %", weight="bold")
                 for h in p_headers: cols.append(ft.DataColumn(ft.Text(h, size=heading_size), numeric=True))
-                if show_p_total: cols.append(ft.DataColumn(ft.Text("PRELIM TOTAL", weight="bold", size=heading_size), numeric=True))
+                if show_p_total: cols.append(ft.DataColumn(total_label, numeric=True))
                 for h in f_headers: cols.append(ft.DataColumn(ft.Text(h, size=heading_size), numeric=True))
-                
-                rows = []
-                for i, r in enumerate(results):
-                    is_elim = "Eliminated" in r['name']
-                    
-                    # Modern Rank Badge
-                    rank_content = ft.Text(str(i+1), weight="bold", size=data_size)
-                    if i == 0: rank_content = ft.Container(content=ft.Text("1", color="white", weight="bold", size=data_size), bgcolor="#FFD700", border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center) # Gold
-                    elif i == 1: rank_content = ft.Container(content=ft.Text("2", color="white", weight="bold", size=data_size), bgcolor="#C0C0C0", border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center) # Silver
-                    elif i == 2: rank_content = ft.Container(content=ft.Text("3", color="white", weight="bold", size=data_size), bgcolor="#CD7F32", border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center) # Bronze
-                    
-                    row_color = "#F9FAFB" if i % 2 == 0 else "white"
-                    text_col = "grey" if is_elim else "black"
-
-                    cells = [
-                        ft.DataCell(rank_content), 
-                        ft.DataCell(ft.Text(r['name'], color=text_col, weight="bold"))
-                    ]
-                    for s in r['p_bd']: cells.append(ft.DataCell(ft.Text(str(s), color=text_col)))
-                    if show_p_total: cells.append(ft.DataCell(ft.Text(str(r['p_tot']), weight="bold", color="#64AEFF" if not is_elim else "grey")))
-                    for s in r['f_bd']: cells.append(ft.DataCell(ft.Text(str(s), color=text_col)))
-                    
-                    rows.append(ft.DataRow(cells=cells, color=row_color))
-
-                content_wrapper.controls.append(create_modern_table(rows, cols, "#64AEFF", "Quiz Standings"))
 
-            else:
-                # --- PAGEANT TABLE (Split by Gender) ---
-                def build_gender_table(gender, color_code):
-                    subset = [r for r in results if r.get('gender') == gender]
-                    if not subset: return None
-                    
-                    # Already sorted in get_data(), but re-indexing ranks here for display
-                    for idx, s in enumerate(subset): s['rank'] = idx + 1
-
-                    # --- COLUMNS ---
-                    cols = [
-                        ft.DataColumn(ft.Text("Rank")), 
-                        ft.DataColumn(ft.Text(f"{gender.upper()} CANDIDATE"))
-                    ]
-                    for h in p_headers: cols.append(ft.DataColumn(ft.Text(h, size=heading_size), numeric=True))
-                    if show_p_total: cols.append(ft.DataColumn(ft.Text("PRELIM %", weight="bold"), numeric=True))
-                    for h in f_headers: cols.append(ft.DataColumn(ft.Text(h, size=heading_size), numeric=True))
-
-                    rows = []
-                    for r in subset:
-                        # Modern Rank Badge
-                        rank_content = ft.Text(str(r['rank']), weight="bold", size=data_size)
-                        if r['rank'] == 1: rank_content = ft.Container(content=ft.Text("1", color="white", weight="bold", size=data_size), bgcolor="#FFD700", border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center)
-                        elif r['rank'] == 2: rank_content = ft.Container(content=ft.Text("2", color="white", weight="bold", size=data_size), bgcolor="#C0C0C0", border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center)
-                        elif r['rank'] == 3: rank_content = ft.Container(content=ft.Text("3", color="white", weight="bold", size=data_size), bgcolor="#CD7F32", border_radius=50, width=badge_size, height=badge_size, alignment=ft.alignment.center)
-
-                        idx = r['rank'] - 1
-                        row_color = "#F9FAFB" if idx % 2 == 0 else "white"
-
-                        cells = [
-                            ft.DataCell(rank_content),
-                            ft.DataCell(ft.Text(r['name'], weight="bold", color="black"))
-                        ]
-                        
-                        for s_val in r['segment_scores']: cells.append(ft.DataCell(ft.Text(str(s_val))))
-                        if show_p_total: cells.append(ft.DataCell(ft.Text(f"{r['p_tot']}%", weight="bold", color="#64AEFF")))
-                        for s_val in r['final_scores']: cells.append(ft.DataCell(ft.Text(str(s_val), color="black", weight="bold")))
-
-                        rows.append(ft.DataRow(cells=cells, color=row_color))
-                    
-                    return create_modern_table(rows, cols, color_code, f"{gender} Category")
-
-                # Build Tables
-                male_table = build_gender_table("Male", "#64AEFF") # Login Blue
-                female_table = build_gender_table("Female", "#FF64AE") # Pink
-
-                if male_table: content_wrapper.controls.append(male_table)
-                if female_table: content_wrapper.controls.append(female_table)
+                data_rows = []
+                for rank, r in rows:
+                    values = row_values(rank, r)
+                    row = ft.DataRow(cells=build_cells(values), color=row_color(rank))
+                    rendered['rows'][(key, r['id'])] = [values, row]
+                    data_rows.append(row)
+
+                content_wrapper.controls.append(create_modern_table(key, data_rows, cols, color_code, title))
 
             page.update()
         except Exception as e:
             print(f"ERROR in Leaderboard: {e}") 
 
-    def poll_updates():
-        while is_active:
-            refresh_leaderboard()
-            time.sleep(3)
+    # Every spectator of this event shares one poller; it hands us the standings when they change
+    def on_change(snapshot):
+        if is_active: refresh_leaderboard(snapshot['standings'])
+
+    def stop_updates():
+        nonlocal is_active; is_active = False
+        event_poller.unsubscribe(subscription)
 
-    threading.Thread(target=poll_updates, daemon=True).start()
+    subscription = event_poller.subscribe(event_id, on_change, standings=True) # Also delivers the initial load
+    updates_task = page_tasks.add(page, "leaderboard-updates", stop_updates)
 
     def go_back(e):
-        nonlocal is_active; is_active = False 
+        page_tasks.cancel(page, updates_task)
         page.go("/leaderboard")
 
     # Header for the specific event view